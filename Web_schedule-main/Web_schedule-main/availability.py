@@ -0,0 +1,87 @@
+# ==========================================
+# 🗓️ Availability Engine (Bitmask Calendars)
+# ==========================================
+# ตารางว่างของทรัพยากรแต่ละตัว (ครู, ห้อง, ...) เก็บเป็น int bitmask ต่อวัน
+#   bit s = 1  -> slot s ไม่ว่าง
+# การเช็คว่าช่วง [s, s+dur) ว่างไหม = bitwise AND ครั้งเดียว
+# และ "slot เริ่มที่วางได้" ต่อ duration คำนวณครั้งเดียวแล้ว cache ไว้
+from functools import lru_cache
+
+def slots_to_mask(slots):
+    mask = 0
+    for s in slots: mask |= 1 << s
+    return mask
+
+def iter_bits(mask):
+    s = 0
+    while mask:
+        if mask & 1: yield s
+        mask >>= 1
+        s += 1
+
+def window(s, dur):
+    return ((1 << dur) - 1) << s
+
+def is_free(busy_mask, s, dur):
+    return not (busy_mask & window(s, dur))
+
+@lru_cache(maxsize=65536)
+def free_starts(busy_mask, dur, total_slots):
+    # bitmask ของ slot เริ่ม s ที่ทำให้ [s, s+dur) ว่างทั้งหมดและไม่เกินวัน
+    if dur > total_slots: return 0
+    free = ~busy_mask & ((1 << total_slots) - 1)
+    ok = (1 << (total_slots - dur + 1)) - 1
+    for k in range(dur):
+        ok &= free >> k
+    return ok
+
+# ==========================================
+# 📚 Calendars
+# ==========================================
+def build_calendar(unavailable_map, n_days):
+    # {resource: {day_idx: set(slots)}} -> {resource: [mask_day0, mask_day1, ...]}
+    return {res: [slots_to_mask(by_day.get(d, ())) for d in range(n_days)]
+            for res, by_day in unavailable_map.items()}
+
+def build_availability(n_days, total_slots, **calendars):
+    # calendars: kind=unavailable_map เช่น teacher={...}, room={...}
+    engine = {'n_days': n_days, 'total_slots': total_slots}
+    for kind, unavailable_map in calendars.items():
+        add_calendar(engine, kind, unavailable_map)
+    return engine
+
+def add_calendar(engine, kind, unavailable_map):
+    # เพิ่มทรัพยากรชนิดใหม่ (เช่น กลุ่มนักศึกษา) ได้โดยไม่ต้องแก้โค้ดส่วนอื่น
+    calendar = build_calendar(unavailable_map, engine['n_days'])
+    engine.setdefault(kind, {}).update(calendar)
+    engine.setdefault('base', {}).setdefault(kind, {}).update({res: list(cal) for res, cal in calendar.items()})
+
+def _base(engine, kind, res):
+    # slot ที่ไม่ว่างจริง (unavailable / block) เก็บแยกจากการจอง เพื่อให้ release ไม่ลบทิ้ง
+    return engine.setdefault('base', {}).setdefault(kind, {}).setdefault(res, [0] * engine['n_days'])
+
+def busy_mask(engine, kind, res, d):
+    cal = engine.get(kind, {}).get(res)
+    return cal[d] if cal else 0
+
+def resource_free_starts(engine, kind, res, d, dur):
+    return free_starts(busy_mask(engine, kind, res, d), dur, engine['total_slots'])
+
+def reserve(engine, kind, res, d, s, dur):
+    # จองช่วงเวลา (แก้ engine ในที่) คืนค่า False ถ้าชนกับที่จองไว้แล้ว
+    cal = engine.setdefault(kind, {}).setdefault(res, [0] * engine['n_days'])
+    w = window(s, dur)
+    if cal[d] & w: return False
+    cal[d] |= w
+    return True
+
+def block(engine, kind, res, d, s, dur):
+    # ทำเครื่องหมายไม่ว่างโดยไม่ตรวจการชน (เช่น fixed lock ที่ทับช่วง unavailable ของครูได้)
+    cal = engine.setdefault(kind, {}).setdefault(res, [0] * engine['n_days'])
+    cal[d] |= window(s, dur)
+    _base(engine, kind, res)[d] |= window(s, dur)
+
+def release(engine, kind, res, d, s, dur):
+    # ยกเลิกการจอง: ช่วงที่ไม่ว่างจริงยังคงไม่ว่าง
+    cal = engine.get(kind, {}).get(res)
+    if cal: cal[d] = (cal[d] & ~window(s, dur)) | _base(engine, kind, res)[d]
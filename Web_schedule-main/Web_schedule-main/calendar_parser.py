@@ -0,0 +1,142 @@
+# ==========================================
+# 🗓️ Calendar Parser (unavailable_times)
+# ==========================================
+# รูปแบบที่รองรับ (ไม่สนตัวพิมพ์เล็ก/ใหญ่, ใช้ : หรือ . คั่นเวลาได้)
+#   Mon 09:00-12:00                      ช่วงเดียว
+#   Mon 09:00-10:00, 13:00-15:00         หลายช่วงในวันเดียว
+#   Mon 09:00-10:00; Wed 13:00-16:00     หลายวันในช่องเดียว (คั่นด้วย ; , / & and หรือขึ้นบรรทัดใหม่)
+#   Mon-Fri 12:00-13:00 / Mon,Wed 9:00-10:30 / Mon/Thu ...   ช่วงวัน / รายการวัน
+#   Daily 08:30-09:00 / Weekdays ... / Everyday ...           ทุกวัน (recurring block)
+#   Fri / Fri all day                    ทั้งวัน
+#   ['Mon 09:00-12:00', 'Tue 13:00-14:00']                   แบบ list เดิมใน all_teachers.csv
+# ผลลัพธ์ถูก cache ต่อข้อความ เพราะครูหลายคนใช้ข้อความเดียวกัน
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+
+import pandas as pd
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+# รวม Sat/Sun ไว้เพื่อให้ช่วงอย่าง Mon-Sun ใช้ได้ (วันที่เกิน DAYS จะถูกตัดทิ้ง)
+DAY_INDEX = {d: i for i, d in enumerate(['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun'])}
+ALL_DAY_WORDS = {'daily', 'everyday', 'weekday', 'weekdays', 'all'}
+
+_TIME_RE = re.compile(r"(\d{1,2})\s*[:.]\s*(\d{2})")
+_DAY_TOKEN = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*|daily|everyday|every\s+day|weekdays?"
+_DAY_SPEC_RE = re.compile(rf"\b((?:{_DAY_TOKEN})(?:\s*(?:-|,|/|&|and|to)\s*(?:{_DAY_TOKEN}))*)\b", re.IGNORECASE)
+_DAY_SPLIT_RE = re.compile(r"\s*(,|/|&|\band\b)\s*", re.IGNORECASE)
+_DAY_RANGE_RE = re.compile(r"\s*(?:-|\bto\b)\s*", re.IGNORECASE)
+_RANGE_RE = re.compile(r"(\d{1,2}\s*[:.]\s*\d{2})\s*(?:-|–|to)\s*(\d{1,2}\s*[:.]\s*\d{2})", re.IGNORECASE)
+_CLEAN_RE = re.compile(r"[\[\]'\"]")
+# ตัดข้อความเป็นส่วน ๆ ตรงที่มีชื่อวันขึ้นต้นใหม่หลังช่วงเวลา (Mon,Wed 9:00-10:00 ยังเป็นส่วนเดียว)
+_SEGMENT_SPLIT_RE = re.compile(rf"[;\n]|(?<=\d)\s*(?:,|/|&|\band\b)(?=\s*(?:{_DAY_TOKEN})\b)", re.IGNORECASE)
+
+# ==========================================
+# ⏱️ Time -> Slot (O(1))
+# ==========================================
+def slot_grid(slot_map):
+    # key ที่ hash ได้ของ slot map (เวลาเริ่มของแต่ละ slot เรียงตาม index)
+    return tuple(slot_map[i]['time'] for i in sorted(slot_map))
+
+def _to_minutes(time_str):
+    match = _TIME_RE.search(str(time_str))
+    if not match: return None
+    h, m = match.groups()
+    return int(h) * 60 + int(m)
+
+@lru_cache(maxsize=32)
+def _grid_tables(grid):
+    starts = [_to_minutes(t) for t in grid]
+    step = starts[1] - starts[0] if len(starts) > 1 else 30
+    exact = {m: i for i, m in enumerate(starts)}
+    return starts, step, exact
+
+def time_to_slot_index(time_str, slot_map):
+    _, _, exact = _grid_tables(slot_grid(slot_map))
+    return exact.get(_to_minutes(time_str), -1)
+
+def _range_to_slots(start_min, end_min, grid):
+    # ปัดออก: slot ใดที่ทับช่วงเวลาแม้บางส่วนถือว่าไม่ว่าง
+    starts, step, exact = _grid_tables(grid)
+    if start_min in exact: s = exact[start_min]
+    else: s = max(bisect_right(starts, start_min) - 1, 0)
+    if end_min in exact: e = exact[end_min]
+    elif end_min >= starts[-1] + step: e = len(starts)
+    else: e = bisect_left(starts, end_min)
+    return s, e
+
+# ==========================================
+# 📅 Parsing
+# ==========================================
+def _parse_days(spec):
+    spec = re.sub(r"\s+", " ", spec.strip().lower())
+    if spec.replace(' ', '') in ALL_DAY_WORDS or spec.startswith('every'):
+        return set(range(len(DAYS)))
+    days = set()
+    for part in _DAY_SPLIT_RE.split(spec):
+        if not part or _DAY_SPLIT_RE.fullmatch(part): continue
+        bounds = [b[:3] for b in _DAY_RANGE_RE.split(part) if b]
+        if bounds and bounds[0] in ('dai', 'eve', 'wee'):
+            return set(range(len(DAYS)))
+        if len(bounds) == 2 and bounds[0] in DAY_INDEX and bounds[1] in DAY_INDEX:
+            lo, hi = DAY_INDEX[bounds[0]], DAY_INDEX[bounds[1]]
+            days.update(range(lo, hi + 1) if lo <= hi else [])
+        else:
+            days.update(DAY_INDEX[b] for b in bounds if b in DAY_INDEX)
+    return {d for d in days if d < len(DAYS)}
+
+@lru_cache(maxsize=4096)
+def parse_calendar(text, grid):
+    # ข้อความ -> tuple ของ bitmask ต่อวัน (bit s = slot s ไม่ว่าง)
+    masks = [0] * len(DAYS)
+    total = len(grid)
+    text = _CLEAN_RE.sub('', text)
+    current_days = set()
+    for segment in _SEGMENT_SPLIT_RE.split(text):
+        if not segment.strip(): continue
+        day_match = _DAY_SPEC_RE.search(segment)
+        if day_match:
+            current_days = _parse_days(day_match.group(1))
+            rest = segment[day_match.end():]
+        else:
+            rest = segment   # ช่วงเวลาต่อท้ายวันเดิม เช่น "Mon 9:00-10:00, 13:00-14:00"
+        ranges = _RANGE_RE.findall(rest)
+        if day_match and not ranges and not _TIME_RE.search(rest):
+            for d in current_days: masks[d] = (1 << total) - 1   # ทั้งวัน
+            continue
+        for start_str, end_str in ranges:
+            start_min, end_min = _to_minutes(start_str), _to_minutes(end_str)
+            if start_min is None or end_min is None or start_min >= end_min: continue
+            s, e = _range_to_slots(start_min, end_min, grid)
+            if s >= e: continue
+            bits = ((1 << (e - s)) - 1) << s
+            for d in current_days: masks[d] |= bits
+    return tuple(masks)
+
+def _normalize_input(unavailable_input):
+    if isinstance(unavailable_input, (list, tuple)):
+        return '; '.join(str(i[0] if isinstance(i, list) and i else i) for i in unavailable_input)
+    if unavailable_input is None: return ''
+    try:
+        if pd.isna(unavailable_input): return ''
+    except (TypeError, ValueError):
+        pass
+    return str(unavailable_input)
+
+def parse_unavailable_masks(unavailable_input, slot_map):
+    return parse_calendar(_normalize_input(unavailable_input), slot_grid(slot_map))
+
+@lru_cache(maxsize=4096)
+def _mask_to_slots(mask):
+    slots = []
+    s = 0
+    while mask:
+        if mask & 1: slots.append(s)
+        mask >>= 1
+        s += 1
+    return frozenset(slots)
+
+def parse_unavailable_time(unavailable_input, slot_map):
+    # รูปแบบเดิม: {day_idx: set(slots)}
+    masks = parse_unavailable_masks(unavailable_input, slot_map)
+    return {d: set(_mask_to_slots(m)) for d, m in enumerate(masks)}
@@ -0,0 +1,174 @@
+# ==========================================
+# 🧩 Day-by-day Decomposition Mode
+# ==========================================
+# สำหรับข้อมูลขนาดใหญ่ที่โมเดลเดียว (tasks x rooms x 5 วัน x 21 slots) ใหญ่เกินไป
+#   1) Coarse model: เลือกวันให้แต่ละ task โดยใช้ความจุรวมของครู/กลุ่มห้องต่อวัน
+#   2) แก้ปัญหาแต่ละวันแยกกัน (room/slot) แบบขนานใน process pool
+#   3) Repair: นำ task ที่วางไม่ได้มาลองใหม่ทุกวัน โดยล็อก task ที่วางแล้วไว้
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ortools.sat.python import cp_model
+
+import availability
+from scheduler_core import (DAYS, build_model, solve_model, extract_assignment,
+                            iter_candidates, locked_teacher_slots, room_fits, section_pairs,
+                            section_violations, task_score)
+
+COARSE_TIME_SHARE = 0.1
+DAY_TIME_SHARE = 0.7   # ที่เหลือใช้กับ repair
+
+def _usable_slots(problem, config):
+    # slot ที่ใช้สอนได้ในหนึ่งวัน (ไม่รวมพักเที่ยงและนอกช่วงเวลาของ mode)
+    usable = set()
+    for s, info in problem['slot_map'].items():
+        if info['is_lunch']: continue
+        if config['MODE'] == 1 and not (9.0 <= info['val'] < 16.0): continue
+        usable.add(s)
+    return usable
+
+def assign_days(problem, config, time_limit, workers):
+    tasks = problem['tasks']
+    model = cp_model.CpModel()
+    usable = _usable_slots(problem, config)
+    locked_busy = locked_teacher_slots(problem)
+
+    x = {}            # (uid, d) -> BoolVar
+    eligible = {}     # uid -> frozenset ของห้องที่ใช้ได้
+    objective_terms = []
+    for t in tasks:
+        uid = t['uid']
+        day_ok = {d for _, d, _ in iter_candidates(problem, config, t)}
+        for d in day_ok:
+            x[(uid, d)] = model.NewBoolVar(f"x_{uid}_{d}")
+        day_vars = [x[(uid, d)] for d in day_ok]
+        if day_vars:
+            model.AddAtMostOne(day_vars)
+            objective_terms.append(sum(day_vars) * task_score(t))
+        eligible[uid] = frozenset(r['room'] for r in problem['room_list'] if room_fits(t, r) and r['room'] != 'Online')
+
+    for d in range(len(DAYS)):
+        # ความจุครูต่อวัน
+        teacher_load = {}
+        for t in tasks:
+            if (t['uid'], d) not in x: continue
+            for tea in t['teachers']:
+                if tea == 'Unknown': continue
+                teacher_load.setdefault(tea, []).append(x[(t['uid'], d)] * t['dur'])
+        # ช่องที่ไม่ว่างมาจาก engine (รวม unavailable_times และคาบที่ล็อกไว้แล้ว)
+        max_slots = problem.get('teacher_max_slots', {})
+        for tea, terms in teacher_load.items():
+            busy = availability.busy_mask(problem['availability'], 'teacher', tea, d)
+            free = len([s for s in usable if not busy >> s & 1])
+            fixed_load = sum(dur for _, dur in locked_busy.get((tea, d), []))
+            model.Add(sum(terms) <= max(0, min(free, max_slots.get(tea, free + fixed_load) - fixed_load)))
+
+        # ความจุกลุ่มนักศึกษาต่อวัน (ไม่รวมคาบของวิชานอกหลักสูตรที่ fix ไว้)
+        group_load = {}
+        for t in tasks:
+            if (t['uid'], d) not in x: continue
+            for g in t.get('groups', ()):
+                group_load.setdefault(g, []).append(x[(t['uid'], d)] * t['dur'])
+        for g, terms in group_load.items():
+            busy = availability.busy_mask(problem['availability'], 'group', g, d)
+            model.Add(sum(terms) <= len([s for s in usable if not busy >> s & 1]))
+
+        # ความจุห้องต่อวัน: task ที่ใช้ได้เฉพาะห้องในกลุ่ม E ต้องรวมกันไม่เกิน |E| x slot ที่ใช้ได้
+        for room_set in set(eligible.values()):
+            if not room_set: continue
+            terms = [x[(t['uid'], d)] * t['dur'] for t in tasks
+                     if (t['uid'], d) in x and eligible[t['uid']] and eligible[t['uid']] <= room_set]
+            if terms: model.Add(sum(terms) <= len(room_set) * len(usable))
+
+    # กฎของ section ระดับวัน (ดู add_section_rules): Lec วันเดียวกันหรือก่อน Lab (+ ระยะห่างขั้นต่ำ/สูงสุด)
+    # และคาบบรรยายที่ถูกแบ่งอยู่คนละวัน ส่วนลำดับภายในวันเดียวกันบังคับในโมเดลของวันนั้น
+    day_expr = {}
+    sched_expr = {}
+    for t in tasks:
+        day_vars = [(d, x[(t['uid'], d)]) for d in range(len(DAYS)) if (t['uid'], d) in x]
+        day_expr[t['uid']] = sum(d * v for d, v in day_vars)
+        sched_expr[t['uid']] = [v for _, v in day_vars]
+
+    def both_placed(a, b):
+        both = model.NewBoolVar(f"both_{a['uid']}_{b['uid']}")
+        model.Add(sum(sched_expr[a['uid']]) + sum(sched_expr[b['uid']]) == 2).OnlyEnforceIf(both)
+        model.Add(sum(sched_expr[a['uid']]) + sum(sched_expr[b['uid']]) <= 1).OnlyEnforceIf(both.Not())
+        return both
+
+    lec_lab, lec_parts = section_pairs(tasks)
+    min_gap = config.get('LAB_MIN_GAP_DAYS', 0)
+    max_gap = config.get('LAB_MAX_GAP_DAYS')
+    for lec, lab in lec_lab:
+        if not sched_expr[lab['uid']] or not sched_expr[lec['uid']]: continue
+        both = both_placed(lec, lab)
+        model.Add(day_expr[lab['uid']] >= day_expr[lec['uid']] + min_gap).OnlyEnforceIf(both)
+        if max_gap is not None:
+            model.Add(day_expr[lab['uid']] <= day_expr[lec['uid']] + max_gap).OnlyEnforceIf(both)
+    if config.get('SPLIT_LEC_DIFFERENT_DAYS'):
+        for first, second in lec_parts:
+            if not sched_expr[first['uid']] or not sched_expr[second['uid']]: continue
+            model.Add(day_expr[second['uid']] >= day_expr[first['uid']] + 1).OnlyEnforceIf(both_placed(first, second))
+
+    if objective_terms:
+        model.Maximize(sum(objective_terms))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = workers
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+
+    day_of = {}
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        for (uid, d), var in x.items():
+            if solver.Value(var): day_of[uid] = d
+    return day_of
+
+def _solve_day(problem, config, d, uids, time_limit, workers):
+    # รันใน process ลูก: โมเดลเล็กเฉพาะ task ของวัน d
+    tasks = [t for t in problem['tasks'] if t['uid'] in uids]
+    bundle = build_model(problem, config, tasks=tasks, days=[d])
+    status, solver = solve_model(bundle, config, time_limit=time_limit, workers=workers)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return {}
+    return extract_assignment(bundle, solver)
+
+def repair(problem, config, assignment, time_limit, workers):
+    # วาง task ที่ยังไม่ได้ถูกจัด โดยล็อก task ที่วางแล้วไว้ที่เดิม
+    if len(assignment) == len(problem['tasks']) or time_limit <= 0:
+        return assignment
+    bundle = build_model(problem, config, pinned=assignment)
+    status, solver = solve_model(bundle, config, time_limit=time_limit, workers=workers)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return assignment
+    return extract_assignment(bundle, solver)
+
+def solve_decomposed(problem, config):
+    total_time = config['TIMEOUT']
+    workers = config.get('WORKERS', 4)
+    # config ที่ส่งเข้า process ลูกต้อง pickle ได้ (ตัด callback ออก)
+    sub_config = {k: v for k, v in config.items() if not callable(v)}
+
+    day_of = assign_days(problem, sub_config, total_time * COARSE_TIME_SHARE, workers)
+    day_tasks = {}
+    for uid, d in day_of.items():
+        day_tasks.setdefault(d, set()).add(uid)
+
+    assignment = {}
+    if day_tasks:
+        n_proc = max(1, min(len(day_tasks), workers))
+        threads = max(1, workers // n_proc)
+        rounds = -(-len(day_tasks) // n_proc)   # จำนวนรอบที่ pool ต้องรัน (ceil)
+        day_time = total_time * DAY_TIME_SHARE / rounds
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=n_proc, mp_context=ctx) as pool:
+            futures = [pool.submit(_solve_day, problem, sub_config, d, uids, day_time, threads)
+                       for d, uids in sorted(day_tasks.items())]
+            for f in futures:
+                assignment.update(f.result())
+
+    # กันไว้อีกชั้น: คู่ที่ผิดกฎของ section (เช่น Lab ก่อน Lec ข้ามวัน) ห้ามออกไปเป็นผลลัพธ์
+    # ถอด task ตัวหลังออกให้ repair วางใหม่ (ถ้าปักไว้ทั้งคู่ โมเดล repair จะ infeasible แล้วคืนค่าเดิมที่ผิดกฎ)
+    for first, second in section_violations(problem, config, assignment):
+        assignment.pop(second if second in assignment else first, None)
+
+    repair_time = total_time * (1 - COARSE_TIME_SHARE - DAY_TIME_SHARE)
+    return repair(problem, config, assignment, repair_time, workers)
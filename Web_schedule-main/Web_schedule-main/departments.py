@@ -0,0 +1,195 @@
+# ==========================================
+# 🏛️ Multi-department Scheduling (shared room pool)
+# ==========================================
+# แต่ละภาควิชา solve โมเดลเล็กของตัวเองคนละ process แทนโมเดลรวมขนาดใหญ่ตัวเดียว
+#   1) ทุกภาค snapshot ledger (room_ledger.py) -> ห้องที่ภาคอื่นจองแล้วใส่เป็น unavailable_times
+#      ครูที่สอนภาคอื่นใส่เป็น df_teacher_bookings (ไม่ว่าง + นับเป็นภาระงานต่อวันเหมือน task ที่ล็อก)
+#   2) solve ด้วย run_solver ตามปกติ แล้ว commit การจองของตัวเอง (ห้องและครูที่สอนหลายภาค)
+#   3) ภาคที่ commit ไม่ผ่าน (ชนกับภาคที่ commit ก่อน) เท่านั้นที่ถูก solve ใหม่ในรอบถัดไป
+# รอบสุดท้าย (LEDGER_MAX_ROUNDS) solve ทีละภาคใน process นี้ -> ไม่มีภาคอื่นแทรก commit ได้
+# ภาคที่ยังชนในรอบสุดท้าย (อีก session commit แทรก) เก็บตารางไว้ ตัดออกเฉพาะคาบที่ชน (drop_conflicts)
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import room_ledger
+from calendar_parser import DAYS
+
+LEDGER_MAX_ROUNDS = 3
+SHARED_KEYS = ['df_room', 'all_teacher', 'df_teacher_courses']
+
+def department_data(shared, courses, fixed=None, groups=None):
+    # data dict รูปแบบเดียวกับที่ run_solver รับ: วิชาของภาคอยู่ในช่อง df_ai_in, ช่องของอีกหลักสูตรว่าง
+    empty = pd.DataFrame()
+    return {
+        **{k: shared.get(k, empty) for k in SHARED_KEYS},
+        'df_ai_in': courses, 'df_cy_in': empty,
+        'df_ai_out': fixed if fixed is not None else empty, 'df_cy_out': empty,
+        'df_groups': groups if groups is not None else empty,
+    }
+
+def split_bundled_departments(data):
+    # ข้อมูลเดิมของแอป (AI / Cyber) -> สองภาคที่ใช้ห้องและครูร่วมกัน
+    departments = {}
+    for name, key_in, key_out in [('AI', 'df_ai_in', 'df_ai_out'), ('CY', 'df_cy_in', 'df_cy_out')]:
+        if data.get(key_in) is None or data[key_in].empty: continue
+        departments[name] = department_data(data, data[key_in], data.get(key_out), data.get('df_groups'))
+    return departments
+
+# ==========================================
+# 📒 Ledger <-> data
+# ==========================================
+def _busy_ranges(cells, slot_map):
+    # {(kind, resource): [(day, slot)]} -> {(kind, resource): "Mon 09:00-10:30; ..."} (slot ติดกันรวมเป็นช่วงเดียว)
+    texts = {}
+    for key, spots in cells.items():
+        ranges = []
+        for d in sorted({d for d, _ in spots}):
+            slots = sorted(s for day, s in spots if day == d)
+            start = prev = slots[0]
+            for s in slots[1:] + [None]:
+                if s is not None and s == prev + 1:
+                    prev = s
+                    continue
+                end = slot_map.get(prev + 1, {'time': '19:00'})['time']
+                ranges.append(f"{DAYS[d]} {slot_map[start]['time']}-{end}")
+                if s is not None: start = prev = s
+        texts[key] = "; ".join(ranges)
+    return texts
+
+def _block(df, id_col, busy):
+    # ต่อช่วงที่ถูกจองเข้ากับ unavailable_times เดิม (parse_unavailable_time อ่านหลายช่วงคั่นด้วย ';' ได้)
+    df = df.copy()
+    if 'unavailable_times' not in df.columns:
+        df['unavailable_times'] = '[]'
+    ids = df[id_col].astype(str).str.strip()
+    old = df['unavailable_times'].fillna('[]').astype(str)
+    df['unavailable_times'] = [f"{text}; {busy[i]}" if i in busy else text for i, text in zip(ids, old)]
+    known = set(ids)
+    missing = [i for i in busy if i not in known]
+    if missing:
+        df = pd.concat([df, pd.DataFrame({id_col: missing, 'unavailable_times': [busy[i] for i in missing]})], ignore_index=True)
+    return df
+
+def with_bookings(data, booked, slot_map):
+    # booked: [(kind, resource, day, slot)] ของภาคอื่น -> data ที่ห้อง/ครูเหล่านั้นไม่ว่าง
+    #   ห้อง: ต่อท้าย unavailable_times ของ room.csv
+    #   ครู : df_teacher_bookings (prepare_problem นับเป็นภาระงาน max_hours_per_day / MAX_CONSECUTIVE / ช่วงว่าง)
+    cells = {}
+    for kind, res, d, s in booked:
+        if kind == 'room': cells.setdefault((kind, res), []).append((d, s))
+    rooms = {res: text for (_, res), text in _busy_ranges(cells, slot_map).items()}
+    data = dict(data)
+    if rooms and not data['df_room'].empty:
+        # ห้องที่ไม่มีใน room.csv (เช่นห้องของวิชา fixed) ไม่ต้องเพิ่ม เพราะโมเดลไม่ใช้อยู่แล้ว
+        known = set(data['df_room']['room'].astype(str).str.strip())
+        data['df_room'] = _block(data['df_room'], 'room', {r: t for r, t in rooms.items() if r in known})
+    teachers = sorted({(res, d, s) for kind, res, d, s in booked if kind == 'teacher'})
+    if teachers:
+        data['df_teacher_bookings'] = pd.DataFrame(teachers, columns=['teacher_id', 'day', 'slot'])
+    return data
+
+def result_bookings(df, slot_map):
+    # ผลลัพธ์ของภาค -> [(kind, resource, day, slot, course)] สำหรับ room_ledger.commit
+    if df is None or df.empty:
+        return []
+    slot_of = {info['val']: s for s, info in slot_map.items()}
+    bookings = set()
+    for row in df.to_dict('records'):
+        d, s = DAYS.index(row['Day']), slot_of[row['StartVal']]
+        course = f"{row['Course']} S{row['Sec']} {row['Type']}"
+        resources = [('room', str(row['Room']).strip())] if row['Room'] != 'Online' else []
+        resources += [('teacher', tea.strip()) for tea in str(row['Teachers']).split(',')
+                      if tea.strip() not in ('', 'Unknown')]
+        for kind, res in resources:
+            for k in range(int(row['Duration'])):
+                bookings.add((kind, res, d, s + k, course))
+    return sorted(bookings)
+
+# ==========================================
+# ⚙️ Solve
+# ==========================================
+def solve_department(name, data, config, db_path=None):
+    # snapshot -> solve -> commit (รันได้ทั้งใน process ลูกและ process หลัก)
+    from scheduler_core import build_slot_map, run_solver
+    t0 = time.time()
+    slot_map = build_slot_map()
+    version, booked = room_ledger.snapshot(name, db_path)
+    res_df, un_list = run_solver(with_bookings(data, booked, slot_map), config)
+    if res_df is None:
+        res_df = pd.DataFrame()
+    committed, conflicts = room_ledger.commit(name, version, result_bookings(res_df, slot_map), db_path)
+    return {'department': name, 'committed': committed, 'schedule': res_df, 'unscheduled': un_list or [],
+            'conflicts': conflicts, 'seconds': round(time.time() - t0, 1)}
+
+def drop_conflicts(name, res, db_path=None, max_tries=LEDGER_MAX_ROUNDS):
+    # ตัดคาบที่ใช้ช่องที่ภาคอื่นจองไว้ออก แล้ว commit ส่วนที่เหลือ (ชนอีกก็ตัดต่อ) -> คาบที่ตัดรายงานใน unscheduled
+    from scheduler_core import build_slot_map
+    slot_map = build_slot_map()
+    df, conflicts, dropped = res['schedule'], res['conflicts'], []
+    committed = False
+    for _ in range(max_tries):
+        cells = {c[:4] for c in conflicts}
+        hit = [any(b[:4] in cells for b in result_bookings(df.iloc[[i]], slot_map)) for i in range(len(df))]
+        dropped += df.loc[hit].to_dict('records')
+        df = df.loc[[not h for h in hit]].reset_index(drop=True)
+        version, _ = room_ledger.snapshot(name, db_path)
+        committed, conflicts = room_ledger.commit(name, version, result_bookings(df, slot_map), db_path)
+        if committed: break
+    if not committed:
+        dropped += df.to_dict('records')
+        df = df.iloc[0:0]
+    unscheduled = list(res['unscheduled']) + [
+        {'Course': r['Course'], 'Sec': r['Sec'], 'Type': r['Type'], 'Reason': 'Room ledger conflict'} for r in dropped]
+    return dict(res, committed=committed, schedule=df, unscheduled=unscheduled, conflicts=conflicts)
+
+def solve_departments(departments, config, db_path=None):
+    # departments: {ชื่อภาค: data dict} -> (ตารางรวมที่มีคอลัมน์ Department, unscheduled, log ของแต่ละรอบ)
+    # การจองเดิมของภาคในรอบนี้ถูกลบก่อน; ภาคอื่นที่อยู่ใน ledger (เช่นคณะอื่น) ยังคงถูกเคารพ
+    for name in departments:
+        room_ledger.release(name, db_path)
+
+    # config ที่ส่งเข้า process ลูกต้อง pickle ได้ (ตัด callback ออก)
+    sub_config = {k: v for k, v in config.items() if not callable(v)}
+    max_rounds = config.get('LEDGER_MAX_ROUNDS', LEDGER_MAX_ROUNDS)
+    done, log = {}, []
+    pending = list(departments)
+    for rnd in range(1, max_rounds + 1):
+        if not pending: break
+        n_proc = 1 if rnd == max_rounds else \
+            max(1, min(len(pending), config.get('DEPARTMENT_PROCESSES') or os.cpu_count() or 1))
+        dept_config = dict(sub_config, WORKERS=max(1, config.get('WORKERS', 4) // n_proc))
+        if n_proc > 1:
+            with ProcessPoolExecutor(max_workers=n_proc, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [pool.submit(solve_department, name, departments[name], dept_config, db_path) for name in pending]
+                results = [f.result() for f in as_completed(futures)]
+        else:
+            results = [solve_department(name, departments[name], dept_config, db_path) for name in pending]
+
+        pending = []
+        for res in results:
+            log.append({'Round': rnd, 'Department': res['department'], 'Committed': res['committed'],
+                        'Classes': len(res['schedule']), 'Conflicts': len(res['conflicts']), 'Seconds': res['seconds']})
+            if config.get('LOG_CALLBACK'):
+                outcome = 'committed' if res['committed'] else f"collided on {len(res['conflicts'])} cells" + \
+                    (" -> dropping those classes" if rnd == max_rounds else " -> re-solve")
+                config['LOG_CALLBACK'](f"Ledger round {rnd}: {res['department']} {outcome}")
+            if res['committed']:
+                done[res['department']] = res
+                if config.get('DEPARTMENT_CALLBACK'): config['DEPARTMENT_CALLBACK'](res)
+            elif rnd == max_rounds:
+                done[res['department']] = drop_conflicts(res['department'], res, db_path)
+                if config.get('DEPARTMENT_CALLBACK'): config['DEPARTMENT_CALLBACK'](done[res['department']])
+            else:
+                pending.append(res['department'])
+
+    frames, unscheduled = [], []
+    for name in departments:
+        if name not in done: continue
+        frames.append(done[name]['schedule'].assign(Department=name))
+        unscheduled += [dict(u, Department=name) for u in done[name]['unscheduled']]
+    frames = [f for f in frames if not f.empty]
+    return (pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()), unscheduled, log
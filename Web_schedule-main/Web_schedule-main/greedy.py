@@ -0,0 +1,137 @@
+# ==========================================
+# 🧱 Greedy Constructive Draft
+# ==========================================
+# ตารางร่างแบบเร็ว (หลักร้อย task ภายใน ~100 ms) ไม่ใช้ CP-SAT
+#   ลำดับ : คะแนน (fixed > core > elective) -> ห้องที่ใช้ได้น้อยสุด -> ครูที่ว่างน้อยสุด -> คาบยาวก่อน
+#   วาง   : first-fit บนสำเนาของ availability engine (bitmask ห้อง/ครู/กลุ่ม) ตามวัน -> เวลาเริ่ม -> ห้องเล็กสุดที่พอ
+# เงื่อนไขเดียวกับโมเดล: mode/พักเที่ยง/granularity, max_hours_per_day, MAX_CONSECUTIVE, กฎของ section
+# ผลลัพธ์ใช้แสดงทันที และเป็น hint ให้ CP-SAT (hint_draft) -> ได้คำตอบแรกเร็วขึ้น
+import availability
+from scheduler_core import (DAYS, abs_time, base_start_mask, locked_teacher_slots, room_fits,
+                            section_links, section_pair_ok, start_mask, task_score)
+
+def _copy_engine(engine):
+    return {kind: ({res: list(days) for res, days in cal.items()} if isinstance(cal, dict) else cal)
+            for kind, cal in engine.items()}
+
+def _has_run(mask, length):
+    # True ถ้า mask มี bit 1 ติดกันอย่างน้อย length ตัว
+    run = mask
+    for k in range(1, length):
+        run &= mask >> k
+    return bool(run)
+
+def task_order(problem, tasks):
+    engine = problem['availability']
+    week_slots = engine['n_days'] * engine['total_slots']
+    teacher_free = {}
+    for t in tasks:
+        for tea in t['teachers']:
+            if tea not in teacher_free:
+                busy = sum(availability.busy_mask(engine, 'teacher', tea, d).bit_count() for d in range(len(DAYS)))
+                teacher_free[tea] = week_slots - busy
+    n_rooms = {t['uid']: sum(1 for r in problem['room_list'] if room_fits(t, r)) for t in tasks}
+
+    def key(t):
+        tightest = min((teacher_free[tea] for tea in t['teachers'] if tea != 'Unknown'), default=week_slots)
+        return (-task_score(t), n_rooms[t['uid']], tightest, -t['dur'])
+
+    # วางทั้ง section ต่อกันตามลำดับ Lec -> Lab (Lab ที่วางก่อน Lec มักบังคับให้ Lec ไม่มีที่ลง)
+    sections = {}
+    for t in tasks:
+        sections.setdefault((t['id'], t['sec']), []).append(t)
+    ordered = sorted(sections.values(), key=lambda sec_tasks: min(key(t) for t in sec_tasks))
+    return [t for sec_tasks in ordered for t in sorted(sec_tasks, key=lambda t: t['type'] == 'Lab')]
+
+def greedy_schedule(problem, config, tasks=None):
+    # คืนค่า {uid: (room, day, start)} เหมือน extract_assignment (task ที่วางไม่ได้จะไม่อยู่ในผล)
+    tasks = problem['tasks'] if tasks is None else tasks
+    draft = dict(problem, availability=_copy_engine(problem['availability']))
+    engine = draft['availability']
+    max_slots = problem.get('teacher_max_slots', {})
+    max_run = int(config.get('MAX_CONSECUTIVE', 0) * 2)
+
+    # ชั่วโมงสอนต่อ (ครู, วัน) เป็น bitmask แยกจากช่วง unavailable (นับรวม fixed lock)
+    teaching = {}
+    for (tea, d), spans in locked_teacher_slots(problem).items():
+        for s, dur in spans:
+            teaching[(tea, d)] = teaching.get((tea, d), 0) | availability.window(s, dur)
+
+    # คู่ (Lec, Lab) / (P1, P2) -> ตรวจกับ partner ที่วางแล้ว (รวม task ที่ล็อกไว้)
+    placed = {uid: (d, s) for uid, (_, d, s) in problem.get('locked', {}).items()}
+    dur_of = {t['uid']: t['dur'] for t in tasks + problem.get('locked_tasks', [])}
+    after, before = section_links(tasks + problem.get('locked_tasks', []), config)
+
+    def ordered(first, d1, s1, d2, s2, kind):
+        return section_pair_ok(problem, config, dur_of[first], d1, s1, d2, s2, kind)
+
+    def section_ok(uid, d, s):
+        for other, kind in after.get(uid, ()):
+            if other in placed and not ordered(other, *placed[other], d, s, kind): return False
+        for other, kind in before.get(uid, ()):
+            if other in placed and not ordered(uid, d, s, *placed[other], kind): return False
+        return True
+
+    def teacher_ok(t, d, s):
+        w = availability.window(s, t['dur'])
+        for tea in t['teachers']:
+            if tea == 'Unknown': continue
+            busy = teaching.get((tea, d), 0) | w
+            if tea in max_slots and busy.bit_count() > max_slots[tea]: return False
+            if max_run and _has_run(busy, max_run + 1): return False
+        return True
+
+    rooms_by_size = sorted(problem['room_list'], key=lambda r: r['capacity'])
+    base_cache = {}
+    assignment = {}
+    for t in task_order(problem, tasks):
+        rooms = [r['room'] for r in rooms_by_size if room_fits(t, r)]
+        if not rooms: continue
+        if t['dur'] not in base_cache:
+            base_cache[t['dur']] = base_start_mask(problem, config, t['dur'])
+        spot = None
+        for d in range(len(DAYS)):
+            mask = start_mask(draft, config, t, d, base_cache[t['dur']])
+            if not mask: continue
+            room_masks = [(r, availability.resource_free_starts(engine, 'room', r, d, t['dur'])) for r in rooms]
+            for s in availability.iter_bits(mask):
+                if not section_ok(t['uid'], d, s) or not teacher_ok(t, d, s): continue
+                room = next((r for r, free in room_masks if free >> s & 1), None)
+                if room is not None:
+                    spot = (room, d, s)
+                    break
+            if spot: break
+        if spot is None: continue
+
+        room, d, s = spot
+        assignment[t['uid']] = spot
+        placed[t['uid']] = (d, s)
+        if room != 'Online': availability.reserve(engine, 'room', room, d, s, t['dur'])
+        for tea in t['teachers']:
+            if tea == 'Unknown': continue
+            availability.reserve(engine, 'teacher', tea, d, s, t['dur'])
+            teaching[(tea, d)] = teaching.get((tea, d), 0) | availability.window(s, t['dur'])
+        for g in t.get('groups', ()):
+            availability.reserve(engine, 'group', g, d, s, t['dur'])
+    return assignment
+
+def hint_draft(bundle, problem, draft):
+    # hint ครบทุก task ในโมเดล: ที่วางได้ -> sched/ตำแหน่ง/day/start/abs, ที่วางไม่ได้ -> sched = 0
+    # time model ของ two_phase ไม่มีห้อง (key เป็น (uid, None, day, start))
+    model = bundle['model']
+    model.ClearHints()
+    for t in bundle['tasks']:
+        uid = t['uid']
+        if uid not in bundle['is_scheduled']: continue
+        key = None
+        if uid in draft:
+            room, d, s = draft[uid]
+            key = next((k for k in [(uid, room, d, s), (uid, None, d, s)] if k in bundle['schedule']), None)
+        if key is None:
+            model.AddHint(bundle['is_scheduled'][uid], 0)
+            continue
+        model.AddHint(bundle['is_scheduled'][uid], 1)
+        model.AddHint(bundle['schedule'][key], 1)
+        model.AddHint(bundle['task_vars'][uid]['day'], d)
+        model.AddHint(bundle['task_vars'][uid]['start'], s)
+        model.AddHint(bundle['task_vars'][uid]['abs'], abs_time(problem, d, s))
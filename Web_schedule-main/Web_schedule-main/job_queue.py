@@ -0,0 +1,227 @@
+# ==========================================
+# 📬 Solve Job Queue (SQLite)
+# ==========================================
+# แอป Streamlit ส่งงานเข้าคิว แล้ว job_worker.py ดึงงานไปแก้ทีละงาน
+# ผลลัพธ์และ log ถูกเก็บลงไฟล์ SQLite จึงไม่หายเมื่อปิด browser หรือ restart แอป
+import sqlite3
+import json
+import os
+import io
+import time
+import uuid
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUEUE_DB_PATH = os.environ.get('SCHEDULER_QUEUE_DB', os.path.join(BASE_DIR, 'solve_jobs.db'))
+
+# จำนวน CPU thread รวมที่ทุก worker ใช้พร้อมกันได้
+CPU_BUDGET = int(os.environ.get('SCHEDULER_CPU_BUDGET', os.cpu_count() or 4))
+STALE_AFTER_SEC = 60   # งานที่ไม่มี heartbeat นานเกินนี้ถือว่า worker ตาย -> คืนเข้าคิว
+MAX_ATTEMPTS = 3
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat REAL,
+    worker TEXT,
+    cpu INTEGER NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    config TEXT NOT NULL,
+    data TEXT NOT NULL,
+    result TEXT,
+    unscheduled TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    line TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_logs_job ON job_logs(job_id, ts);
+"""
+
+def connect(db_path=None):
+    conn = sqlite3.connect(db_path or QUEUE_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+# --- Serialization (เก็บ DataFrame เป็นข้อความ CSV เหมือนไฟล์ที่อัปโหลด) ---
+def _dump_data(data):
+    return json.dumps({k: df.to_csv(index=False) for k, df in data.items() if df is not None})
+
+def _load_data(text):
+    return {k: pd.read_csv(io.StringIO(csv_text)) if csv_text.strip() else pd.DataFrame()
+            for k, csv_text in json.loads(text).items()}
+
+def _row_to_job(row):
+    job = dict(row)
+    job['config'] = json.loads(job['config'])
+    job.pop('data', None)
+    if job.get('result') is not None:
+        job['result'] = pd.read_csv(io.StringIO(job['result'])) if job['result'].strip() else pd.DataFrame()
+    if job.get('unscheduled'):
+        job['unscheduled'] = json.loads(job['unscheduled'])
+    return job
+
+# ==========================================
+# 📤 App side: submit / poll
+# ==========================================
+def submit_job(data, config, db_path=None):
+    cpu = max(1, min(int(config.get('WORKERS', 4)), CPU_BUDGET))
+    job_config = {k: v for k, v in config.items() if not callable(v)}   # ตัด callback ออก
+    job_config['WORKERS'] = cpu
+    job_id = uuid.uuid4().hex[:12]
+    conn = connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO jobs (job_id, status, created_at, cpu, config, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, STATUS_QUEUED, time.time(), cpu, json.dumps(job_config), _dump_data(data)))
+    finally:
+        conn.close()
+    return job_id
+
+def get_job(job_id, db_path=None):
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None: return None
+        job = _row_to_job(row)
+        if job['status'] == STATUS_QUEUED:
+            job['queue_position'] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                (STATUS_QUEUED, job['created_at'])).fetchone()[0] + 1
+        return job
+    finally:
+        conn.close()
+
+def get_job_logs(job_id, db_path=None, limit=200):
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT line FROM (SELECT ts, line FROM job_logs WHERE job_id = ? ORDER BY ts DESC LIMIT ?) ORDER BY ts",
+            (job_id, limit)).fetchall()
+        return [r['line'] for r in rows]
+    finally:
+        conn.close()
+
+def list_jobs(db_path=None, limit=20):
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT job_id, status, created_at, started_at, finished_at, worker, cpu, attempts, error "
+            "FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+def cancel_job(job_id, db_path=None):
+    # ยกเลิกได้เฉพาะงานที่ยังไม่เริ่ม
+    conn = connect(db_path)
+    try:
+        cur = conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?",
+                           (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED))
+        return cur.rowcount > 0
+    finally:
+        conn.close()
+
+# ==========================================
+# ⚙️ Worker side: claim / heartbeat / finish
+# ==========================================
+def _requeue_stale_jobs(conn):
+    cutoff = time.time() - STALE_AFTER_SEC
+    conn.execute(
+        "UPDATE jobs SET status = ?, error = 'Worker lost (max attempts reached)', finished_at = ? "
+        "WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+        (STATUS_FAILED, time.time(), STATUS_RUNNING, cutoff, MAX_ATTEMPTS))
+    conn.execute(
+        "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ?",
+        (STATUS_QUEUED, STATUS_RUNNING, cutoff))
+
+def claim_next_job(worker_id, cpu_budget=None, db_path=None):
+    # FIFO: ดูเฉพาะงานที่เก่าที่สุด ถ้า CPU ไม่พอให้รอ (งานใหญ่จะไม่โดนงานเล็กแซงตลอด)
+    budget = cpu_budget or CPU_BUDGET
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _requeue_stale_jobs(conn)
+            used = conn.execute("SELECT COALESCE(SUM(cpu), 0) FROM jobs WHERE status = ?",
+                                (STATUS_RUNNING,)).fetchone()[0]
+            row = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                               (STATUS_QUEUED,)).fetchone()
+            if row is None or used + min(row['cpu'], budget) > budget:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, started_at = ?, heartbeat = ?, attempts = attempts + 1 "
+                "WHERE job_id = ?", (STATUS_RUNNING, worker_id, now, now, row['job_id']))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job = _row_to_job(row)
+        job['data'] = _load_data(row['data'])
+        job['cpu'] = min(row['cpu'], budget)
+        return job
+    finally:
+        conn.close()
+
+def heartbeat(job_id, worker_id, db_path=None):
+    conn = connect(db_path)
+    try:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND worker = ?",
+                     (time.time(), job_id, worker_id))
+    finally:
+        conn.close()
+
+def append_logs(job_id, entries, db_path=None):
+    # entries: [(ts, line)] -> insert ทีละชุดใน transaction เดียว (log ของ CP-SAT มาทีละหลายร้อยบรรทัด)
+    if not entries: return
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO job_logs (job_id, ts, line) VALUES (?, ?, ?)",
+                             [(job_id, ts, line) for ts, line in entries])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+def append_log(job_id, line, db_path=None):
+    append_logs(job_id, [(time.time(), line)], db_path)
+
+def finish_job(job_id, worker_id, result_df, unscheduled, db_path=None):
+    result_csv = result_df.to_csv(index=False) if result_df is not None else None
+    conn = connect(db_path)
+    try:
+        conn.execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, unscheduled = ?, error = NULL "
+            "WHERE job_id = ? AND worker = ?",
+            (STATUS_DONE, time.time(), result_csv, json.dumps(unscheduled or [], default=str), job_id, worker_id))
+    finally:
+        conn.close()
+
+def fail_job(job_id, worker_id, error, db_path=None):
+    conn = connect(db_path)
+    try:
+        conn.execute("UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE job_id = ? AND worker = ?",
+                     (STATUS_FAILED, time.time(), str(error), job_id, worker_id))
+    finally:
+        conn.close()
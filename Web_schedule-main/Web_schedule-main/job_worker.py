@@ -0,0 +1,112 @@
+# ==========================================
+# ⚙️ Solve Job Worker Service
+# ==========================================
+# รันแยกจาก Streamlit:  python job_worker.py --processes 2 --cpu-budget 8
+# แต่ละ process ดึงงานจาก job_queue ทีละงาน โดยใช้ CPU รวมไม่เกิน cpu-budget
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+
+import job_queue
+
+HEARTBEAT_SEC = 10
+LOG_FLUSH_SEC = 2        # log ที่ค้างใน buffer ถูกเขียนอย่างช้าทุก ๆ เท่านี้
+LOG_BATCH_LINES = 200    # หรือทันทีที่ค้างครบจำนวนนี้
+
+def log_buffer(job_id, db_path=None):
+    # CP-SAT เรียก LOG_CALLBACK ทีละบรรทัด -> เก็บไว้ใน buffer แล้วเขียนทีละชุด แทนการเปิด connection ต่อบรรทัด
+    # คืนค่า (write, flush); write เรียกได้จากหลาย thread
+    pending = []
+    lock = threading.Lock()
+
+    def flush():
+        with lock:
+            batch = pending[:]
+            del pending[:]
+        job_queue.append_logs(job_id, batch, db_path)
+
+    def write(line):
+        with lock:
+            pending.append((time.time(), line))
+            full = len(pending) >= LOG_BATCH_LINES
+        if full: flush()
+
+    return write, flush
+
+def _heartbeat_loop(job_id, worker_id, db_path, stop_event, flush_logs):
+    last_beat = time.time()
+    while not stop_event.wait(LOG_FLUSH_SEC):
+        try:
+            flush_logs()
+            if time.time() - last_beat >= HEARTBEAT_SEC:
+                job_queue.heartbeat(job_id, worker_id, db_path)
+                last_beat = time.time()
+        except Exception: pass
+
+def process_job(job, worker_id, db_path=None):
+    # import ตรงนี้เพื่อให้ process ที่ว่างอยู่ไม่ต้องโหลด OR-Tools
+    from scheduler_core import run_solver
+
+    job_id = job['job_id']
+    write_log, flush_logs = log_buffer(job_id, db_path)
+    stop_event = threading.Event()
+    hb = threading.Thread(target=_heartbeat_loop, args=(job_id, worker_id, db_path, stop_event, flush_logs), daemon=True)
+    hb.start()
+    try:
+        write_log(f"[worker {worker_id}] start (cpu={job['cpu']}, attempt={job['attempts'] + 1})")
+        config = dict(job['config'])
+        config['WORKERS'] = job['cpu']
+        config['LOG_CALLBACK'] = write_log
+        t0 = time.time()
+        res_df, un_list = run_solver(job['data'], config)
+        write_log(f"[worker {worker_id}] finished in {time.time() - t0:.1f}s")
+        flush_logs()
+        job_queue.finish_job(job_id, worker_id, res_df, un_list, db_path)
+    except Exception:
+        err = traceback.format_exc()
+        write_log(err)
+        flush_logs()
+        job_queue.fail_job(job_id, worker_id, err, db_path)
+    finally:
+        stop_event.set()
+
+def worker_loop(worker_id, db_path=None, cpu_budget=None, poll_sec=2.0, max_jobs=None):
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = job_queue.claim_next_job(worker_id, cpu_budget=cpu_budget, db_path=db_path)
+        if job is None:
+            time.sleep(poll_sec)
+            continue
+        process_job(job, worker_id, db_path)
+        done += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker service for queued scheduling jobs")
+    parser.add_argument('--processes', type=int, default=1, help="number of worker processes")
+    parser.add_argument('--cpu-budget', type=int, default=job_queue.CPU_BUDGET,
+                        help="total CPU threads shared by all running jobs")
+    parser.add_argument('--db', default=job_queue.QUEUE_DB_PATH, help="path to the SQLite queue file")
+    parser.add_argument('--poll', type=float, default=2.0, help="seconds between queue polls when idle")
+    args = parser.parse_args()
+
+    job_queue.connect(args.db).close()   # สร้างตารางก่อน fork
+    host = socket.gethostname()
+    procs = []
+    for i in range(args.processes):
+        worker_id = f"{host}-{os.getpid()}-{i}"
+        p = multiprocessing.Process(target=worker_loop, args=(worker_id, args.db, args.cpu_budget, args.poll),
+                                    name=worker_id, daemon=False)
+        p.start()
+        procs.append(p)
+    print(f"🚀 {len(procs)} worker(s) polling {args.db} (cpu budget={args.cpu_budget})")
+    try:
+        for p in procs: p.join()
+    except KeyboardInterrupt:
+        for p in procs: p.terminate()
+
+if __name__ == '__main__':
+    main()
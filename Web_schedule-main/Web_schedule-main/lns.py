@@ -0,0 +1,87 @@
+# ==========================================
+# 🔁 Large Neighborhood Search (LNS) Improvement
+# ==========================================
+# หลังจาก solve หลักหมดเวลา: ปลดล็อก task กลุ่มเล็ก ๆ (neighborhood) แล้วแก้ใหม่
+# โดยล็อก task อื่นไว้ที่เดิม เก็บผลเฉพาะรอบที่ objective ดีขึ้น
+# objective เดียวกับโมเดล: คะแนน task ที่วางได้ - penalty ช่วงว่างของครู (IDLE_GAP_WEIGHT)
+import random
+import time
+
+from scheduler_core import resolve_subset, room_fits, task_score, teacher_idle_slots
+
+LNS_ITER_TIME = 5.0     # เวลาสูงสุดต่อรอบ (วินาที)
+MAX_NEIGHBORHOOD = 40   # จำนวน task สูงสุดที่ปลดล็อกต่อรอบ
+
+def schedule_score(problem, assignment):
+    return sum(task_score(t) for t in problem['tasks'] if t['uid'] in assignment)
+
+def schedule_objective(problem, config, assignment):
+    score = schedule_score(problem, assignment)
+    gap_weight = config.get('IDLE_GAP_WEIGHT', 0)
+    if gap_weight: score -= gap_weight * sum(teacher_idle_slots(problem, assignment).values())
+    return score
+
+def build_neighborhoods(problem, assignment):
+    # [(kind, label, set(uid))]: สัปดาห์ของห้องหนึ่ง / วิชาทั้งหมดของครูหนึ่งคน / ทุก section ของวิชาหนึ่ง
+    tasks = problem['tasks']
+    unplaced = [t for t in tasks if t['uid'] not in assignment]
+    hoods = []
+
+    for r in problem['room_list']:
+        if r['room'] == 'Online': continue
+        uids = {uid for uid, (room, _, _) in assignment.items() if room == r['room']}
+        uids |= {t['uid'] for t in unplaced if room_fits(t, r)}
+        if uids: hoods.append(('room', r['room'], uids))
+
+    by_teacher = {}
+    by_course = {}
+    for t in tasks:
+        for tea in t['teachers']:
+            if tea != 'Unknown': by_teacher.setdefault(tea, set()).add(t['uid'])
+        by_course.setdefault(t['id'], set()).add(t['uid'])
+    hoods += [('teacher', tea, uids) for tea, uids in by_teacher.items()]
+    hoods += [('course', c, uids) for c, uids in by_course.items()]
+    return hoods
+
+def improve_schedule(problem, config, assignment, time_limit, seed=0):
+    # คืนค่า (assignment ที่ดีที่สุด, history ต่อรอบ)
+    rng = random.Random(seed)
+    workers = config.get('WORKERS', 4)
+    callback = config.get('LNS_CALLBACK')
+    log = config.get('LOG_CALLBACK')
+
+    best = dict(assignment)
+    best_score = schedule_objective(problem, config, best)
+    # วางครบทุก task และไม่มี penalty -> ไม่มีทางดีขึ้นอีก ไม่ต้องใช้เวลาที่เหลือ
+    max_score = schedule_score(problem, {t['uid']: None for t in problem['tasks']})
+    history = []
+    deadline = time.time() + time_limit
+    iteration = 0
+
+    while time.time() < deadline - 0.5 and best_score < max_score:
+        hoods = build_neighborhoods(problem, best)
+        if not hoods: break
+        kind, label, free = rng.choice(hoods)
+        if len(free) > MAX_NEIGHBORHOOD:
+            free = set(rng.sample(sorted(free), MAX_NEIGHBORHOOD))
+
+        iteration += 1
+        t0 = time.time()
+        iter_time = min(LNS_ITER_TIME, deadline - t0)
+        cand = resolve_subset(problem, config, best, free, iter_time, workers)
+        cand_score = schedule_objective(problem, config, cand) if cand is not None else best_score
+        gain = cand_score - best_score
+        accepted = cand is not None and gain > 0
+        if accepted:
+            best, best_score = cand, cand_score
+
+        record = {
+            'Iteration': iteration, 'Neighborhood': f"{kind}: {label}", 'Freed Tasks': len(free),
+            'Gain': gain if accepted else 0, 'Score': best_score, 'Scheduled': len(best),
+            'Accepted': accepted, 'Seconds': round(time.time() - t0, 2)
+        }
+        history.append(record)
+        if callback: callback(record)
+        if log: log(f"[LNS] iter {iteration} {kind}:{label} freed={len(free)} gain={record['Gain']} score={best_score}")
+
+    return best, history
@@ -0,0 +1,271 @@
+# ==========================================
+# ✋ Manual Adjustments (incremental conflict check)
+# ==========================================
+# แก้ตารางด้วยมือหลัง solve โดยไม่ต้อง solve ใหม่ทั้งหมด
+#   index['cells'] : (kind, resource, day, slot) -> set ของ row label (หรือ UNAVAILABLE) ของห้อง/ครู/กลุ่ม
+#   check_move     : ตรวจตำแหน่งใหม่ O(duration) ด้วย dict lookup ต่อ slot
+#   apply_move     : ย้ายแถวเดียว แก้ index เฉพาะ slot เก่า/ใหม่ คืนค่าห้อง/ครูที่ได้รับผลกระทบ
+#   reoptimize     : ล็อกตำแหน่งที่ย้ายแล้ว solve ใหม่เฉพาะ task รอบ ๆ (resolve_subset)
+import availability
+from calendar_parser import DAYS
+from scheduler_core import (assignment_to_results, base_start_mask, build_slot_map, resolve_subset, room_fits,
+                            section_links, section_pair_ok)
+
+# ช่วงเวลาเดียวกับที่ solver ใช้ (scheduler_core.build_slot_map)
+SLOT_MAP = build_slot_map()
+TOTAL_SLOTS = len(SLOT_MAP)
+DAY_START = SLOT_MAP[0]['val']
+SLOT_HOURS = SLOT_MAP[1]['val'] - DAY_START
+LUNCH_SLOTS = {s for s, info in SLOT_MAP.items() if info['is_lunch']}
+UNAVAILABLE = 'unavailable'
+
+def slot_of(start_val):
+    return int(round((start_val - DAY_START) / SLOT_HOURS))
+
+def slot_time(s):
+    val = DAY_START + s * SLOT_HOURS
+    return f"{int(val):02d}:{int(round((val - int(val)) * 60)):02d}"
+
+def row_label(df, idx):
+    row = df.loc[idx]
+    return f"{row['Course']} S{row['Sec']} {row['Type']} {row['Day']} {row['Start']} @ {row['Room']}"
+
+def row_labels(df):
+    # row_label ของทุกแถวแบบ vectorized (ใช้เป็นตัวเลือกใน UI)
+    return (df['Course'].astype(str) + ' S' + df['Sec'].astype(str) + ' ' + df['Type'] + ' ' + df['Day'] + ' '
+            + df['Start'] + ' @ ' + df['Room'].astype(str))
+
+def teachers_of(row):
+    return [tea.strip() for tea in str(row['Teachers']).split(',') if tea.strip() not in ('', 'Unknown')]
+
+# ==========================================
+# 🗂️ Occupancy index
+# ==========================================
+def match_tasks(problem, df):
+    # row label -> task ของ problem (คาบบรรยายที่แบ่งหลาย part จับคู่ตาม duration เรียงตามเวลา)
+    pool = {}
+    for t in problem.get('locked_tasks', []) + problem['tasks']:
+        pool.setdefault((t['id'], t['sec'], t['type']), []).append(t)
+    order = df.assign(_d=df['Day'].map(DAYS.index)).sort_values(['_d', 'StartVal'])
+    matched = {}
+    for idx, row in zip(order.index, order.to_dict('records')):
+        cands = pool.get((row['Course'], row['Sec'], row['Type']), [])
+        t = next((t for t in cands if t['dur'] == row['Duration']), cands[0] if cands else None)
+        if t is None: continue
+        cands.remove(t)
+        matched[idx] = t
+    return matched
+
+def _resources(index, idx, row, room=None):
+    room = row['Room'] if room is None else room
+    resources = [('room', str(room))] if room != 'Online' else []
+    resources += [('teacher', tea) for tea in teachers_of(row)]
+    task = index['tasks'].get(idx)
+    if task: resources += [('group', g) for g in task.get('groups', ())]
+    return resources
+
+def _occupy(index, idx, row, add=True):
+    s = slot_of(row['StartVal'])
+    for kind, res in _resources(index, idx, row):
+        for k in range(int(row['Duration'])):
+            key = (kind, res, row['Day'], s + k)
+            if add:
+                index['cells'].setdefault(key, set()).add(idx)
+            elif key in index['cells']:
+                index['cells'][key].discard(idx)
+
+def build_index(df, problem=None):
+    # problem (optional): เพิ่มช่วงไม่ว่างของครู/ห้อง, กลุ่มนักศึกษา และข้อมูล fixed lock
+    index = {'cells': {}, 'sections': {}, 'tasks': {}, 'problem': problem}
+    if problem:
+        index['tasks'] = match_tasks(problem, df)
+        for kind, unavailable in [('teacher', problem['teacher_unavailable']), ('room', problem['room_unavailable']),
+                                  ('teacher', problem.get('teacher_booked', {}))]:
+            for res, by_day in unavailable.items():
+                for d, slots in by_day.items():
+                    for s in slots:
+                        index['cells'].setdefault((kind, str(res), DAYS[d], s), set()).add(UNAVAILABLE)
+    for idx, row in zip(df.index, df.to_dict('records')):
+        _occupy(index, idx, row)
+        index['sections'].setdefault((row['Course'], row['Sec']), set()).add(idx)
+    return index
+
+# ==========================================
+# 🔍 Conflict check
+# ==========================================
+def _section_partners(index, df, idx, config):
+    # [(แถวคู่, kind, แถวที่ย้ายอยู่ก่อนไหม)] ตามกฎเดียวกับ solver (scheduler_core.section_links)
+    row = df.loc[idx]
+    others = [o for o in index['sections'].get((row['Course'], row['Sec']), ()) if o != idx]
+    task = index['tasks'].get(idx)
+    if task is None:
+        # ไม่มี problem: รู้แค่ชนิดของคาบ -> เฉพาะ Lec ก่อน Lab
+        return [(o, 'lab', row['Type'] == 'Lec') for o in others if {row['Type'], df.loc[o, 'Type']} == {'Lec', 'Lab'}]
+    label_of = {index['tasks'][o]['uid']: o for o in others if o in index['tasks']}
+    after, before = section_links([task] + [index['tasks'][o] for o in label_of.values()], config)
+    return ([(label_of[uid], kind, False) for uid, kind in after.get(task['uid'], []) if uid in label_of]
+            + [(label_of[uid], kind, True) for uid, kind in before.get(task['uid'], []) if uid in label_of])
+
+def _order_detail(kind, moved_first, config):
+    if kind == 'split':
+        return "Lecture parts must be on different days"
+    rule = ""
+    if config.get('LAB_MIN_GAP_DAYS'): rule += f" by at least {config['LAB_MIN_GAP_DAYS']} day(s)"
+    if config.get('LAB_MAX_GAP_DAYS') is not None: rule += f" within {config['LAB_MAX_GAP_DAYS']} day(s)"
+    return f"Lecture must come before its lab{rule}" if moved_first else f"Lab must follow its lecture{rule}"
+
+def check_move(index, df, idx, day, s, room, df_room=None, config=None):
+    # คืนค่า [{'Conflict', 'Detail', 'With', 'Resolvable'}] ว่าง = ย้ายได้
+    #   With = row label ของแถวที่ชน (None = ชนกับกฎ)
+    #   Resolvable = reoptimize ย้ายแถวที่ชนออกได้ (ไม่ใช่กฎ / เวลาไม่ว่าง / แถวที่ล็อกไว้)
+    # config: กฎเดียวกับตอน solve (MODE, LAB_MIN/MAX_GAP_DAYS, SPLIT_LEC_DIFFERENT_DAYS, MAX_CONSECUTIVE)
+    config = dict({'MODE': 2}, **(config or {}))
+    row = df.loc[idx]
+    dur = int(row['Duration'])
+    conflicts = []
+    problem = index['problem']
+    locked = problem.get('locked', {}) if problem else {}
+
+    def is_locked(other):
+        task = index['tasks'].get(other)
+        return bool(task) and task['uid'] in locked
+
+    def add(kind, detail, other=None, resolvable=None):
+        if resolvable is None:
+            resolvable = other is not None and not is_locked(other)
+            if other is not None and not resolvable:
+                detail += " (fixed)"
+        conflicts.append({'Conflict': kind, 'Detail': detail, 'With': other, 'Resolvable': resolvable})
+
+    task = index['tasks'].get(idx)
+    if task and task['uid'] in locked:
+        add('fixed', "Fixed placement: change it in the fixed-schedule CSV")
+    if s < 0 or s + dur > TOTAL_SLOTS:
+        add('time', f"Outside the teaching day ({slot_time(0)}-{slot_time(TOTAL_SLOTS)})")
+        return conflicts
+    # mode / พักเที่ยงแบบเดียวกับ solver (ย้ายด้วยมือไม่ต้องตรง GRANULARITY)
+    slots = {'slot_map': SLOT_MAP, 'total_slots': TOTAL_SLOTS}
+    if not base_start_mask(slots, dict(config, GRANULARITY=30), dur) >> s & 1:
+        if LUNCH_SLOTS & set(range(s, s + dur)):
+            add('time', f"Crosses the lunch break ({slot_time(min(LUNCH_SLOTS))}-{slot_time(max(LUNCH_SLOTS) + 1)})")
+        else:
+            add('time', "Outside Compact hours (09:00-16:00)")
+
+    if task and problem:
+        spec = next((r for r in problem['room_list'] if r['room'] == room), None)
+        if spec is None or not room_fits(task, spec):
+            add('room', f"Room {room} does not suit this class (capacity / type / online)")
+    elif df_room is not None and room != 'Online':
+        cap = df_room.loc[df_room['room'].astype(str) == str(room), 'capacity']
+        if not cap.empty and cap.iloc[0] < row['Enrollment']:
+            add('room', f"Room {room} holds {cap.iloc[0]} < {row['Enrollment']} students")
+
+    for kind, res in _resources(index, idx, row, room):
+        seen = set()
+        for k in range(dur):
+            for other in index['cells'].get((kind, res, day, s + k), ()):
+                if other == idx or other in seen: continue
+                seen.add(other)
+                if other == UNAVAILABLE:
+                    add(kind, f"{kind.title()} {res} is unavailable at {day} {slot_time(s + k)}")
+                else:
+                    add(kind, f"{kind.title()} {res} is busy: {row_label(df, other)}", int(other))
+
+    # กฎของ section (Lec ก่อน Lab, ระยะห่าง Lab, คาบบรรยายที่แบ่งอยู่คนละวัน) บนเวลาต่อเนื่องทั้งสัปดาห์
+    d = DAYS.index(day)
+    for other, kind, moved_first in _section_partners(index, df, idx, config):
+        o = df.loc[other]
+        o_d, o_s = DAYS.index(o['Day']), slot_of(o['StartVal'])
+        ok = section_pair_ok(slots, config, dur, d, s, o_d, o_s, kind) if moved_first else \
+            section_pair_ok(slots, config, int(o['Duration']), o_d, o_s, d, s, kind)
+        if not ok:
+            add('order', f"{_order_detail(kind, moved_first, config)}: {row_label(df, other)}", int(other))
+
+    # ภาระงานของครูในวันนั้น (นับรวมคาบที่ล็อกไว้) แบบเดียวกับ add_teacher_workload
+    max_slots = problem.get('teacher_max_slots', {}) if problem else {}
+    max_run = int(config.get('MAX_CONSECUTIVE', 0) * 2)
+    for tea in teachers_of(row):
+        busy, others = set(range(s, s + dur)), set()
+        for k in range(TOTAL_SLOTS):
+            labels = index['cells'].get(('teacher', tea, day, k), set()) - {idx, UNAVAILABLE}
+            if labels:
+                busy.add(k)
+                others |= labels
+        # ย้ายคาบอื่นของครูในวันนั้นออกได้ถ้ามีคาบที่ไม่ได้ล็อก
+        movable = any(not is_locked(o) for o in others)
+        if tea in max_slots and len(busy) > max_slots[tea]:
+            add('workload', f"Teacher {tea} would teach {len(busy) / 2:g}h on {day} (max {max_slots[tea] / 2:g}h)",
+                resolvable=movable)
+        if max_run:
+            first, last = s, s + dur
+            while first - 1 in busy: first -= 1
+            while last in busy: last += 1
+            if last - first > max_run:
+                add('workload', f"Teacher {tea} would teach {(last - first) / 2:g}h in a row on {day} "
+                                f"(max {max_run / 2:g}h)", resolvable=movable)
+    return conflicts
+
+# ==========================================
+# ✏️ Apply
+# ==========================================
+def apply_move(index, df, idx, day, s, room):
+    # แก้ df (ในที่) และ index เฉพาะ slot ของแถวนี้ คืนค่า (ห้อง, ครู) ที่ตารางต้องแสดงใหม่
+    row = df.loc[idx]
+    old_room = str(row['Room'])
+    _occupy(index, idx, row, add=False)
+    df.loc[idx, ['Day', 'Start', 'End', 'StartVal', 'Room']] = [
+        day, slot_time(s), slot_time(s + int(row['Duration'])), DAY_START + s * SLOT_HOURS, room]
+    _occupy(index, idx, df.loc[idx])
+    return {old_room, str(room)}, set(teachers_of(row))
+
+def neighbourhood(index, df, idx):
+    # แถวที่ใช้ห้อง/ครู/กลุ่มเดียวกันกับแถวที่ย้ายในวันที่ย้ายไป + แถวอื่นของ section เดียวกัน
+    row = df.loc[idx]
+    resources = set(_resources(index, idx, row))
+    near = set(index['sections'].get((row['Course'], row['Sec']), ()))
+    for (kind, res, day, _), labels in index['cells'].items():
+        if day == row['Day'] and (kind, res) in resources:
+            near |= labels
+    near.discard(UNAVAILABLE)
+    near.discard(idx)
+    return near
+
+def reoptimize(index, df, idx, config, time_limit):
+    # ล็อกแถวที่ย้ายไว้ตำแหน่งใหม่ แล้ว solve ใหม่เฉพาะแถวรอบ ๆ + task ที่ยังไม่ถูกจัดของครูคนเดียวกัน
+    # คืนค่า (df, unscheduled) ใหม่ หรือ None ถ้าหาคำตอบไม่ได้
+    problem = index['problem']
+    locked = problem.get('locked', {})
+    assignment = {}
+    for label, t in index['tasks'].items():
+        if t['uid'] in locked: continue
+        r = df.loc[label]
+        assignment[t['uid']] = (r['Room'], DAYS.index(r['Day']), slot_of(r['StartVal']))
+
+    free = {index['tasks'][label]['uid'] for label in neighbourhood(index, df, idx) if label in index['tasks']}
+    free -= set(locked)
+    teachers = set(teachers_of(df.loc[idx]))
+    free |= {t['uid'] for t in problem['tasks'] if t['uid'] not in assignment and teachers.intersection(t['teachers'])}
+
+    # resolve_subset ตรึงแถวที่ไม่ถูกปลดไว้โดยไม่ดูเวลาไม่ว่าง / fixed lock -> ตรวจกับ availability engine ก่อน
+    pinned = {uid: pos for uid, pos in assignment.items() if uid not in free}
+    if pinned_clashes(problem, pinned):
+        return None
+    result = resolve_subset(problem, config, assignment, free, time_limit)
+    if result is None:
+        return None
+    return assignment_to_results(problem, result)
+
+def pinned_clashes(problem, pinned):
+    # uid ที่ตำแหน่งทับช่วงไม่ว่างของห้อง/ครู/กลุ่ม หรือทับ task ที่ล็อกไว้ (ทั้งสองอยู่ใน problem['availability'])
+    engine = problem['availability']
+    clashes = []
+    for t in problem['tasks']:
+        if t['uid'] not in pinned: continue
+        room, d, s = pinned[t['uid']]
+        resources = [('room', room)] if room != 'Online' else []
+        resources += [('teacher', tea) for tea in t['teachers'] if tea != 'Unknown']
+        resources += [('group', g) for g in t.get('groups', ())]
+        if any(not availability.is_free(availability.busy_mask(engine, kind, res, d), s, t['dur'])
+               for kind, res in resources):
+            clashes.append(t['uid'])
+    return clashes
@@ -0,0 +1,136 @@
+# ==========================================
+# 💾 Compiled Model Cache
+# ==========================================
+# เก็บ CpModel ที่สร้างแล้ว (proto + index ของตัวแปรสำหรับ decode) ลงดิสก์
+# key = fingerprint ของข้อมูลที่เตรียมแล้ว + ค่า config ที่มีผลต่อโมเดล + เวอร์ชันของโค้ด
+# รันซ้ำโดยเปลี่ยนแค่เวลา/จำนวน thread หรือหลัง restart แอป จะข้ามขั้นตอนสร้างโมเดลไปเลย
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from ortools.sat.python import cp_model
+
+import availability
+import calendar_parser
+import parallel_build
+import scheduler_core
+from scheduler_core import build_full_model
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('SCHEDULER_MODEL_CACHE_DIR', os.path.join(BASE_DIR, '.model_cache'))
+CACHE_MAX_BYTES = int(os.environ.get('SCHEDULER_MODEL_CACHE_MB', 512)) * 1024 * 1024
+
+# config ที่เปลี่ยนโครงสร้างโมเดล (TIMEOUT / WORKERS / LNS ไม่มีผล)
+MODEL_CONFIG_KEYS = ['MODE', 'GRANULARITY', 'MAX_CONSECUTIVE', 'IDLE_GAP_WEIGHT',
+                     'LAB_MIN_GAP_DAYS', 'LAB_MAX_GAP_DAYS', 'SPLIT_LEC_DIFFERENT_DAYS']
+
+def _json_default(o):
+    if isinstance(o, (set, frozenset)): return sorted(o)
+    return str(o)
+
+# โมดูลที่มีผลต่อการสร้างโมเดล: โค้ดเปลี่ยน -> cache เก่าใช้ไม่ได้
+MODEL_CODE_MODULES = [scheduler_core, availability, calendar_parser, parallel_build]
+
+def _code_version():
+    h = hashlib.sha256()
+    for mod in MODEL_CODE_MODULES:
+        with open(mod.__file__, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+def model_fingerprint(problem, config):
+    payload = {
+        'problem': problem,
+        'config': {k: config.get(k) for k in MODEL_CONFIG_KEYS},
+        'code': _code_version(),
+    }
+    text = json.dumps(payload, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+def _paths(fp, cache_dir):
+    return os.path.join(cache_dir, f"{fp}.pbtxt.gz"), os.path.join(cache_dir, f"{fp}.vars.json")
+
+def save_bundle(fp, bundle, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    model_path, vars_path = _paths(fp, cache_dir)
+
+    # CpModelProto ของ OR-Tools รุ่นใหม่ไม่มี SerializeToString -> export เป็น text format แล้ว gzip
+    fd, tmp_txt = tempfile.mkstemp(suffix='.pbtxt', dir=cache_dir)
+    os.close(fd)
+    try:
+        bundle['model'].ExportToFile(tmp_txt)
+        with open(tmp_txt, 'rb') as src, gzip.open(model_path + '.tmp', 'wb', compresslevel=3) as dst:
+            dst.write(src.read())
+    finally:
+        os.remove(tmp_txt)
+
+    var_index = {
+        'schedule': [[list(k), v.Index()] for k, v in bundle['schedule'].items()],
+        'is_scheduled': {uid: v.Index() for uid, v in bundle['is_scheduled'].items()},
+        'task_vars': {uid: {name: v.Index() for name, v in tv.items()} for uid, tv in bundle['task_vars'].items()},
+    }
+    with open(vars_path + '.tmp', 'w') as f:
+        json.dump(var_index, f)
+    # เขียนไฟล์ชั่วคราวก่อนแล้วค่อย rename เพื่อไม่ให้ process อื่นอ่านไฟล์ที่เขียนไม่เสร็จ
+    os.replace(model_path + '.tmp', model_path)
+    os.replace(vars_path + '.tmp', vars_path)
+    evict(cache_dir)
+
+def load_bundle(fp, tasks, cache_dir=None):
+    model_path, vars_path = _paths(fp, cache_dir or CACHE_DIR)
+    if not (os.path.exists(model_path) and os.path.exists(vars_path)):
+        return None
+    try:
+        with gzip.open(model_path, 'rt', encoding='utf-8') as f:
+            text = f.read()
+        with open(vars_path) as f:
+            var_index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    model = cp_model.CpModel()
+    model.Proto().parse_text_format(text)
+    bool_var = model.GetBoolVarFromProtoIndex
+    int_var = model.GetIntVarFromProtoIndex
+    schedule = {tuple(k): bool_var(i) for k, i in var_index['schedule']}
+    is_scheduled = {uid: bool_var(i) for uid, i in var_index['is_scheduled'].items()}
+    task_vars = {uid: {name: int_var(i) for name, i in tv.items()} for uid, tv in var_index['task_vars'].items()}
+
+    for p in (model_path, vars_path):
+        os.utime(p)   # LRU: อัปเดตเวลาใช้งานล่าสุด
+    return {'model': model, 'schedule': schedule, 'is_scheduled': is_scheduled, 'task_vars': task_vars, 'tasks': tasks}
+
+def evict(cache_dir=None, max_bytes=None):
+    # ลบไฟล์ที่ใช้ล่าสุดนานที่สุดจนขนาดรวมไม่เกิน max_bytes
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(cache_dir): return
+    entries = {}
+    for name in os.listdir(cache_dir):
+        if name.endswith('.tmp'): continue
+        fp = name.split('.', 1)[0]
+        path = os.path.join(cache_dir, name)
+        st = os.stat(path)
+        size, mtime = entries.get(fp, (0, 0))
+        entries[fp] = (size + st.st_size, max(mtime, st.st_mtime))
+
+    total = sum(size for size, _ in entries.values())
+    for fp, (size, _) in sorted(entries.items(), key=lambda e: e[1][1]):
+        if total <= max_bytes: break
+        for p in _paths(fp, cache_dir):
+            if os.path.exists(p): os.remove(p)
+        total -= size
+
+def cached_build_model(problem, config, cache_dir=None):
+    # ใช้แทน build_full_model(problem, config) สำหรับโมเดลเต็ม
+    fp = model_fingerprint(problem, config)
+    bundle = load_bundle(fp, problem['tasks'], cache_dir)
+    if bundle is not None:
+        return bundle
+    bundle = build_full_model(problem, config)
+    try: save_bundle(fp, bundle, cache_dir)
+    except OSError: pass   # ดิสก์เต็ม/ไม่มีสิทธิ์เขียน -> ทำงานต่อได้โดยไม่มี cache
+    return bundle
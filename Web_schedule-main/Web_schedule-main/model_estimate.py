@@ -0,0 +1,158 @@
+# ==========================================
+# 📐 Model-size Estimator & Automatic Strategy Selection
+# ==========================================
+# ประมาณขนาดโมเดลจาก problem ที่เตรียมแล้ว โดยไม่สร้าง cp_model เลย (ใช้ bitmask เดียวกับ iter_candidates)
+#   candidates  : นับ bit ของ slot เริ่มที่วางได้ต่อ (task, ห้อง, วัน) แทนการสร้าง tuple
+#   constraints : ต่อ task + ต่อ candidate + ช่อง (ห้อง/ครู, วัน, slot) ที่มี candidate มากกว่า 1 ตัว
+#   memory      : ค่าต่อตัวแปรที่วัดจากการ build + solve จริง (ดู BUILD_KB_PER_VAR / SOLVE_KB_PER_VAR)
+# choose_strategy เลือก full / two_phase / decompose / grid หยาบ ให้อยู่ใน budget ของหน่วยความจำและเวลา
+# estimate_compaction: โมเดลย่อยต่อครูของ compact_teacher_days (IDLE_GAP_WEIGHT) -> ไม่พอ budget ก็ข้าม pass นี้
+import os
+
+import availability
+from scheduler_core import DAYS, base_start_mask, room_fits, section_pairs, start_mask
+
+MEMORY_BUDGET_MB = int(os.environ.get('SCHEDULER_MEMORY_BUDGET_MB', 2048))
+
+VARS_PER_TASK = 5          # sched, day, start, end, abs
+CONS_PER_TASK = 4          # end, abs, sched <-> candidates (2)
+CONS_PER_CANDIDATE = 2     # day == d, start == s
+BUILD_KB_PER_VAR = 1.3     # proto + dict ของตัวแปรใน process ที่ build
+SOLVE_KB_PER_VAR = 3.5     # CP-SAT presolve + search (worker แรก)
+WORKER_MEMORY_SHARE = 0.15 # worker เพิ่มแต่ละตัว ใช้หน่วยความจำเพิ่มประมาณนี้ของค่า solve
+BUILD_US_PER_VAR = 40      # เวลา build ต่อตัวแปร (ไมโครวินาที)
+# โมเดลเต็มที่ใหญ่เกิน TIMEOUT x ค่านี้ มักหาคำตอบแรกไม่ทันเวลา -> ใช้ strategy ที่แยกโมเดล
+FULL_VARS_PER_SECOND = 600
+
+def _popcount(mask):
+    return bin(mask).count('1')
+
+def _spread(starts, dur):
+    # bitmask ของ slot ที่ถูกใช้ถ้าเริ่มได้ทุก bit ใน starts (ต่อเนื่อง dur slot)
+    covered = 0
+    for k in range(dur):
+        covered |= starts << k
+    return covered
+
+def _add_coverage(cover, key, mask):
+    # cover[key] = [ใช้ >= 1 ครั้ง, ใช้ >= 2 ครั้ง] -> ช่องที่ต้องมี constraint ห้ามซ้อน
+    once, twice = cover.get(key, (0, 0))
+    cover[key] = (once | mask, twice | (once & mask))
+
+def estimate_model(problem, config, with_rooms=True):
+    # with_rooms=False: time model ของ two_phase (ห้อง = None, นับ (วัน, เวลาเริ่ม) ต่อ task)
+    engine = problem['availability']
+    tasks = problem['tasks']
+    candidates = 0
+    room_cover, teacher_cover = {}, {}
+    base_cache = {}
+    for t in tasks:
+        rooms = [r['room'] for r in problem['room_list'] if room_fits(t, r)]
+        if not rooms: continue
+        if t['dur'] not in base_cache:
+            base_cache[t['dur']] = base_start_mask(problem, config, t['dur'])
+        for d in range(len(DAYS)):
+            mask = start_mask(problem, config, t, d, base_cache[t['dur']])
+            if not mask: continue
+            any_room = 0
+            for r in rooms:
+                room_mask = mask & availability.resource_free_starts(engine, 'room', r, d, t['dur'])
+                if not room_mask: continue
+                any_room |= room_mask
+                if with_rooms:
+                    candidates += _popcount(room_mask)
+                    if r != 'Online': _add_coverage(room_cover, (r, d), _spread(room_mask, t['dur']))
+            if not with_rooms:
+                candidates += _popcount(any_room)
+            covered = _spread(any_room, t['dur'])
+            for tea in t['teachers']:
+                if tea != 'Unknown': _add_coverage(teacher_cover, (tea, d), covered)
+
+    cell_constraints = sum(_popcount(twice) for _, twice in room_cover.values())
+    cell_constraints += sum(_popcount(twice) for _, twice in teacher_cover.values())
+    lec_lab, lec_parts = section_pairs(tasks)
+    groups = {g for t in tasks for g in t.get('groups', ())}
+
+    variables = VARS_PER_TASK * len(tasks) + candidates
+    constraints = (CONS_PER_TASK * len(tasks) + CONS_PER_CANDIDATE * candidates + cell_constraints
+                   + len(lec_lab) + len(lec_parts) + len(groups) * 2)
+    return {
+        'tasks': len(tasks), 'candidates': candidates, 'variables': variables, 'constraints': constraints,
+        'memory_mb': _memory_mb(variables, config), 'build_seconds': round(variables * BUILD_US_PER_VAR / 1e6, 2),
+    }
+
+def _memory_mb(variables, config):
+    workers = config.get('WORKERS', 4)
+    memory_kb = variables * (BUILD_KB_PER_VAR + SOLVE_KB_PER_VAR * (1 + WORKER_MEMORY_SHARE * (workers - 1)))
+    return round(memory_kb / 1024, 1)
+
+def estimate_compaction(problem, config):
+    # โมเดลย่อยที่ใหญ่ที่สุดของ compact_teacher_days: task ของครูหนึ่งคน (candidate เต็ม)
+    # + task อื่นทุกตัวที่ล็อกไว้ (VARS_PER_TASK + candidate เดียว)
+    tasks = problem['tasks']
+    by_teacher = {}
+    for t in tasks:
+        for tea in t['teachers']:
+            if tea != 'Unknown': by_teacher.setdefault(tea, []).append(t)
+    largest = {'tasks': 0, 'candidates': 0, 'constraints': 0}
+    for tea_tasks in by_teacher.values():
+        est = estimate_model(dict(problem, tasks=tea_tasks), config)
+        if est['candidates'] > largest['candidates']: largest = est
+    pinned = len(tasks) - largest['tasks']
+    variables = VARS_PER_TASK * len(tasks) + largest['candidates'] + pinned
+    constraints = largest['constraints'] + (CONS_PER_TASK + CONS_PER_CANDIDATE) * pinned
+    return {
+        'tasks': largest['tasks'], 'candidates': largest['candidates'] + pinned, 'variables': variables,
+        'constraints': constraints, 'memory_mb': _memory_mb(variables, config),
+        'build_seconds': round(variables * BUILD_US_PER_VAR / 1e6, 2),
+    }
+
+def estimate_strategies(problem, config):
+    # ขนาดโมเดลที่ใหญ่ที่สุดที่แต่ละ strategy ต้องสร้าง
+    full = estimate_model(problem, config)
+    day_share = 1.0 / len(DAYS)
+    estimates = {
+        'full': full,
+        'two_phase': estimate_model(problem, config, with_rooms=False),
+        # decompose: โมเดลต่อวัน (~1/5 ของโมเดลเต็ม) แต่ repair ตอนท้ายใช้ candidate ของ task ที่ยังไม่ถูกวางทุกวัน
+        'decompose': dict(full, candidates=int(full['candidates'] * day_share * 2),
+                          variables=int(full['variables'] * day_share * 2),
+                          constraints=int(full['constraints'] * day_share * 2),
+                          memory_mb=round(full['memory_mb'] * day_share * 2, 1),
+                          build_seconds=round(full['build_seconds'] * day_share * 2, 2)),
+    }
+    if config.get('IDLE_GAP_WEIGHT'):
+        # pass หลัง solve หลัก ไม่ใช่ strategy (choose_strategy ไม่เลือก) แต่ต้องพอ budget เช่นกัน
+        estimates['compaction'] = estimate_compaction(problem, config)
+    return estimates
+
+def _fits(est, config, memory_budget, var_limit=None):
+    if est['memory_mb'] > memory_budget: return False
+    if est['build_seconds'] > config['TIMEOUT'] * 0.5: return False
+    return var_limit is None or est['variables'] <= var_limit
+
+def choose_strategy(problem, config, memory_budget=None):
+    # คืนค่า plan: {'strategy', 'config' (ค่าที่ต้อง override), 'estimates', 'reason'}
+    # ลำดับ: full -> two_phase -> decompose -> grid หยาบ (60 นาที, คาบมาตรฐาน) กับ two_phase/decompose
+    memory_budget = memory_budget or config.get('MEMORY_BUDGET_MB', MEMORY_BUDGET_MB)
+    full_limit = config['TIMEOUT'] * FULL_VARS_PER_SECOND
+    tried = []
+    grids = [config.get('GRANULARITY', 30)] + [g for g in [60, 'standard'] if g != config.get('GRANULARITY', 30)]
+    for granularity in grids:
+        grid_config = dict(config, GRANULARITY=granularity)
+        estimates = estimate_strategies(problem, grid_config)
+        for strategy in ['full', 'two_phase', 'decompose']:
+            if strategy == 'full' and granularity != grids[0]: continue   # grid หยาบใช้กับโมเดลที่แยกเท่านั้น
+            limit = full_limit if strategy == 'full' else None
+            tried.append((strategy, granularity, estimates[strategy]))
+            if _fits(estimates[strategy], grid_config, memory_budget, limit):
+                overrides = {'STRATEGY': strategy}
+                if granularity != config.get('GRANULARITY', 30):
+                    overrides['GRANULARITY'] = granularity
+                return {'strategy': strategy, 'config': overrides, 'estimates': estimates,
+                        'reason': f"{strategy} @ {granularity}: ~{estimates[strategy]['variables']:,} vars, "
+                                  f"~{estimates[strategy]['memory_mb']:,} MB (budget {memory_budget:,} MB)"}
+    strategy, granularity, est = min(tried, key=lambda item: item[2]['memory_mb'])
+    return {'strategy': None, 'config': {}, 'estimates': estimate_strategies(problem, config),
+            'reason': f"Model too large: smallest option {strategy} @ {granularity} needs ~{est['memory_mb']:,} MB "
+                      f"(budget {memory_budget:,} MB)"}
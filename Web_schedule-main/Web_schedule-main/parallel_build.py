@@ -0,0 +1,169 @@
+# ==========================================
+# 🏭 Parallel Model Building (Process Pool)
+# ==========================================
+# การสร้างตัวแปร/constraint ผ่าน cp_model ทำงานใน thread เดียว (ติด GIL)
+# สำหรับข้อมูลขนาดใหญ่: ให้ process ลูกทำส่วนที่หนักทั้งหมด process หลักเหลือแค่รวมผล
+#   0) pool ใหม่ต่อการ build: problem/config ส่งครั้งเดียวต่อ process (initializer) ปิด pool เมื่อ build เสร็จ
+#   1) process ลูก: หา candidates ของแต่ละ task (เก็บ cache ไว้) -> จำนวนตัวแปรต่อ task -> index ของตัวแปรทุกตัว
+#   2) process ลูก (พร้อมกัน):
+#      - ตัวแปร/constraint ของ task เป็นก้อน ๆ (add_task_vars) เติม placeholder ให้ครบ offset
+#        ส่งกลับเป็น text format โดยตัด placeholder ออก (index ของตัวแปรจึงตรงกับโมเดลรวม)
+#      - ช่อง (ห้อง/ครู, วัน, slot) -> index ของ candidate ที่ใช้ช่องนั้น แบ่งตามห้อง/ครู (index_cells)
+#   3) process หลัก: merge text ทีละก้อนตามลำดับ (ก้อนถัดไปยังสร้างอยู่) แล้ว finish_model
+#      constraint ห้ามซ้อนใส่ลง proto จาก index ตรง ๆ (cell_indices) ไม่ต้อง parse หรือสร้าง handle
+# CpModelProto ของ OR-Tools รุ่นใหม่ (pybind) ไม่มี SerializeToString / ParseFromString -> ข้าม process ได้แค่ text format
+# และ merge_text_format ถือ GIL ตลอด จึงเป็นส่วนหลักที่เหลือใน process หลัก
+# วัดเวลา CPU ของ process หลัก = ส่วนที่ทำขนานไม่ได้ (~500k candidates,
+# generate_instance(seed=1, n_courses=150, n_rooms=30, n_teachers=60, n_locked=10, n_groups=6), MODE 2):
+#   build_model 19.4 s | build_model_parallel 9.3 s (merge text ~6 s) -> เร็วขึ้นได้สูงสุด ~2.1 เท่า
+#   (แบบเดิมที่หา candidates / finish_model ใน process หลัก: 19.6 s -> ไม่เร็วขึ้นเลย)
+#   ดู test_main_process_work_is_a_small_share ใน tests/test_parallel_build.py
+import bisect
+import heapq
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ortools.sat.python import cp_model
+
+from scheduler_core import (DAYS, add_task_vars, base_start_mask, build_model, finish_model, index_cells,
+                            iter_candidates, room_fits)
+
+# ต่ำกว่านี้ค่า start process (~1.5 s) + merge text ไม่คุ้ม ใช้ build_model ปกติ
+MIN_PARALLEL_CANDIDATES = 100000
+VARS_PER_TASK = 5   # sched, day, start, end, abs (ดู add_task_vars)
+
+PLACEHOLDER_VAR = "variables {\n  domain: 0\n  domain: 1\n}\n"
+
+# ==========================================
+# 👷 Worker process
+# ==========================================
+_PROBLEM = None
+_CONFIG = None
+_CANDIDATES = {}    # task index -> candidates (ขั้นที่ 1 หาไว้ ขั้นที่ 2 ใช้ต่อ)
+
+def _init_worker(problem, config):
+    global _PROBLEM, _CONFIG
+    _PROBLEM, _CONFIG = problem, config
+    _CANDIDATES.clear()
+
+def _candidates(i):
+    if i not in _CANDIDATES:
+        _CANDIDATES[i] = list(iter_candidates(_PROBLEM, _CONFIG, _PROBLEM['tasks'][i]))
+    return _CANDIDATES[i]
+
+def _count_candidates(indices):
+    return [len(_candidates(i)) for i in indices]
+
+def _build_fragment(indices, offset):
+    # task ในก้อน -> (text format ของตัวแปร/constraint, candidates ต่อ task)
+    model = cp_model.CpModel()
+    if offset:
+        model.Proto().parse_text_format(PLACEHOLDER_VAR * offset)
+    for i in indices:
+        add_task_vars(model, _PROBLEM, _PROBLEM['tasks'][i], _candidates(i))
+    text = str(model.Proto())
+    prefix = len(PLACEHOLDER_VAR) * offset
+    if text[:prefix] != PLACEHOLDER_VAR * offset:
+        raise RuntimeError("unexpected proto text layout in model fragment")
+    return text[prefix:], [_candidates(i) for i in indices]
+
+def _index_cells(starts, rooms, teachers):
+    # starts: index ของ candidate ตัวแรกของแต่ละ task -> ช่องของห้อง/ครูในส่วนนี้ เป็น index ของตัวแปร
+    # คืนค่า ([(ลำดับ, [index])] ของห้อง, [(ลำดับ, [index])] ของครู, ช่องของครู -> [index] สำหรับ MAX_CONSECUTIVE)
+    # ลำดับ = ลำดับที่ finish_model ของ build_model ใส่ constraint (ช่องแรกที่พบตาม index ของตัวแปร)
+    tasks = _PROBLEM['tasks']
+    items = (((t['uid'], r, d, s), starts[i] + j)
+             for i, t in enumerate(tasks) for j, (r, d, s) in enumerate(_candidates(i)))
+    room_cells, teacher_cells = index_cells(tasks, items, set(rooms), set(teachers))
+
+    room_order = sorted(((idx[0], cell[2]), idx) for cell, idx in room_cells.items() if len(idx) > 1)
+    teacher_order = []
+    for cell, idx in teacher_cells.items():
+        if len(idx) < 2: continue
+        owner = tasks[bisect.bisect_right(starts, idx[0]) - 1]
+        teacher_order.append(((idx[0], cell[2], owner['teachers'].index(cell[0])), idx))
+    teacher_order.sort()
+    # add_teacher_workload ใช้ทุกช่องของครูเฉพาะเมื่อมี MAX_CONSECUTIVE
+    return room_order, teacher_order, (teacher_cells if _CONFIG.get('MAX_CONSECUTIVE') else {})
+
+# ==========================================
+# 🧩 Main process
+# ==========================================
+def split_chunks(items, weights, n_chunks):
+    # แบ่งรายการต่อเนื่องให้แต่ละก้อนมีน้ำหนักใกล้เคียงกัน (ลำดับคงเดิม)
+    total = sum(weights)
+    chunks, current, acc = [], [], 0
+    for item, w in zip(items, weights):
+        current.append(item)
+        acc += w
+        if acc >= total * (len(chunks) + 1) / n_chunks and len(chunks) < n_chunks - 1:
+            chunks.append(current)
+            current = []
+    if current: chunks.append(current)
+    return chunks
+
+def candidate_bound(problem, config):
+    # จำนวน candidate สูงสุด (ไม่นับเวลาไม่ว่าง) -> ตัดสินว่าคุ้มที่จะเปิด pool ไหม โดยไม่ต้องหา candidates จริง
+    starts_per_dur = {}
+    total = 0
+    for t in problem['tasks']:
+        if t['dur'] not in starts_per_dur:
+            starts_per_dur[t['dur']] = base_start_mask(problem, config, t['dur']).bit_count()
+        n_rooms = sum(1 for r in problem['room_list'] if room_fits(t, r))
+        total += starts_per_dur[t['dur']] * len(DAYS) * n_rooms
+    return total
+
+def build_model_parallel(problem, config, n_proc=None):
+    n_proc = min(n_proc or config.get('BUILD_PROCESSES', 1), os.cpu_count() or 1)
+    if n_proc <= 1 or candidate_bound(problem, config) < MIN_PARALLEL_CANDIDATES:
+        return build_model(problem, config)
+
+    tasks = problem['tasks']
+    order = list(range(len(tasks)))
+    # config ที่ส่งเข้า process ลูกต้อง pickle ได้ (ตัด callback ออก)
+    worker_config = {k: v for k, v in config.items() if not callable(v)}
+    with ProcessPoolExecutor(max_workers=n_proc, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(problem, worker_config)) as pool:
+        # 1) จำนวน candidate ต่อ task -> index ของ candidate ตัวแรกของแต่ละ task
+        counts = [n for part in pool.map(_count_candidates, split_chunks(order, [1] * len(order), n_proc)) for n in part]
+        starts, idx = [], 0
+        for n in counts:
+            starts.append(idx + VARS_PER_TASK)
+            idx += VARS_PER_TASK + n
+
+        # 2) ก้อนของตัวแปร (แบ่งตามจำนวนตัวแปร) + cells (แบ่งตามห้อง/ครู)
+        chunks = split_chunks(order, [VARS_PER_TASK + n for n in counts], n_proc)
+        fragments = [(pool.submit(_build_fragment, chunk, starts[chunk[0]] - VARS_PER_TASK), chunk) for chunk in chunks]
+        rooms = [r['room'] for r in problem['room_list']]
+        teachers = sorted({tea for t in tasks for tea in t['teachers']})
+        cell_parts = [pool.submit(_index_cells, starts, rooms[k::n_proc], teachers[k::n_proc]) for k in range(n_proc)]
+
+        # 3) รวมก้อนตามลำดับ ระหว่างที่ก้อนถัดไปยังสร้างอยู่
+        model = cp_model.CpModel()
+        cands = [None] * len(tasks)
+        for future, chunk in fragments:
+            text, chunk_cands = future.result()
+            model.Proto().merge_text_format(text)
+            for i, c in zip(chunk, chunk_cands): cands[i] = c
+        parts = [f.result() for f in cell_parts]
+
+    # สร้าง handle ของตัวแปรจาก index ที่รู้ล่วงหน้า (IntVar ตรง ๆ: ไม่ต้องตรวจชนิดซ้ำทีละตัว)
+    proto = model.Proto()
+    schedule, is_scheduled, task_vars = {}, {}, {}
+    for t, start, candidates in zip(tasks, starts, cands):
+        uid = t['uid']
+        base = start - VARS_PER_TASK
+        is_scheduled[uid] = cp_model.IntVar(proto, base)
+        task_vars[uid] = {'day': cp_model.IntVar(proto, base + 1), 'start': cp_model.IntVar(proto, base + 2),
+                          'abs': cp_model.IntVar(proto, base + 4)}
+        for j, (r, d, s) in enumerate(candidates):
+            schedule[(uid, r, d, s)] = cp_model.IntVar(proto, start + j)
+
+    cell_indices = [idx for _, idx in heapq.merge(*(p[0] for p in parts))]
+    cell_indices += [idx for _, idx in heapq.merge(*(p[1] for p in parts))]
+    teacher_cells = {}
+    for p in parts:
+        teacher_cells.update({cell: [cp_model.IntVar(proto, i) for i in idx] for cell, idx in p[2].items()})
+    return finish_model(model, problem, config, tasks, schedule, is_scheduled, task_vars,
+                        cells=({}, teacher_cells), cell_indices=cell_indices)
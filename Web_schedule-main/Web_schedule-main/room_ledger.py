@@ -0,0 +1,108 @@
+# ==========================================
+# 🏛️ Room Reservation Ledger (SQLite, optimistic locking)
+# ==========================================
+# หลายภาควิชาใช้ห้องชุดเดียวกัน (room.csv) แต่ solve แยกกันคนละ process
+#   snapshot : อ่านช่องที่ภาคอื่นจองไว้ (ไม่ล็อกอะไร) แล้วไป solve โดยถือว่าช่องนั้นไม่ว่าง
+#   commit   : ใน transaction เดียว ตรวจว่าช่องที่จะจองยังว่างและ version ของภาคยังไม่เปลี่ยน
+#              ผ่าน -> แทนที่การจองเดิมของภาคทั้งหมด, ไม่ผ่าน -> คืนรายการช่องที่ชน (ภาคนั้นต้อง solve ใหม่)
+# หนึ่งแถว = (ชนิด, ทรัพยากร, วัน, slot) -> PRIMARY KEY กันการจองซ้ำในระดับฐานข้อมูล
+# ครูที่สอนหลายภาคจองแบบเดียวกับห้อง (kind = 'teacher')
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEDGER_DB_PATH = os.environ.get('SCHEDULER_LEDGER_DB', os.path.join(BASE_DIR, 'room_ledger.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    kind TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    department TEXT NOT NULL,
+    course TEXT,
+    PRIMARY KEY (kind, resource, day, slot)
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_department ON bookings(department);
+CREATE TABLE IF NOT EXISTS departments (
+    department TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL
+);
+"""
+
+def connect(db_path=None):
+    conn = sqlite3.connect(db_path or LEDGER_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def snapshot(department, db_path=None):
+    # คืนค่า (version ของภาคนี้, [(kind, resource, day, slot)] ที่ภาคอื่นจองไว้)
+    conn = connect(db_path)
+    try:
+        row = conn.execute("SELECT version FROM departments WHERE department = ?", (department,)).fetchone()
+        cells = conn.execute("SELECT kind, resource, day, slot FROM bookings WHERE department != ?",
+                             (department,)).fetchall()
+        return (row['version'] if row else 0), [tuple(c) for c in cells]
+    finally:
+        conn.close()
+
+def commit(department, version, bookings, db_path=None):
+    # bookings: [(kind, resource, day, slot, course)] -> (True, []) หรือ (False, [(kind, resource, day, slot, ภาคที่จองไว้)])
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT version FROM departments WHERE department = ?", (department,)).fetchone()
+            if (row['version'] if row else 0) != version:
+                conn.execute("ROLLBACK")
+                return False, [('department', department, -1, -1, 'newer commit of the same department')]
+
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (kind TEXT, resource TEXT, day INTEGER, slot INTEGER)")
+            conn.execute("DELETE FROM wanted")
+            conn.executemany("INSERT INTO wanted VALUES (?, ?, ?, ?)", [b[:4] for b in bookings])
+            clashes = conn.execute(
+                "SELECT w.kind, w.resource, w.day, w.slot, b.department FROM wanted w "
+                "JOIN bookings b ON b.kind = w.kind AND b.resource = w.resource AND b.day = w.day AND b.slot = w.slot "
+                "WHERE b.department != ?", (department,)).fetchall()
+            if clashes:
+                conn.execute("ROLLBACK")
+                return False, [tuple(c) for c in clashes]
+
+            conn.execute("DELETE FROM bookings WHERE department = ?", (department,))
+            conn.executemany("INSERT INTO bookings (kind, resource, day, slot, department, course) VALUES (?, ?, ?, ?, ?, ?)",
+                             [b[:4] + (department, b[4]) for b in bookings])
+            conn.execute(
+                "INSERT INTO departments (department, version, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(department) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at",
+                (department, time.time()))
+            conn.execute("COMMIT")
+            return True, []
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+def release(department, db_path=None):
+    conn = connect(db_path)
+    try:
+        conn.execute("DELETE FROM bookings WHERE department = ?", (department,))
+        conn.execute("UPDATE departments SET version = version + 1, updated_at = ? WHERE department = ?",
+                     (time.time(), department))
+    finally:
+        conn.close()
+
+def list_bookings(db_path=None, kind=None):
+    conn = connect(db_path)
+    try:
+        query = "SELECT kind, resource, day, slot, department, course FROM bookings"
+        rows = conn.execute(query + " WHERE kind = ?", (kind,)).fetchall() if kind else conn.execute(query).fetchall()
+        return pd.DataFrame([dict(r) for r in rows], columns=['kind', 'resource', 'day', 'slot', 'department', 'course'])
+    finally:
+        conn.close()
@@ -0,0 +1,124 @@
+# ==========================================
+# 🕓 Run History & Schedule Diff
+# ==========================================
+# เก็บผลลัพธ์ N รอบล่าสุด (พร้อม fingerprint ของข้อมูลนำเข้า) และเทียบสองรอบว่าอะไรเปลี่ยน
+# diff ใช้ join บน index (Course, Sec, Type, Part) ทั้งตาราง ไม่วน loop ต่อแถว
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+
+import pandas as pd
+
+HISTORY_LIMIT = int(os.environ.get('SCHEDULER_HISTORY_LIMIT', 10))
+KEY = ['Course', 'Sec', 'Type', 'Part']
+PLACE_COLS = ['Day', 'Start', 'End', 'Room']
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+
+# ==========================================
+# 🔑 Fingerprints
+# ==========================================
+def frame_fingerprint(df):
+    if df is None or df.empty: return ''
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    h.update(','.join(map(str, df.columns)).encode('utf-8'))
+    return h.hexdigest()[:16]
+
+def input_fingerprint(data, config):
+    # fingerprint ต่อไฟล์ (บอกได้ว่าไฟล์ไหนเปลี่ยน) + config ที่ไม่ใช่ callback
+    cfg = {k: v for k, v in config.items() if not callable(v)}
+    return {
+        'data': {k: frame_fingerprint(df) for k, df in sorted(data.items())},
+        'config': hashlib.sha256(json.dumps(cfg, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16],
+    }
+
+def changed_inputs(fp_old, fp_new):
+    keys = set(fp_old['data']) | set(fp_new['data'])
+    changed = sorted(k for k in keys if fp_old['data'].get(k) != fp_new['data'].get(k))
+    if fp_old['config'] != fp_new['config']: changed.append('config')
+    return changed
+
+# ==========================================
+# 📚 History store (list ใน session state หรือที่อื่นก็ได้)
+# ==========================================
+def add_run(history, schedule, unscheduled, fingerprint, label=None, limit=None):
+    # เพิ่มรอบใหม่ไว้ท้ายสุดแล้วตัดให้เหลือ N รอบล่าสุด คืนค่า run ที่เพิ่ม
+    run = {
+        'run_id': uuid.uuid4().hex[:8], 'created_at': time.time(),
+        'label': label or time.strftime('%H:%M:%S'),
+        'schedule': schedule, 'unscheduled': list(unscheduled or []), 'fingerprint': fingerprint,
+    }
+    history.append(run)
+    del history[:max(0, len(history) - (limit or HISTORY_LIMIT))]
+    return run
+
+def get_run(history, run_id):
+    return next((r for r in history if r['run_id'] == run_id), None)
+
+# ==========================================
+# 🔀 Diff
+# ==========================================
+def _keyed(df):
+    # task ของ Lecture ที่แบ่งหลายคาบมี (Course, Sec, Type) ซ้ำกัน -> เรียงตามเวลาแล้วใส่ Part
+    if df is None or df.empty:
+        return pd.DataFrame(columns=KEY + PLACE_COLS + ['Teachers']).set_index(KEY)
+    out = df.assign(_d=df['Day'].map({d: i for i, d in enumerate(DAYS)}))
+    out = out.sort_values(['Course', 'Sec', 'Type', '_d', 'StartVal'])
+    out['Part'] = out.groupby(['Course', 'Sec', 'Type']).cumcount()
+    return out.set_index(KEY)[PLACE_COLS + ['Teachers']]
+
+def diff_schedules(old_df, new_df):
+    # คืนค่าตารางต่อ task ที่เปลี่ยน: Change = moved / unscheduled / new
+    old, new = _keyed(old_df), _keyed(new_df)
+    joined = old.join(new, how='outer', lsuffix='_old', rsuffix='_new')
+    in_old = joined['Day_old'].notna()
+    in_new = joined['Day_new'].notna()
+    same = pd.Series(True, index=joined.index)
+    for c in PLACE_COLS:
+        same &= joined[f'{c}_old'].astype(str).eq(joined[f'{c}_new'].astype(str))
+
+    joined['Change'] = None
+    joined.loc[in_old & ~in_new, 'Change'] = 'unscheduled'
+    joined.loc[~in_old & in_new, 'Change'] = 'new'
+    joined.loc[in_old & in_new & ~same, 'Change'] = 'moved'
+    changed = joined[joined['Change'].notna()].copy()
+    changed['DayChanged'] = changed['Day_old'].astype(str).ne(changed['Day_new'].astype(str))
+    changed['TimeChanged'] = changed['Start_old'].astype(str).ne(changed['Start_new'].astype(str))
+    changed['RoomChanged'] = changed['Room_old'].astype(str).ne(changed['Room_new'].astype(str))
+    return changed.reset_index()
+
+def affected_teachers(diff):
+    teachers = pd.concat([diff['Teachers_old'], diff['Teachers_new']]).dropna()
+    names = teachers.str.split(',').explode().str.strip()
+    return sorted(set(names[names.ne('') & names.ne('Unknown')]))
+
+def affected_rooms(diff):
+    rooms = pd.concat([diff['Room_old'], diff['Room_new']]).dropna().astype(str)
+    return sorted(set(rooms))
+
+def diff_summary(diff):
+    counts = diff['Change'].value_counts()
+    return {
+        'Moved': int(counts.get('moved', 0)), 'Newly Scheduled': int(counts.get('new', 0)),
+        'Became Unscheduled': int(counts.get('unscheduled', 0)),
+        'Teachers Affected': len(affected_teachers(diff)), 'Rooms Affected': len(affected_rooms(diff)),
+    }
+
+# ==========================================
+# 📤 Incremental republish
+# ==========================================
+def changed_timetables_zip(df, diff):
+    # ZIP ของตาราง (CSV) เฉพาะห้อง/ครูที่ได้รับผลกระทบ แทนการ export ใหม่ทั้งหมด
+    buf = io.BytesIO()
+    rooms, teachers = set(affected_rooms(diff)), set(affected_teachers(diff))
+    by_teacher = df.assign(_t=df['Teachers'].str.split(',')).explode('_t')
+    by_teacher['_t'] = by_teacher['_t'].str.strip()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for room, rows in df[df['Room'].astype(str).isin(rooms)].groupby(df['Room'].astype(str)):
+            zf.writestr(f"rooms/{room}.csv", rows.to_csv(index=False))
+        for tea, rows in by_teacher[by_teacher['_t'].isin(teachers)].groupby('_t'):
+            zf.writestr(f"teachers/{tea}.csv", rows.drop(columns='_t').to_csv(index=False))
+    return buf.getvalue()
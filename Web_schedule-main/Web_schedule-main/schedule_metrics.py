@@ -0,0 +1,109 @@
+# ==========================================
+# 📊 Schedule Quality Metrics (vectorized pandas)
+# ==========================================
+# คำนวณจาก DataFrame ผลลัพธ์ (คอลัมน์ Day, StartVal, Duration, Room, Course, Sec, Type, Teachers, Enrollment)
+# ทุกตัวเป็น groupby / merge / numpy ทั้งคอลัมน์ ไม่มี loop ต่อแถว -> หลักพันแถวใช้เวลาไม่กี่สิบ ms
+import numpy as np
+import pandas as pd
+
+DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
+SLOT_HOURS = 0.5
+LUNCH_START, LUNCH_END = 12.0, 13.0
+COMPACT_START, COMPACT_END = 9.0, 16.0
+# จำนวนชั่วโมงที่สอนได้ต่อวันของแต่ละ mode (ไม่รวมพักเที่ยง)
+DAY_HOURS = {1: (COMPACT_END - COMPACT_START) - (LUNCH_END - LUNCH_START), 2: (19.0 - 8.5) - (LUNCH_END - LUNCH_START)}
+
+def _with_times(df):
+    out = df.copy()
+    out['Hours'] = out['Duration'] * SLOT_HOURS
+    out['EndVal'] = out['StartVal'] + out['Hours']
+    out['DayIdx'] = out['Day'].map({d: i for i, d in enumerate(DAYS)})
+    # เวลาแบบต่อเนื่องทั้งสัปดาห์ (ชั่วโมง) ใช้เทียบลำดับ Lec/Lab ข้ามวัน
+    out['AbsStart'] = out['DayIdx'] * 24 + out['StartVal']
+    out['AbsEnd'] = out['DayIdx'] * 24 + out['EndVal']
+    return out
+
+def room_utilization(df, mode=2, df_room=None):
+    # ชั่วโมงที่ใช้ / ชั่วโมงที่สอนได้ ต่อ (ห้อง, วัน)
+    # ทุกห้องใน df_room x ทุกวัน (ห้อง/วันที่ไม่ถูกใช้ = 0) ไม่งั้นค่าเฉลี่ยนับเฉพาะช่องที่มีคาบและสูงเกินจริง
+    rooms = df[df['Room'] != 'Online'].assign(Room=lambda x: x['Room'].astype(str))
+    table = rooms.pivot_table(index='Room', columns='Day', values='Hours', aggfunc='sum', fill_value=0)
+    index = list(table.index)
+    if df_room is not None and not df_room.empty:
+        known = df_room['room'].astype(str).str.strip()
+        index = list(dict.fromkeys(list(known) + index))
+    table = table.reindex(index=index, columns=DAYS, fill_value=0)
+    return (table / DAY_HOURS.get(mode, DAY_HOURS[2])).round(3)
+
+def teacher_load(df):
+    # ต่อ (ครู, วัน): ชั่วโมงสอน, จำนวนคาบ, ช่วงแรก-สุดท้าย และชั่วโมงว่างระหว่างคาบ (ไม่นับพักเที่ยง)
+    rows = df.assign(Teacher=df['Teachers'].str.split(',')).explode('Teacher')
+    rows['Teacher'] = rows['Teacher'].str.strip()
+    rows = rows[rows['Teacher'].ne('Unknown') & rows['Teacher'].ne('')]
+    g = rows.groupby(['Teacher', 'Day'], sort=False)
+    out = g.agg(Hours=('Hours', 'sum'), Classes=('Hours', 'size'), First=('StartVal', 'min'), Last=('EndVal', 'max'))
+    spans_lunch = (out['First'] < LUNCH_START) & (out['Last'] > LUNCH_END)
+    out['IdleHours'] = (out['Last'] - out['First'] - out['Hours'] - np.where(spans_lunch, LUNCH_END - LUNCH_START, 0)).clip(lower=0)
+    return out.reset_index()
+
+def off_window_usage(df):
+    # คาบที่อยู่นอกช่วง Compact (09:00-16:00) ซึ่งเกิดได้เฉพาะ Flexible mode
+    early = np.clip(COMPACT_START - df['StartVal'], 0, df['Hours'])
+    late = np.clip(df['EndVal'] - COMPACT_END, 0, df['Hours'])
+    off = df.assign(OffHours=early + late)
+    return off[off['OffHours'] > 0][['Course', 'Sec', 'Type', 'Day', 'Start', 'End', 'Room', 'OffHours']]
+
+def lunch_proximity(df):
+    # ระยะ (นาที) จากคาบถึงพักเที่ยง: จบก่อน 12:00 -> 12:00 - End, เริ่มหลัง 13:00 -> Start - 13:00
+    before = np.where(df['EndVal'] <= LUNCH_START, (LUNCH_START - df['EndVal']) * 60, np.inf)
+    after = np.where(df['StartVal'] >= LUNCH_END, (df['StartVal'] - LUNCH_END) * 60, np.inf)
+    return pd.Series(np.minimum(before, after), index=df.index, name='LunchGapMin')
+
+def capacity_slack(df, df_room=None):
+    # ความจุห้อง - จำนวนนักศึกษา (ติดลบ = ห้องไม่พอ)
+    if df_room is None or df_room.empty or 'Enrollment' not in df.columns:
+        return pd.DataFrame(columns=['Course', 'Sec', 'Type', 'Room', 'Enrollment', 'Capacity', 'Slack', 'FillRate'])
+    cap = df_room[['room', 'capacity']].rename(columns={'room': 'Room', 'capacity': 'Capacity'})
+    cap['Room'] = cap['Room'].astype(str)
+    out = df[df['Room'] != 'Online'].assign(Room=lambda x: x['Room'].astype(str)).merge(cap, on='Room', how='left')
+    out['Slack'] = out['Capacity'] - out['Enrollment']
+    out['FillRate'] = (out['Enrollment'] / out['Capacity']).round(3)
+    return out[['Course', 'Sec', 'Type', 'Room', 'Enrollment', 'Capacity', 'Slack', 'FillRate']]
+
+def lecture_lab_order(df):
+    # ต่อ (วิชา, section) ที่มีทั้ง Lec และ Lab: Lab ต้องเริ่มหลัง Lec ทุกคาบจบ
+    g = df.groupby(['Course', 'Sec', 'Type'])
+    last_lec = g['AbsEnd'].max().xs('Lec', level='Type', drop_level=True) if (df['Type'] == 'Lec').any() else pd.Series(dtype=float)
+    first_lab = g['AbsStart'].min().xs('Lab', level='Type', drop_level=True) if (df['Type'] == 'Lab').any() else pd.Series(dtype=float)
+    both = pd.concat([last_lec.rename('LecEnd'), first_lab.rename('LabStart')], axis=1, join='inner')
+    both['Compliant'] = both['LabStart'] >= both['LecEnd']
+    return both.reset_index()
+
+def compute_metrics(df, df_room=None, mode=2):
+    # คืนค่า (summary dict, {ชื่อ: DataFrame})
+    if df is None or df.empty:
+        return {}, {}
+    df = _with_times(df)
+    util = room_utilization(df, mode, df_room)
+    load = teacher_load(df)
+    off = off_window_usage(df)
+    lunch = lunch_proximity(df)
+    slack = capacity_slack(df, df_room)
+    order = lecture_lab_order(df)
+
+    summary = {
+        'Room Utilization': float(util.to_numpy().mean()) if util.size else 0.0,
+        'Max Teacher Hours/Day': float(load['Hours'].max()) if not load.empty else 0.0,
+        'Teacher Idle Hours': float(load['IdleHours'].sum()) if not load.empty else 0.0,
+        'Off-window Hours': float(off['OffHours'].sum()),
+        'Lunch-adjacent Classes': int((lunch == 0).sum()),
+        'Overfull Rooms': int((slack['Slack'] < 0).sum()),
+        'Avg Fill Rate': float(slack['FillRate'].mean()) if not slack.empty else 0.0,
+        'Lec→Lab Compliance': float(order['Compliant'].mean()) if not order.empty else 1.0,
+    }
+    tables = {
+        'room_utilization': util, 'teacher_load': load, 'off_window': off,
+        'lunch': df[['Course', 'Sec', 'Type', 'Day', 'Start', 'End']].assign(LunchGapMin=lunch),
+        'capacity_slack': slack, 'lecture_lab_order': order,
+    }
+    return summary, tables
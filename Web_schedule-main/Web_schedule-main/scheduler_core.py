@@ -0,0 +1,869 @@
+# ==========================================
+# 🧠 Scheduling Core (ใช้ได้ทั้งจาก Streamlit และ job_worker.py)
+# ==========================================
+import pandas as pd
+from ortools.sat.python import cp_model
+import math
+import time
+
+import availability
+
+# ==========================================
+# 🛠️ Helper Functions
+# ==========================================
+# การแปลงเวลา/ข้อความ unavailable_times อยู่ใน calendar_parser.py
+from calendar_parser import DAYS, time_to_slot_index, parse_unavailable_time
+
+# ==========================================
+# 🧠 2. Solver Logic (Updated)
+# ==========================================
+MAX_LEC_SESSION = 6
+SCORE_FIXED = 1000000
+SCORE_CORE = 1000
+SCORE_ELEC = 100
+
+# สัดส่วนของ TIMEOUT ที่กันไว้ให้แต่ละ pass หลัง solve หลัก (refine / compaction) -> ทั้งรอบจบภายใน TIMEOUT
+POST_PASS_SHARE = 0.25
+COMPACT_ITER_TIME = 5.0   # เวลาสูงสุดต่อครูหนึ่งคนใน compact_teacher_days (วินาที)
+
+# ความละเอียดของเวลาเริ่ม (GRANULARITY): 30 = ทุกครึ่งชั่วโมง, 60 = ตรงชั่วโมง, 'standard' = คาบมาตรฐาน
+STANDARD_PERIOD_STARTS = {'09:00', '10:30', '13:00', '14:30', '16:00', '17:30'}
+
+def build_slot_map():
+    SLOT_MAP = {}
+    t_start = 8.5
+    idx = 0
+    while t_start < 19.0:
+        h = int(t_start)
+        m = int((t_start - h) * 60)
+        SLOT_MAP[idx] = {'time': f"{h:02d}:{m:02d}", 'val': t_start, 'is_lunch': (12.0 <= t_start < 13.0)}
+        idx += 1
+        t_start += 0.5
+    return SLOT_MAP
+
+def task_score(t):
+    if t.get('fixed'): return SCORE_FIXED
+    if t.get('is_optional') == 0: return SCORE_CORE
+    return SCORE_ELEC
+
+def prepare_problem(data):
+    # แปลง DataFrame ทั้งหมดเป็น problem dict (tasks, rooms, slot map) ที่ส่งข้าม process ได้
+    df_room = data.get('df_room', pd.DataFrame())
+    df_teacher_courses = data.get('df_teacher_courses', pd.DataFrame())
+    all_teacher = data.get('all_teacher', pd.DataFrame())
+    df_ai_in = data.get('df_ai_in', pd.DataFrame())
+    df_cy_in = data.get('df_cy_in', pd.DataFrame())
+    df_ai_out = data.get('df_ai_out', pd.DataFrame()) 
+    df_cy_out = data.get('df_cy_out', pd.DataFrame()) 
+    df_groups = data.get('df_groups', pd.DataFrame())
+    df_teacher_bookings = data.get('df_teacher_bookings', pd.DataFrame())
+
+    if df_room.empty or df_teacher_courses.empty:
+        return None
+
+    # --- Time Slot Setup ---
+    SLOT_MAP = build_slot_map()
+    TOTAL_SLOTS = len(SLOT_MAP)
+
+    # --- Data Pre-processing ---
+    for df in [df_room, df_teacher_courses, df_ai_in, df_cy_in, all_teacher, df_ai_out, df_cy_out, df_groups]:
+        if not df.empty: df.columns = df.columns.str.strip()
+
+    if not all_teacher.empty:
+        all_teacher['teacher_id'] = all_teacher['teacher_id'].astype(str).str.strip()
+
+    TEACHER_UNAVAILABLE_SLOTS = {}
+    if not all_teacher.empty and 'unavailable_times' in all_teacher.columns:
+        for _, row in all_teacher.iterrows():
+            TEACHER_UNAVAILABLE_SLOTS[row['teacher_id']] = parse_unavailable_time(row['unavailable_times'], SLOT_MAP)
+
+    # ชั่วโมงสอนสูงสุดต่อวัน (max_hours_per_day ใน all_teachers.csv, 0 = ไม่จำกัด) -> จำนวน slot
+    TEACHER_MAX_SLOTS = {}
+    if not all_teacher.empty and 'max_hours_per_day' in all_teacher.columns:
+        max_hours = pd.to_numeric(all_teacher['max_hours_per_day'], errors='coerce').fillna(0)
+        for tea, hours in zip(all_teacher['teacher_id'], max_hours):
+            if hours > 0: TEACHER_MAX_SLOTS[tea] = int(hours * 2)
+
+    # ช่วงที่ครูสอนให้ภาควิชาอื่นแล้ว (departments.py: คอลัมน์ teacher_id, day, slot)
+    # ไม่ว่างเหมือน unavailable_times และนับเป็นภาระงานต่อวันเหมือน task ที่ล็อก (locked_teacher_slots)
+    TEACHER_BOOKED_SLOTS = {}
+    if not df_teacher_bookings.empty:
+        for tea, d, slot in df_teacher_bookings[['teacher_id', 'day', 'slot']].itertuples(index=False):
+            TEACHER_BOOKED_SLOTS.setdefault(str(tea).strip(), {}).setdefault(int(d), set()).add(int(slot))
+
+    # ช่วงเวลาที่ห้องใช้ไม่ได้ (optional: คอลัมน์ unavailable_times ใน room.csv รูปแบบเดียวกับของครู)
+    ROOM_UNAVAILABLE_SLOTS = {}
+    if 'unavailable_times' in df_room.columns:
+        for _, row in df_room.iterrows():
+            ROOM_UNAVAILABLE_SLOTS[row['room']] = parse_unavailable_time(row['unavailable_times'], SLOT_MAP)
+
+    # กลุ่มนักศึกษา (optional: curriculum_groups.csv คอลัมน์ group, course_code, section)
+    # section ว่าง = ทุก section ของวิชานั้นอยู่ในกลุ่ม
+    group_members = {}
+    if not df_groups.empty:
+        for _, row in df_groups.iterrows():
+            c_code = str(row['course_code']).strip()
+            try: sec = int(row['section'])
+            except: sec = None
+            group_members.setdefault((c_code, sec), set()).add(str(row['group']).strip())
+
+    def groups_of(c_code, sec):
+        return sorted(group_members.get((c_code, sec), set()) | group_members.get((c_code, None), set()))
+
+    # วิชานอกหลักสูตร (ai_out/cy_out) ที่กลุ่มต้องเรียน -> ช่วงเวลาที่กลุ่มไม่ว่าง
+    # หนึ่งแถว = หนึ่งคาบ, ชั่วโมงต่อสัปดาห์แบ่งเท่า ๆ กันตามจำนวนคาบของ section
+    GROUP_UNAVAILABLE_SLOTS = {}
+    for df_out in [df_ai_out, df_cy_out]:
+        if df_out.empty or not group_members: continue
+        meetings = df_out.groupby(['course_code', 'section'])['day'].transform('count')
+        for (_, row), n_meet in zip(df_out.iterrows(), meetings):
+            try:
+                c_code = str(row['course_code']).strip()
+                sec = int(row['section'])
+                d_idx = DAYS.index(str(row['day']).strip().capitalize()[:3])
+            except: continue
+            start = time_to_slot_index(row['start'], SLOT_MAP)
+            hours = pd.to_numeric(pd.Series([row.get('lecture_hour', 0), row.get('lab_hour', 0)]), errors='coerce').fillna(0).sum()
+            if start < 0 or not hours > 0: continue
+            dur = int(math.ceil(hours * 2 / n_meet))
+            for g in groups_of(c_code, sec):
+                GROUP_UNAVAILABLE_SLOTS.setdefault(g, {}).setdefault(d_idx, set()).update(range(start, min(start + dur, TOTAL_SLOTS)))
+
+    fixed_locks = {} 
+    for df_fixed in [df_ai_out, df_cy_out]:
+        if df_fixed.empty: continue
+        for _, row in df_fixed.iterrows():
+            try:
+                c_code = str(row['course_code']).strip()
+                sec = int(row['section'])
+                day_str = str(row['day']).strip().capitalize()[:3]
+                
+                if row.get('lecture_hour', 0) > 0:
+                    fixed_locks[(c_code, sec, 'Lec')] = {'day': day_str, 'start': str(row['start']), 'room': str(row['room'])}
+                if row.get('lab_hour', 0) > 0:
+                    fixed_locks[(c_code, sec, 'Lab')] = {'day': day_str, 'start': str(row['start']), 'room': str(row['room'])}
+            except: continue
+
+    df_courses = pd.concat([df_ai_in, df_cy_in], ignore_index=True).fillna(0)
+    teacher_map = {}
+    df_teacher_courses['course_code'] = df_teacher_courses['course_code'].astype(str).str.strip()
+    for _, row in df_teacher_courses.iterrows():
+        c = row['course_code']
+        t = str(row['teacher_id']).strip()
+        if c not in teacher_map: teacher_map[c] = []
+        teacher_map[c].append(t)
+
+    room_list = df_room.drop(columns=['unavailable_times'], errors='ignore').to_dict('records')
+    room_list.append({'room': 'Online', 'capacity': 9999, 'type': 'virtual'})
+
+    # --- Task Generation ---
+    tasks = []
+    # (วิชา, section) ซ้ำในไฟล์ -> uid ซ้ำและคาบซ้อนกันเอง: ใช้แถวแรก แถวที่ซ้ำแจ้งใน unscheduled
+    seen_sections, duplicate_rows = set(), []
+
+    for _, row in df_courses.iterrows():
+        c_code = str(row['course_code']).strip()
+        try: sec = int(row['section'])
+        except: sec = row['section']
+        if (c_code, sec) in seen_sections:
+            for typ, hours in [('Lec', row.get('lecture_hour', 0)), ('Lab', row.get('lab_hour', 0))]:
+                if hours > 0:
+                    duplicate_rows.append({'Course': c_code, 'Sec': sec, 'Type': typ, 'Reason': 'Duplicate course row'})
+            continue
+        seen_sections.add((c_code, sec))
+        
+        enroll = row.get('enrollment_count', 30)
+        teachers = teacher_map.get(c_code, ['Unknown'])
+        groups = groups_of(c_code, sec)
+        is_opt = row.get('optional', 0)
+
+        # Lecture
+        lec_dur = int(math.ceil(row.get('lecture_hour', 0) * 2))
+        if lec_dur > 0:
+            lock_info = fixed_locks.get((c_code, sec, 'Lec'))
+            curr_lec = lec_dur
+            p = 1
+            while curr_lec > 0:
+                dur = min(curr_lec, MAX_LEC_SESSION)
+                uid = f"{c_code}_S{sec}_L_P{p}"
+                tasks.append({
+                    'uid': uid, 'id': c_code, 'sec': sec, 'type': 'Lec',
+                    'dur': dur, 'std': enroll, 'teachers': teachers, 'groups': groups,
+                    'is_online': (row.get('lec_online', 0) == 1),
+                    'is_optional': is_opt,
+                    'fixed': lock_info
+                })
+                curr_lec -= dur
+                p += 1
+        
+        # Lab
+        lab_dur = int(math.ceil(row.get('lab_hour', 0) * 2))
+        if lab_dur > 0:
+            lock_info = fixed_locks.get((c_code, sec, 'Lab'))
+            tasks.append({
+                'uid': f"{c_code}_S{sec}_Lb", 'id': c_code, 'sec': sec, 'type': 'Lab',
+                'dur': lab_dur, 'std': enroll, 'teachers': teachers, 'groups': groups,
+                'is_online': (row.get('lab_online', 0) == 1),
+                'req_ai': (row.get('require_lab_ai', 0) == 1),
+                'req_net': (row.get('require_lab_network', 0) == 1),
+                'is_optional': is_opt,
+                'fixed': lock_info
+            })
+
+    problem = {
+        'slot_map': SLOT_MAP, 'total_slots': TOTAL_SLOTS, 'tasks': tasks, 'room_list': room_list,
+        'teacher_unavailable': TEACHER_UNAVAILABLE_SLOTS, 'room_unavailable': ROOM_UNAVAILABLE_SLOTS,
+        'teacher_max_slots': TEACHER_MAX_SLOTS, 'duplicate_rows': duplicate_rows, 'teacher_booked': TEACHER_BOOKED_SLOTS,
+        'availability': availability.build_availability(
+            len(DAYS), TOTAL_SLOTS, teacher=TEACHER_UNAVAILABLE_SLOTS, room=ROOM_UNAVAILABLE_SLOTS,
+            group=GROUP_UNAVAILABLE_SLOTS)
+    }
+    for tea, by_day in TEACHER_BOOKED_SLOTS.items():
+        for d, slots in by_day.items():
+            for slot in slots: availability.block(problem['availability'], 'teacher', tea, d, slot, 1)
+    reserve_fixed_tasks(problem)
+    return problem
+
+# ==========================================
+# 📌 Fixed Placements (pre-pass ก่อนสร้างโมเดล)
+# ==========================================
+def reserve_fixed_tasks(problem):
+    # task ที่มี fixed lock ไม่เข้าโมเดลเลย: แปลงวัน/เวลาครั้งเดียว แล้วจองห้อง/ครู/กลุ่มใน availability engine
+    #   problem['tasks']          -> เหลือเฉพาะ task ที่ต้องค้นหา
+    #   problem['locked_tasks']   -> task ที่ล็อก, problem['locked'] = {uid: (room, day, start)}
+    #   problem['lock_conflicts'] -> lock ที่ใช้ไม่ได้ (เวลาผิด / ชนกับ lock ก่อนหน้า) ในรูปแบบแถว unscheduled
+    engine = problem['availability']
+    free_tasks, locked_tasks, locked, conflicts = [], [], {}, []
+    owner = {}   # (kind, resource, day, slot) -> uid ของ lock ที่จองช่องนั้นไว้
+    for t in problem['tasks']:
+        lock = t.get('fixed')
+        if not lock:
+            free_tasks.append(t)
+            continue
+        d = DAYS.index(lock['day']) if lock['day'] in DAYS else -1
+        s = time_to_slot_index(lock['start'], problem['slot_map'])
+        if d < 0 or s < 0 or s + t['dur'] > problem['total_slots']:
+            conflicts.append({'Course': t['id'], 'Sec': t['sec'], 'Type': t['type'],
+                              'Reason': f"Invalid fixed time: {lock['day']} {lock['start']}"})
+            continue
+
+        resources = [('room', lock['room'])] if lock['room'] != 'Online' else []
+        resources += [('teacher', tea) for tea in t['teachers'] if tea != 'Unknown']
+        resources += [('group', g) for g in t.get('groups', ())]
+        clash = sorted({owner[(kind, res, d, s + k)] for kind, res in resources for k in range(t['dur'])
+                        if (kind, res, d, s + k) in owner})
+        if clash:
+            conflicts.append({'Course': t['id'], 'Sec': t['sec'], 'Type': t['type'],
+                              'Reason': f"Fixed lock conflict with {', '.join(clash)}"})
+            continue
+
+        for kind, res in resources:
+            availability.block(engine, kind, res, d, s, t['dur'])
+            for k in range(t['dur']): owner[(kind, res, d, s + k)] = t['uid']
+        locked[t['uid']] = (lock['room'], d, s)
+        locked_tasks.append(t)
+
+    problem.update({'tasks': free_tasks, 'locked_tasks': locked_tasks, 'locked': locked, 'lock_conflicts': conflicts})
+
+def locked_teacher_slots(problem):
+    # (ครู, วัน) -> [(start, dur)] ของ task ที่ล็อกไว้ และคาบที่สอนให้ภาควิชาอื่น (นับเข้าภาระงานต่อวัน)
+    busy = {}
+    for t in problem.get('locked_tasks', []):
+        _, d, s = problem['locked'][t['uid']]
+        for tea in t['teachers']:
+            if tea != 'Unknown': busy.setdefault((tea, d), []).append((s, t['dur']))
+    for tea, by_day in problem.get('teacher_booked', {}).items():
+        for d, slots in by_day.items():
+            # slot ที่ติดกันรวมเป็นคาบเดียว
+            for s in sorted(slots):
+                if s - 1 not in slots:
+                    dur = 1
+                    while s + dur in slots: dur += 1
+                    busy.setdefault((tea, d), []).append((s, dur))
+    return busy
+
+def room_fits(t, r):
+    if t['is_online']:
+        return r['room'] == 'Online'
+    if r['room'] == 'Online': return False
+    if r['capacity'] < t['std']: return False
+    if t['type'] == 'Lab':
+        if 'lab' not in str(r.get('type','')).lower(): return False
+        if t.get('req_ai') and r['room'] != 'lab_ai': return False
+        if t.get('req_net') and r['room'] != 'lab_network': return False
+    return True
+
+def start_on_grid(time_str, config):
+    granularity = config.get('GRANULARITY', 30)
+    if granularity == 60: return time_str.endswith(':00')
+    if granularity == 'standard': return time_str in STANDARD_PERIOD_STARTS
+    return True
+
+def base_start_mask(problem, config, dur):
+    # slot เริ่มที่ผ่านเงื่อนไข mode / พักเที่ยง / granularity (ไม่ขึ้นกับวัน ครู หรือห้อง)
+    SLOT_MAP = problem['slot_map']
+    mask = 0
+    for s in range(problem['total_slots'] - dur + 1):
+        s_val = SLOT_MAP[s]['val']
+        if not start_on_grid(SLOT_MAP[s]['time'], config): continue
+        e_val = SLOT_MAP[s + dur - 1]['val'] + 0.5
+        if config['MODE'] == 1 and (s_val < 9.0 or e_val > 16.0): continue
+        if any(SLOT_MAP[s + k]['is_lunch'] for k in range(dur)): continue
+        mask |= 1 << s
+    return mask
+
+def start_mask(problem, config, t, d, base=None):
+    # bitmask ของ slot เริ่มที่ task วางได้ในวัน d (ยังไม่สนใจห้อง)
+    # task ที่มี fixed lock ไม่ผ่านที่นี่ (reserve_fixed_tasks แยกออกไปแล้ว)
+    mask = base_start_mask(problem, config, t['dur']) if base is None else base
+    engine = problem['availability']
+    for tea in t['teachers']:
+        mask &= availability.resource_free_starts(engine, 'teacher', tea, d, t['dur'])
+    for g in t.get('groups', ()):
+        mask &= availability.resource_free_starts(engine, 'group', g, d, t['dur'])
+    return mask
+
+def iter_candidates(problem, config, t, days=None):
+    # (room, day, start) ทั้งหมดที่ task วางได้
+    day_list = range(len(DAYS)) if days is None else days
+    rooms = [r['room'] for r in problem['room_list'] if room_fits(t, r)]
+    if not rooms: return
+    engine = problem['availability']
+    base = base_start_mask(problem, config, t['dur'])
+    for d in day_list:
+        mask = start_mask(problem, config, t, d, base)
+        if not mask: continue
+        for r in rooms:
+            room_mask = mask & availability.resource_free_starts(engine, 'room', r, d, t['dur'])
+            for s in availability.iter_bits(room_mask):
+                yield r, d, s
+
+def abs_time(problem, d, s):
+    # เวลาแบบต่อเนื่องทั้งสัปดาห์ (หน่วย slot): วัน x จำนวน slot ต่อวัน + slot เริ่ม
+    return d * problem['total_slots'] + s
+
+def add_task_vars(model, problem, t, candidates, forced=False):
+    # ตัวแปรและ constraint ของ task เดียว ลำดับตัวแปรคงที่: sched, day, start, end, abs แล้วตาม candidates
+    # (parallel_build.py อาศัยลำดับนี้คำนวณ index ของตัวแปรล่วงหน้า)
+    uid = t['uid']
+    TOTAL_SLOTS = problem['total_slots']
+    candidates = list(candidates)
+    sched = model.NewBoolVar(f"sched_{uid}")
+    
+    t_day = model.NewIntVar(0, len(DAYS)-1, f"d_{uid}")
+    t_start = model.NewIntVar(0, TOTAL_SLOTS-1, f"s_{uid}")
+    t_end = model.NewIntVar(0, TOTAL_SLOTS+10, f"e_{uid}")
+    model.Add(t_end == t_start + t['dur'])
+
+    # abs = เวลาเริ่มแบบต่อเนื่องทั้งสัปดาห์ domain มีเฉพาะค่าที่มี candidate -> precedence / interval ใช้ตัวแปรเดียว
+    abs_values = sorted({abs_time(problem, d, s) for _, d, s in candidates}) or [0]
+    t_abs = model.NewIntVarFromDomain(cp_model.Domain.FromValues(abs_values), f"a_{uid}")
+    model.Add(t_abs == t_day * TOTAL_SLOTS + t_start)
+
+    cand_vars = {}
+    for r, d, s in candidates:
+        var = model.NewBoolVar(f"{uid}_{r}_{d}_{s}")
+        cand_vars[(uid, r, d, s)] = var
+        model.Add(t_day == d).OnlyEnforceIf(var)
+        model.Add(t_start == s).OnlyEnforceIf(var)
+
+    if cand_vars:
+        model.Add(sum(cand_vars.values()) == 1).OnlyEnforceIf(sched)
+        model.Add(sum(cand_vars.values()) == 0).OnlyEnforceIf(sched.Not())
+    else:
+        model.Add(sched == 0)
+
+    if forced:
+        model.Add(sched == 1)
+    return sched, {'day': t_day, 'start': t_start, 'abs': t_abs}, cand_vars
+
+def build_model(problem, config, tasks=None, days=None, pinned=None, required=None):
+    # tasks: เฉพาะ task ที่ต้องการใส่ในโมเดล (default = ทั้งหมด)
+    # days: จำกัดวันที่วางได้ | pinned: {uid: (room, day, start)} ล็อกตำแหน่งไว้ (ใช้ตอน repair)
+    # required: uid ที่ต้องถูกวาง (ตำแหน่งใดก็ได้)
+    tasks = problem['tasks'] if tasks is None else tasks
+    pinned = pinned or {}
+    required = required or set()
+
+    model = cp_model.CpModel()
+    schedule = {}
+    is_scheduled = {}
+    task_vars = {} 
+
+    # 1. สร้างตัวแปรและ Constraints พื้นฐาน
+    for t in tasks:
+        uid = t['uid']
+        if uid in pinned:
+            cand_iter = [pinned[uid]]
+        else:
+            cand_iter = iter_candidates(problem, config, t, days)
+        is_scheduled[uid], task_vars[uid], cand_vars = add_task_vars(
+            model, problem, t, cand_iter, forced=(uid in pinned or uid in required))
+        schedule.update(cand_vars)
+
+    return finish_model(model, problem, config, tasks, schedule, is_scheduled, task_vars)
+
+def build_full_model(problem, config):
+    # BUILD_PROCESSES > 1: สร้างโมเดลแบบขนานใน process pool (parallel_build.py)
+    if config.get('BUILD_PROCESSES', 1) > 1:
+        from parallel_build import build_model_parallel
+        return build_model_parallel(problem, config)
+    return build_model(problem, config)
+
+def index_cells(tasks, items, rooms=None, teachers=None):
+    # ช่อง (ห้อง/ครู, วัน, slot) -> ค่าของ candidate ที่ใช้ช่องนั้น สำหรับ constraint ห้ามซ้อน
+    # items: ((uid, r, d, s), ค่า) ตามลำดับ schedule (ค่า = ตัวแปร หรือ index ของตัวแปรใน parallel_build.py)
+    # rooms / teachers: เก็บเฉพาะทรัพยากรเหล่านี้ (None = ทั้งหมด)
+    task_by_uid = {t['uid']: t for t in tasks}
+    task_teachers = {t['uid']: [tea for tea in t['teachers'] if tea != 'Unknown' and (teachers is None or tea in teachers)]
+                     for t in tasks}
+    room_cells, teacher_cells = {}, {}
+    for (uid, r, d, s), var in items:
+        use_room = r is not None and r != 'Online' and (rooms is None or r in rooms)   # r = None: ยังไม่เลือกห้อง (two_phase.py)
+        for k in range(task_by_uid[uid]['dur']):
+            if use_room:
+                room_cells.setdefault((r, d, s + k), []).append(var)
+            for tea in task_teachers[uid]:
+                teacher_cells.setdefault((tea, d, s + k), []).append(var)
+    return room_cells, teacher_cells
+
+def finish_model(model, problem, config, tasks, schedule, is_scheduled, task_vars, cells=None, cell_indices=None):
+    # constraint ระหว่าง task (ห้อง/ครู/กลุ่ม, Lec ก่อน Lab, ภาระงาน) + objective แล้วคืน bundle
+    # cells: (room_cells, teacher_cells) ที่สร้างไว้แล้ว | None = สร้างจาก schedule
+    # cell_indices: [index ของตัวแปรในช่องเดียวกัน] ตามลำดับ สำหรับ constraint ห้ามซ้อน (parallel_build.py)
+    #   ใส่ลง proto ตรง ๆ แทนการสร้างจาก cells (ไม่ต้องมี handle ของตัวแปร)
+    objective_terms = [is_scheduled[t['uid']] * task_score(t) for t in tasks]
+
+    task_day_vars = {t['uid']: {} for t in tasks}   # uid -> {day: [ตัวแปรของวันนั้น]} สำหรับ constraint ต่อ (ครู, วัน)
+    on_day = {}          # (uid, day) -> BoolVar ที่สร้างแล้ว (ดู task_day_literal)
+    for (uid, r, d, s), var in schedule.items():
+        task_day_vars[uid].setdefault(d, []).append(var)
+    room_cells, teacher_cells = cells if cells is not None else index_cells(tasks, schedule.items())
+
+    # 2. ลำดับ/ระยะห่างระหว่าง task ของ section เดียวกัน (Lec ก่อน Lab, คาบบรรยายแยกวัน)
+    add_section_rules(model, problem, config, tasks, is_scheduled, task_vars)
+
+    # 3. Constraints ห้ามใช้ห้อง/ครูซ้ำซ้อน
+    if cell_indices is not None:
+        for indices in cell_indices:
+            # เหมือน model.Add(LinearExpr.Sum(vars) <= 1)
+            linear = model.Proto().constraints.add().linear
+            linear.vars.extend(indices)
+            linear.coeffs.extend([1] * len(indices))
+            linear.domain.extend([cp_model.INT_MIN, 1])
+    else:
+        for cell_vars in room_cells.values():
+            if len(cell_vars) > 1: model.Add(cp_model.LinearExpr.Sum(cell_vars) <= 1)
+        for cell_vars in teacher_cells.values():
+            if len(cell_vars) > 1: model.Add(cp_model.LinearExpr.Sum(cell_vars) <= 1)
+
+    # 4. ภาระงานครูต่อวัน
+    penalty_terms = add_teacher_workload(model, problem, config, tasks, task_day_vars, task_vars, teacher_cells, on_day)
+
+    # 5. กลุ่มนักศึกษาเดียวกันห้ามเรียนซ้อนกัน
+    add_group_no_overlap(model, tasks, is_scheduled, task_vars)
+
+    model.Maximize(sum(objective_terms) - sum(penalty_terms))
+    return {'model': model, 'schedule': schedule, 'is_scheduled': is_scheduled, 'task_vars': task_vars, 'tasks': tasks}
+
+def task_day_literal(model, on_day, task_day_vars, uid, d):
+    # BoolVar: task ถูกวางในวัน d (สร้างครั้งเดียวต่อ task-day ใช้ร่วมกันทุก constraint)
+    key = (uid, d)
+    if key not in on_day:
+        on_day[key] = model.NewBoolVar(f"on_{uid}_{d}")
+        model.Add(sum(task_day_vars[uid][d]) == on_day[key])
+    return on_day[key]
+
+def add_group_no_overlap(model, tasks, is_scheduled, task_vars):
+    # หนึ่ง AddNoOverlap ต่อกลุ่ม จาก interval บนเวลา abs (ทั้งสัปดาห์) ของแต่ละ task
+    # task ไม่ข้ามวันอยู่แล้ว (start + dur <= slot ต่อวัน) จึงไม่ต้องแยก constraint ต่อวัน
+    by_group = {}
+    for t in tasks:
+        for g in t.get('groups', ()):
+            by_group.setdefault(g, []).append(t)
+    intervals = {}
+    for g, g_tasks in by_group.items():
+        if len(g_tasks) < 2: continue
+        for t in g_tasks:
+            if t['uid'] not in intervals:
+                intervals[t['uid']] = model.NewOptionalFixedSizeIntervalVar(
+                    task_vars[t['uid']]['abs'], t['dur'], is_scheduled[t['uid']], f"iv_{t['uid']}")
+        model.AddNoOverlap([intervals[t['uid']] for t in g_tasks])
+
+def section_pairs(tasks):
+    # (Lec, Lab) ของ section เดียวกัน และคู่คาบบรรยายที่ถูกแบ่ง (P1, P2) เรียงตามลำดับ part
+    by_section = {}
+    for t in tasks:
+        by_section.setdefault((t['id'], t['sec']), []).append(t)
+    lec_lab, lec_parts = [], []
+    for sec_tasks in by_section.values():
+        lecs = [t for t in sec_tasks if t['type'] == 'Lec']
+        labs = [t for t in sec_tasks if t['type'] == 'Lab']
+        lec_lab += [(lec, lab) for lec in lecs for lab in labs]
+        lec_parts += list(zip(lecs, lecs[1:]))
+    return lec_lab, lec_parts
+
+def section_links(tasks, config):
+    # uid -> [(partner, kind)]: after = partner ที่ต้องอยู่ก่อน task นี้, before = partner ที่ต้องอยู่หลัง
+    #   kind 'lab' = คู่ (Lec, Lab), 'split' = คาบบรรยายที่ถูกแบ่ง (เฉพาะเมื่อเปิด SPLIT_LEC_DIFFERENT_DAYS)
+    lec_lab, lec_parts = section_pairs(tasks)
+    after, before = {}, {}
+    for lec, lab in lec_lab:
+        after.setdefault(lab['uid'], []).append((lec['uid'], 'lab'))
+        before.setdefault(lec['uid'], []).append((lab['uid'], 'lab'))
+    if config.get('SPLIT_LEC_DIFFERENT_DAYS', False):
+        for first, second in lec_parts:
+            after.setdefault(second['uid'], []).append((first['uid'], 'split'))
+            before.setdefault(first['uid'], []).append((second['uid'], 'split'))
+    return after, before
+
+def section_pair_ok(problem, config, first_dur, d1, s1, d2, s2, kind):
+    # task แรก (ยาว first_dur) ที่ (d1, s1) กับ task หลังที่ (d2, s2) ผ่านกฎเดียวกับ add_section_rules ไหม
+    if kind == 'split': return d2 >= d1 + 1
+    max_gap = config.get('LAB_MAX_GAP_DAYS')
+    if max_gap is not None and d2 > d1 + max_gap: return False
+    if config.get('LAB_MIN_GAP_DAYS', 0): return d2 >= d1 + config['LAB_MIN_GAP_DAYS']
+    return abs_time(problem, d2, s2) >= abs_time(problem, d1, s1) + first_dur
+
+def section_violations(problem, config, assignment):
+    # [(uid ที่ต้องอยู่ก่อน, uid ที่ต้องอยู่หลัง)] ที่ผิดกฎของ section ในคำตอบ (รวม task ที่ล็อกไว้)
+    tasks = problem['tasks'] + problem.get('locked_tasks', [])
+    dur_of = {t['uid']: t['dur'] for t in tasks}
+    placed = {uid: (d, s) for uid, (_, d, s) in dict(problem.get('locked', {}), **assignment).items()}
+    after, _ = section_links(tasks, config)
+    return [(first, uid) for uid, links in after.items() if uid in placed
+            for first, kind in links
+            if first in placed and not section_pair_ok(problem, config, dur_of[first], *placed[first], *placed[uid], kind)]
+
+def add_section_rules(model, problem, config, tasks, is_scheduled, task_vars):
+    # หนึ่ง constraint ต่อคู่ บนตัวแปร abs/day (task ที่ล็อกไว้ใช้ค่าคงที่)
+    #   Lab เริ่มหลัง Lec จบ (เวลาต่อเนื่องทั้งสัปดาห์ -> Lab วันจันทร์ไม่ถือว่าอยู่หลัง Lec วันศุกร์)
+    #   LAB_MIN_GAP_DAYS / LAB_MAX_GAP_DAYS : Lab ห่างจาก Lec อย่างน้อย / ไม่เกิน N วัน (min 0 / max None = ไม่กำหนด)
+    #   SPLIT_LEC_DIFFERENT_DAYS            : คาบบรรยายที่ถูกแบ่งต้องอยู่คนละวัน (P2 หลัง P1)
+    min_gap = config.get('LAB_MIN_GAP_DAYS', 0)
+    max_gap = config.get('LAB_MAX_GAP_DAYS')
+    split_days = config.get('SPLIT_LEC_DIFFERENT_DAYS', False)
+    locked = problem.get('locked', {})
+
+    def terms(t):
+        # (abs, day, เงื่อนไข) ของ task ในโมเดล หรือค่าคงที่ของ task ที่ล็อกไว้ / None ถ้าไม่อยู่ในทั้งสอง
+        uid = t['uid']
+        if uid in task_vars:
+            return task_vars[uid]['abs'], task_vars[uid]['day'], [is_scheduled[uid]]
+        if uid in locked:
+            _, d, s = locked[uid]
+            return abs_time(problem, d, s), d, []
+        return None
+
+    lec_lab, lec_parts = section_pairs(tasks + problem.get('locked_tasks', []))
+    for lec, lab in lec_lab:
+        a, b = terms(lec), terms(lab)
+        if a is None or b is None or not (a[2] or b[2]): continue
+        enforce = a[2] + b[2]
+        if min_gap:
+            model.Add(b[1] >= a[1] + min_gap).OnlyEnforceIf(enforce)
+        else:
+            model.Add(b[0] >= a[0] + lec['dur']).OnlyEnforceIf(enforce)
+        if max_gap is not None:
+            model.Add(b[1] <= a[1] + max_gap).OnlyEnforceIf(enforce)
+
+    if split_days:
+        for first, second in lec_parts:
+            a, b = terms(first), terms(second)
+            if a is None or b is None or not (a[2] or b[2]): continue
+            model.Add(b[1] >= a[1] + 1).OnlyEnforceIf(a[2] + b[2])
+
+def add_teacher_workload(model, problem, config, tasks, task_day_vars, task_vars, teacher_cells, on_day):
+    # constraint ต่อ (ครู, วัน):
+    #   max_hours_per_day : ผลรวม duration ของ task ในวันนั้น <= ค่าที่กำหนด
+    #   MAX_CONSECUTIVE   : สอนติดกันไม่เกิน N ชั่วโมง (0 = ไม่จำกัด)
+    #   IDLE_GAP_WEIGHT   : ลงโทษช่วงว่างระหว่างคาบแรกถึงคาบสุดท้ายของวัน (0 = ปิด)
+    # คืนค่า penalty terms สำหรับ objective
+    max_slots = problem.get('teacher_max_slots', {})
+    max_run = int(config.get('MAX_CONSECUTIVE', 0) * 2)
+    gap_weight = config.get('IDLE_GAP_WEIGHT', 0)
+    if not (max_slots or max_run or gap_weight):
+        return []
+
+    by_teacher = {}
+    for t in tasks:
+        for tea in t['teachers']:
+            if tea == 'Unknown': continue
+            if tea in max_slots or max_run or gap_weight:
+                by_teacher.setdefault(tea, []).append(t)
+
+    TOTAL_SLOTS = problem['total_slots']
+    locked_busy = locked_teacher_slots(problem)
+    penalty_terms = []
+    for tea, tea_tasks in by_teacher.items():
+        for d in range(len(DAYS)):
+            day_tasks = [t for t in tea_tasks if d in task_day_vars.get(t['uid'], {})]
+            if not day_tasks: continue
+            load = sum(t['dur'] * sum(task_day_vars[t['uid']][d]) for t in day_tasks)
+            fixed = locked_busy.get((tea, d), [])
+            fixed_load = sum(dur for _, dur in fixed)
+            fixed_slots = {s + k for s, dur in fixed for k in range(dur)}
+
+            if tea in max_slots and sum(t['dur'] for t in day_tasks) + fixed_load > max_slots[tea]:
+                model.Add(load <= max(max_slots[tea] - fixed_load, 0))
+
+            if max_run:
+                # ทุกหน้าต่างยาว max_run+1 slot ต้องมีอย่างน้อย 1 slot ว่าง
+                occ = {}
+                for s in range(TOTAL_SLOTS):
+                    cell_vars = teacher_cells.get((tea, d, s))
+                    if not cell_vars: continue
+                    occ[s] = model.NewBoolVar(f"occ_{tea}_{d}_{s}")
+                    model.Add(sum(cell_vars) == occ[s])
+                for w in range(TOTAL_SLOTS - max_run):
+                    cells = range(w, w + max_run + 1)
+                    if any(s in occ for s in cells) and all(s in occ or s in fixed_slots for s in cells):
+                        model.Add(sum(occ.get(s, 1) for s in cells) <= max_run)
+
+            if gap_weight and len(day_tasks) > 1:
+                first = model.NewIntVar(0, TOTAL_SLOTS, f"first_{tea}_{d}")
+                last = model.NewIntVar(0, TOTAL_SLOTS, f"last_{tea}_{d}")
+                model.Add(last >= first)
+                for t in day_tasks:
+                    y = task_day_literal(model, on_day, task_day_vars, t['uid'], d)
+                    model.Add(first <= task_vars[t['uid']]['start']).OnlyEnforceIf(y)
+                    model.Add(last >= task_vars[t['uid']]['start'] + t['dur']).OnlyEnforceIf(y)
+                for s, dur in fixed:
+                    model.Add(first <= s)
+                    model.Add(last >= s + dur)
+                penalty_terms.append(gap_weight * (last - first - load - fixed_load))
+    return penalty_terms
+
+def solve_model(bundle, config, time_limit=None, workers=None):
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = workers or config.get('WORKERS', 4)
+    solver.parameters.max_time_in_seconds = time_limit or config['TIMEOUT']
+
+    # LOG_CALLBACK ใช้โดย job_worker เพื่อเก็บ log ของ CP-SAT ลงคิว (LNS_CALLBACK ใช้ใน lns.py)
+    if config.get('LOG_CALLBACK'):
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = config['LOG_CALLBACK']
+    
+    status = solver.Solve(bundle['model'])
+    return status, solver
+
+def extract_assignment(bundle, solver):
+    # {uid: (room, day, start)} ของ task ที่ถูกจัดแล้ว
+    assignment = {}
+    for t in bundle['tasks']:
+        uid = t['uid']
+        if uid in bundle['is_scheduled'] and solver.Value(bundle['is_scheduled'][uid]):
+            d_val = solver.Value(bundle['task_vars'][uid]['day'])
+            s_val = solver.Value(bundle['task_vars'][uid]['start'])
+            
+            r_name = "Unknown"
+            for (tid, r, d, s), var in bundle['schedule'].items():
+                if tid == uid and d == d_val and s == s_val and solver.Value(var):
+                    r_name = r
+                    break
+            assignment[uid] = (r_name, d_val, s_val)
+    return assignment
+
+def assignment_to_results(problem, assignment):
+    SLOT_MAP = problem['slot_map']
+    results = []
+    unscheduled = list(problem.get('duplicate_rows', [])) + list(problem.get('lock_conflicts', []))
+    placed = dict(problem.get('locked', {}), **assignment)
+    for t in problem.get('locked_tasks', []) + problem['tasks']:
+        uid = t['uid']
+        if uid in placed:
+            r_name, d_val, s_val = placed[uid]
+            start_time = SLOT_MAP[s_val]['time']
+            end_idx = s_val + t['dur']
+            end_time = SLOT_MAP.get(end_idx, {'time': '19:00'})['time']
+            
+            results.append({
+                'Day': DAYS[d_val], 'Start': start_time, 'End': end_time,
+                'StartVal': SLOT_MAP[s_val]['val'], 'Duration': t['dur'],
+                'Room': r_name, 'Course': t['id'], 'Sec': t['sec'],
+                'Type': t['type'], 'Teachers': ", ".join(t['teachers']), 'Enrollment': t['std']
+            })
+        else:
+            unscheduled.append({'Course': t['id'], 'Sec': t['sec'], 'Type': t['type'], 'Reason': 'Constraint Conflict'})
+    return pd.DataFrame(results), unscheduled
+
+def add_assignment_hint(bundle, assignment, uids):
+    for uid in uids:
+        if uid in assignment:
+            key = (uid,) + tuple(assignment[uid])
+            if key in bundle['schedule']:
+                bundle['model'].AddHint(bundle['schedule'][key], 1)
+                bundle['model'].AddHint(bundle['is_scheduled'][uid], 1)
+
+def resolve_subset(problem, config, assignment, free, time_limit, workers=None, required=None):
+    # แก้ใหม่เฉพาะ task ใน free โดยล็อก task อื่นที่วางแล้วไว้ที่เดิม (ใช้โดย LNS, refinement และ compaction)
+    # time_limit นับรวมเวลาสร้างโมเดล -> ผู้เรียกคุมเวลารวมได้ | required: task ใน free ที่ต้องถูกวาง
+    started = time.time()
+    pinned = {uid: pos for uid, pos in assignment.items() if uid not in free}
+    tasks = [t for t in problem['tasks'] if t['uid'] in pinned or t['uid'] in free]
+    bundle = build_model(problem, config, tasks=tasks, pinned=pinned, required=required)
+
+    # เริ่มจากคำตอบปัจจุบัน เพื่อให้ผลไม่แย่กว่าเดิม
+    add_assignment_hint(bundle, assignment, free)
+
+    remaining = time_limit - (time.time() - started)
+    if remaining <= 0:
+        return None
+    status, solver = solve_model(bundle, config, time_limit=remaining, workers=workers)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None
+    return extract_assignment(bundle, solver)
+
+def refine_schedule(problem, config, assignment, time_limit):
+    # หลัง solve แบบหยาบ: แก้ใหม่ที่ความละเอียด 30 นาที เฉพาะรอบ ๆ task ที่ยังวางไม่ได้
+    # (task ที่วางไม่ได้ + task ที่ใช้ครูคนเดียวกันหรือเป็น Lec/Lab ของ section เดียวกัน)
+    unplaced = [t for t in problem['tasks'] if t['uid'] not in assignment]
+    if not unplaced or time_limit <= 0:
+        return assignment
+    teachers = {tea for t in unplaced for tea in t['teachers'] if tea != 'Unknown'}
+    sections = {(t['id'], t['sec']) for t in unplaced}
+    free = {t['uid'] for t in unplaced}
+    free |= {t['uid'] for t in problem['tasks']
+             if t['uid'] in assignment
+             and ((t['id'], t['sec']) in sections or teachers.intersection(t['teachers']))}
+
+    fine_config = dict(config, GRANULARITY=30)
+    refined = resolve_subset(problem, fine_config, assignment, free, time_limit)
+    if refined is None or len(refined) < len(assignment):
+        return assignment
+    return refined
+
+def teacher_idle_slots(problem, assignment):
+    # (ครู, วัน) -> slot ว่างระหว่างคาบแรกถึงคาบสุดท้าย (รวม task ที่ล็อก) แบบเดียวกับ penalty ของ IDLE_GAP_WEIGHT
+    busy = {key: list(spans) for key, spans in locked_teacher_slots(problem).items()}
+    for t in problem['tasks']:
+        if t['uid'] not in assignment: continue
+        _, d, s = assignment[t['uid']]
+        for tea in t['teachers']:
+            if tea != 'Unknown': busy.setdefault((tea, d), []).append((s, t['dur']))
+    return {key: max(s + dur for s, dur in spans) - min(s for s, _ in spans) - sum(dur for _, dur in spans)
+            for key, spans in busy.items()}
+
+def compact_teacher_days(problem, config, assignment, time_limit):
+    # ลดช่วงว่างของครูหลัง solve หลัก ทีละครู: ปลดเฉพาะ task ของครูคนนั้น (ย้ายวัน/เวลา/ห้องได้ แต่ต้องยังถูกวาง)
+    # task อื่นล็อกไว้ที่เดิม -> โมเดลย่อยเล็กเท่ากันไม่ว่าข้อมูลจะใหญ่แค่ไหน (ดู estimate_compaction)
+    started = time.time()
+    if not assignment or time_limit <= 0:
+        return assignment
+    gaps = teacher_idle_slots(problem, assignment)
+    total_idle = sum(gaps.values())
+    idle = {}
+    for (tea, _), gap in gaps.items():
+        if gap > 0: idle[tea] = idle.get(tea, 0) + gap
+    for tea in sorted(idle, key=idle.get, reverse=True):
+        remaining = time_limit - (time.time() - started)
+        if remaining <= 0: break
+        free = {t['uid'] for t in problem['tasks'] if t['uid'] in assignment and tea in t['teachers']}
+        if not free: continue   # ช่วงว่างมาจาก task ที่ล็อกเท่านั้น
+        cand = resolve_subset(problem, config, assignment, free, min(COMPACT_ITER_TIME, remaining), required=free)
+        if cand is None or len(cand) < len(assignment): continue
+        cand_idle = sum(teacher_idle_slots(problem, cand).values())
+        if cand_idle < total_idle:
+            assignment, total_idle = cand, cand_idle
+    return assignment
+
+def plan_strategy(problem, config):
+    from model_estimate import MEMORY_BUDGET_MB, choose_strategy, estimate_strategies
+    strategy = config.get('STRATEGY', 'full')
+    budget = config.get('MEMORY_BUDGET_MB', MEMORY_BUDGET_MB)
+    if strategy == 'auto':
+        plan = choose_strategy(problem, config, budget)
+    else:
+        estimates = estimate_strategies(problem, config)
+        est = estimates.get(strategy, estimates['full'])
+        plan = {'strategy': strategy, 'config': {}, 'estimates': estimates,
+                'reason': f"{strategy}: ~{est['variables']:,} vars, ~{est['memory_mb']:,} MB"}
+        if est['memory_mb'] > budget:
+            plan = choose_strategy(problem, config, budget)
+            plan['reason'] = f"{strategy} needs ~{est['memory_mb']:,} MB (budget {budget:,} MB) -> {plan['reason']}"
+
+    # compaction (IDLE_GAP_WEIGHT) สร้างโมเดลย่อยต่อครู: ใหญ่เกิน budget หรือสร้างไม่ทันเวลาต่อครู -> ข้าม
+    est = plan['estimates'].get('compaction')
+    if plan['strategy'] and est and (est['memory_mb'] > budget or est['build_seconds'] > COMPACT_ITER_TIME):
+        plan['config']['IDLE_GAP_WEIGHT'] = 0
+        plan['reason'] += f"; idle-gap compaction skipped (~{est['memory_mb']:,} MB per teacher)"
+
+    # PLAN_CALLBACK ใช้โดย UI, LOG_CALLBACK (job_worker) เก็บเป็นบรรทัดแรกของ log
+    if config.get('PLAN_CALLBACK'): config['PLAN_CALLBACK'](plan)
+    if config.get('LOG_CALLBACK'): config['LOG_CALLBACK'](f"Model plan: {plan['reason']}")
+    return plan
+
+def run_solver(data, config):
+    started = time.time()
+    problem = prepare_problem(data)
+    if problem is None:
+        return None, [{"Reason": "Missing Critical Data (Room or Teachers)"}]
+
+    # ประมาณขนาดโมเดลก่อนสร้าง: STRATEGY 'auto' หรือ strategy ที่เลือกเกิน memory budget -> เลือกใหม่ (model_estimate.py)
+    plan = plan_strategy(problem, config)
+    if plan['strategy'] is None:
+        return pd.DataFrame([]), [{"Reason": plan['reason']}]
+    config = dict(config, **plan['config'])
+
+    # ช่วงว่างของครูลดทีหลัง (compact_teacher_days) เพื่อไม่ให้ penalty แย่งเวลาจากการวาง task
+    gap_weight = config.get('IDLE_GAP_WEIGHT', 0)
+    config = dict(config, IDLE_GAP_WEIGHT=0)
+
+    # เวลา: solve หลักใช้ TIMEOUT ที่เหลือหลังกันส่วนของ pass ที่ตามมาไว้ (LNS_TIME เป็นเวลาแยกที่ผู้ใช้เลือกเพิ่ม)
+    total_time = config['TIMEOUT']
+    deadline = started + total_time
+    refine = bool(config.get('REFINE')) and config.get('GRANULARITY', 30) != 30
+    compact_reserve = total_time * POST_PASS_SHARE if gap_weight else 0
+    reserved = total_time * POST_PASS_SHARE * refine + compact_reserve
+    config = dict(config, TIMEOUT=max(1, deadline - reserved - time.time()))
+
+    # ตารางร่าง greedy (greedy.py): แสดงทันทีผ่าน DRAFT_CALLBACK และเป็น hint ให้ CP-SAT
+    draft = {}
+    if config.get('GREEDY_DRAFT', True):
+        from greedy import greedy_schedule, hint_draft
+        draft = greedy_schedule(problem, config)
+        if config.get('DRAFT_CALLBACK'): config['DRAFT_CALLBACK'](*assignment_to_results(problem, draft))
+
+    lns_time = config.get('LNS_TIME', 0)
+    if config.get('STRATEGY') == 'decompose':
+        from decomposition import solve_decomposed
+        assignment = solve_decomposed(problem, config)
+    elif config.get('STRATEGY') == 'two_phase':
+        from two_phase import solve_two_phase
+        assignment = solve_two_phase(problem, config, draft)
+    else:
+        if config.get('MODEL_CACHE', True):
+            from model_cache import cached_build_model
+            bundle = cached_build_model(problem, config)
+        else:
+            bundle = build_full_model(problem, config)
+        if draft: hint_draft(bundle, problem, draft)
+        status, solver = solve_model(bundle, config, time_limit=max(1, deadline - reserved - time.time()))
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            assignment = extract_assignment(bundle, solver)
+        elif lns_time > 0 or draft:
+            assignment = {}   # ให้ LNS / ตารางร่างเป็นจุดเริ่มต้นแทน
+        else:
+            return pd.DataFrame([]), []
+
+    # CP-SAT หมดเวลาก่อนได้คำตอบที่ดีกว่าตารางร่าง -> ใช้ตารางร่างต่อ
+    if sum(task_score(t) for t in problem['tasks'] if t['uid'] in draft) > \
+            sum(task_score(t) for t in problem['tasks'] if t['uid'] in assignment):
+        assignment = dict(draft)
+
+    # Refinement: ช่องเวลาแบบหยาบ -> ลองวาง task ที่เหลือที่ความละเอียด 30 นาที
+    if refine:
+        refine_time = min(config.get('REFINE_TIME', total_time * POST_PASS_SHARE), deadline - compact_reserve - time.time())
+        assignment = refine_schedule(problem, config, assignment, refine_time)
+
+    # LNS: ปรับปรุงต่อหลัง solve หลักตามเวลาที่ผู้ใช้เลือก
+    if lns_time > 0:
+        from lns import improve_schedule
+        assignment, _ = improve_schedule(problem, dict(config, IDLE_GAP_WEIGHT=gap_weight), assignment, lns_time)
+
+    if gap_weight:
+        compact_time = min(config.get('COMPACT_TIME', total_time * POST_PASS_SHARE), deadline + lns_time - time.time())
+        assignment = compact_teacher_days(problem, dict(config, IDLE_GAP_WEIGHT=gap_weight), assignment, compact_time)
+    
+    return assignment_to_results(problem, assignment)
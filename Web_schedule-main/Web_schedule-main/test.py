@@ -1,10 +1,8 @@
 import streamlit as st
 import pandas as pd
-from ortools.sat.python import cp_model
-import math
-import re
 import html
-import streamlit.components.v1 as components # 👈 เพิ่ม Library นี้
+import io
+import os
 
 # ==========================================
 # ⚙️ 0. Page Config & CSS Styling
@@ -30,63 +28,43 @@ if 'unscheduled' not in st.session_state:
     st.session_state['unscheduled'] = []
 if 'has_run' not in st.session_state:
     st.session_state['has_run'] = False
+if 'run_history' not in st.session_state:
+    st.session_state['run_history'] = []
 
-# ==========================================
-# 🛠️ Helper Functions
-# ==========================================
-DAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']
-
-def time_to_slot_index(time_str, slot_map):
-    time_str = str(time_str).strip()
-    match = re.search(r"(\d{1,2})[:.](\d{2})", time_str)
-    if match:
-        h, m = match.groups()
-        t_val = int(h) + (int(m) / 60.0)
-        for idx, info in slot_map.items():
-            if abs(info['val'] - t_val) < 0.01:
-                return idx
-    return -1
-
-def parse_unavailable_time(unavailable_input, slot_map):
-    unavailable_slots_by_day = {d_idx: set() for d_idx in range(len(DAYS))}
-    
-    if pd.isna(unavailable_input) or unavailable_input == "":
-        return unavailable_slots_by_day
-
-    target_list = []
-    if isinstance(unavailable_input, list): target_list = unavailable_input
-    elif isinstance(unavailable_input, str): target_list = [unavailable_input]
-    else: return unavailable_slots_by_day
-
-    for item in target_list:
-        if isinstance(item, list): ut_str = item[0] if len(item) > 0 else ""
-        else: ut_str = str(item)
-
-        ut_str = ut_str.replace('[', '').replace(']', '').replace("'", "").replace('"', "")
-        match = re.search(r"(\w{3})\s+(\d{1,2}[:.]\d{2})-(\d{1,2}[:.]\d{2})", ut_str, re.IGNORECASE)
-        if not match: continue
-
-        day_abbr, start_time_str, end_time_str = match.groups()
-        day_abbr = day_abbr.capitalize()
-
-        try: day_idx = DAYS.index(day_abbr)
-        except ValueError: continue
-
-        start_slot = time_to_slot_index(start_time_str.replace('.', ':'), slot_map)
-        end_slot = time_to_slot_index(end_time_str.replace('.', ':'), slot_map)
-
-        if start_slot != -1 and end_slot != -1 and start_slot < end_slot:
-            for slot in range(start_slot, end_slot):
-                unavailable_slots_by_day[day_idx].add(slot)
-                
-    return unavailable_slots_by_day
+# Solver แยกไปอยู่ใน scheduler_core.py เพื่อให้ job_worker.py เรียกใช้ได้โดยไม่ต้องมี Streamlit
+# UI ไม่ import scheduler_core (OR-Tools) ตอนเริ่ม -> โหลดเมื่อกด Generate เท่านั้น
+from calendar_parser import DAYS
+import job_queue
+import run_history
 
 # ==========================================
 # 📂 1. Data Management
 # ==========================================
+@st.cache_data(show_spinner=False)
+def load_default_csv(path, mtime):
+    # mtime อยู่ใน cache key: แก้ไฟล์ default แล้วโหลดใหม่อัตโนมัติ
+    return pd.read_csv(path)
+
+@st.cache_data(show_spinner=False)
+def read_uploaded_csv(content):
+    return pd.read_csv(io.BytesIO(content))
+
+def load_data(sources):
+    # แปลง sources เป็น DataFrame (เรียกตอนจะ solve เท่านั้น)
+    data = {}
+    for key, (kind, src, filename) in sources.items():
+        try:
+            if kind == 'upload': data[key] = read_uploaded_csv(src.getvalue())
+            elif kind == 'default': data[key] = load_default_csv(src, os.path.getmtime(src))
+            else: data[key] = pd.DataFrame()
+        except Exception as e:
+            st.error(f"Error reading {filename}: {e}")
+            data[key] = pd.DataFrame()
+    return data
+
 def render_data_upload_section():
     st.info("📂 **Step 1: Data Preparation**")
-    uploaded_data = {}
+    sources = {}   # key -> (kind, file/path, filename) ยังไม่อ่าน CSV จนกว่าจะกด Generate
     
     BASE_PATH = "Web_schedule-main/Web_schedule-main/" 
     
@@ -98,6 +76,7 @@ def render_data_upload_section():
         ("5. Cyber Courses IN", "df_cy_in", "cy_in_courses.csv"),
         ("6. AI Courses OUT (Fixed)", "df_ai_out", "ai_out_courses.csv"),
         ("7. Cyber Courses OUT (Fixed)", "df_cy_out", "cy_out_courses.csv"),
+        ("8. Curriculum Groups (Optional)", "df_groups", "curriculum_groups.csv"),
     ]
 
     with st.expander("📂 Upload CSV files (Optional - Defaults available)", expanded=True):
@@ -106,305 +85,14 @@ def render_data_upload_section():
             with cols[i % 2]:
                 file = st.file_uploader(f"{label}", type=['csv'], key=key)
                 if file:
-                    try: uploaded_data[key] = pd.read_csv(file)
-                    except Exception as e: st.error(f"Error reading {filename}: {e}")
+                    sources[key] = ('upload', file, filename)
+                elif os.path.exists(f"{BASE_PATH}{filename}"):
+                    sources[key] = ('default', f"{BASE_PATH}{filename}", filename)
                 else:
-                    try: uploaded_data[key] = pd.read_csv(f"{BASE_PATH}{filename}")
-                    except: uploaded_data[key] = pd.DataFrame() # Empty if not found
-
-    return uploaded_data
-
-# ==========================================
-# 🧠 2. Solver Logic (Updated)
-# ==========================================
-def run_solver(data, config):
-    df_room = data.get('df_room', pd.DataFrame())
-    df_teacher_courses = data.get('df_teacher_courses', pd.DataFrame())
-    all_teacher = data.get('all_teacher', pd.DataFrame())
-    df_ai_in = data.get('df_ai_in', pd.DataFrame())
-    df_cy_in = data.get('df_cy_in', pd.DataFrame())
-    df_ai_out = data.get('df_ai_out', pd.DataFrame()) 
-    df_cy_out = data.get('df_cy_out', pd.DataFrame()) 
-
-    if df_room.empty or df_teacher_courses.empty:
-        return None, [{"Reason": "Missing Critical Data (Room or Teachers)"}]
-
-    # --- Time Slot Setup ---
-    SLOT_MAP = {}
-    t_start = 8.5
-    idx = 0
-    while t_start < 19.0:
-        h = int(t_start)
-        m = int((t_start - h) * 60)
-        SLOT_MAP[idx] = {'time': f"{h:02d}:{m:02d}", 'val': t_start, 'is_lunch': (12.0 <= t_start < 13.0)}
-        idx += 1
-        t_start += 0.5
-    TOTAL_SLOTS = len(SLOT_MAP)
-
-    # --- Data Pre-processing ---
-    for df in [df_room, df_teacher_courses, df_ai_in, df_cy_in, all_teacher, df_ai_out, df_cy_out]:
-        if not df.empty: df.columns = df.columns.str.strip()
-
-    TEACHER_UNAVAILABLE_SLOTS = {}
-    if not all_teacher.empty and 'unavailable_times' in all_teacher.columns:
-        all_teacher['teacher_id'] = all_teacher['teacher_id'].astype(str).str.strip()
-        for _, row in all_teacher.iterrows():
-            TEACHER_UNAVAILABLE_SLOTS[row['teacher_id']] = parse_unavailable_time(row['unavailable_times'], SLOT_MAP)
-
-    fixed_locks = {} 
-    for df_fixed in [df_ai_out, df_cy_out]:
-        if df_fixed.empty: continue
-        for _, row in df_fixed.iterrows():
-            try:
-                c_code = str(row['course_code']).strip()
-                sec = int(row['section'])
-                day_str = str(row['day']).strip().capitalize()[:3]
-                
-                if row.get('lecture_hour', 0) > 0:
-                    fixed_locks[(c_code, sec, 'Lec')] = {'day': day_str, 'start': str(row['start']), 'room': str(row['room'])}
-                if row.get('lab_hour', 0) > 0:
-                    fixed_locks[(c_code, sec, 'Lab')] = {'day': day_str, 'start': str(row['start']), 'room': str(row['room'])}
-            except: continue
-
-    df_courses = pd.concat([df_ai_in, df_cy_in], ignore_index=True).fillna(0)
-    teacher_map = {}
-    df_teacher_courses['course_code'] = df_teacher_courses['course_code'].astype(str).str.strip()
-    for _, row in df_teacher_courses.iterrows():
-        c = row['course_code']
-        t = str(row['teacher_id']).strip()
-        if c not in teacher_map: teacher_map[c] = []
-        teacher_map[c].append(t)
-
-    room_list = df_room.to_dict('records')
-    room_list.append({'room': 'Online', 'capacity': 9999, 'type': 'virtual'})
-
-    # --- Task Generation ---
-    tasks = []
-    MAX_LEC_SESSION = 6 
-
-    for _, row in df_courses.iterrows():
-        c_code = str(row['course_code']).strip()
-        try: sec = int(row['section'])
-        except: sec = row['section']
-        
-        enroll = row.get('enrollment_count', 30)
-        teachers = teacher_map.get(c_code, ['Unknown'])
-        is_opt = row.get('optional', 0)
-
-        # Lecture
-        lec_dur = int(math.ceil(row.get('lecture_hour', 0) * 2))
-        if lec_dur > 0:
-            lock_info = fixed_locks.get((c_code, sec, 'Lec'))
-            curr_lec = lec_dur
-            p = 1
-            while curr_lec > 0:
-                dur = min(curr_lec, MAX_LEC_SESSION)
-                uid = f"{c_code}_S{sec}_L_P{p}"
-                tasks.append({
-                    'uid': uid, 'id': c_code, 'sec': sec, 'type': 'Lec',
-                    'dur': dur, 'std': enroll, 'teachers': teachers,
-                    'is_online': (row.get('lec_online', 0) == 1),
-                    'is_optional': is_opt,
-                    'fixed': lock_info
-                })
-                curr_lec -= dur
-                p += 1
-        
-        # Lab
-        lab_dur = int(math.ceil(row.get('lab_hour', 0) * 2))
-        if lab_dur > 0:
-            lock_info = fixed_locks.get((c_code, sec, 'Lab'))
-            tasks.append({
-                'uid': f"{c_code}_S{sec}_Lb", 'id': c_code, 'sec': sec, 'type': 'Lab',
-                'dur': lab_dur, 'std': enroll, 'teachers': teachers,
-                'is_online': (row.get('lab_online', 0) == 1),
-                'req_ai': (row.get('require_lab_ai', 0) == 1),
-                'req_net': (row.get('require_lab_network', 0) == 1),
-                'is_optional': is_opt,
-                'fixed': lock_info
-            })
-
-    # --- Model Building ---
-    model = cp_model.CpModel()
-    schedule = {}
-    is_scheduled = {}
-    task_vars = {} 
-    objective_terms = []
-    
-    SCORE_FIXED = 1000000
-    SCORE_CORE = 1000
-    SCORE_ELEC = 100
-
-    # 1. สร้างตัวแปรและ Constraints พื้นฐาน
-    for t in tasks:
-        uid = t['uid']
-        is_scheduled[uid] = model.NewBoolVar(f"sched_{uid}")
-        
-        t_day = model.NewIntVar(0, len(DAYS)-1, f"d_{uid}")
-        t_start = model.NewIntVar(0, TOTAL_SLOTS-1, f"s_{uid}")
-        t_end = model.NewIntVar(0, TOTAL_SLOTS+10, f"e_{uid}")
-        model.Add(t_end == t_start + t['dur'])
-        task_vars[uid] = {'day': t_day, 'start': t_start}
-
-        if t.get('fixed'):
-            try:
-                f_day_idx = DAYS.index(t['fixed']['day'])
-                f_start_slot = time_to_slot_index(t['fixed']['start'], SLOT_MAP)
-                model.Add(t_day == f_day_idx)
-                model.Add(t_start == f_start_slot)
-            except: pass
-
-        candidates = []
-        for r in room_list:
-            if t.get('fixed') and t['fixed']['room'] != r['room']: continue
-            if t['is_online']:
-                if r['room'] != 'Online': continue
-            else:
-                if r['room'] == 'Online': continue
-                if r['capacity'] < t['std']: continue
-                if t['type'] == 'Lab':
-                    if 'lab' not in str(r.get('type','')).lower(): continue
-                    if t.get('req_ai') and r['room'] != 'lab_ai': continue
-                    if t.get('req_net') and r['room'] != 'lab_network': continue
-            
-            for d in range(len(DAYS)):
-                if t.get('fixed') and DAYS.index(t['fixed']['day']) != d: continue
+                    sources[key] = ('missing', None, filename) # Empty if not found
 
-                for s in range(TOTAL_SLOTS - t['dur'] + 1):
-                    s_val = SLOT_MAP[s]['val']
-                    
-                    if t.get('fixed'):
-                        f_start = time_to_slot_index(t['fixed']['start'], SLOT_MAP)
-                        if s != f_start: continue
-                    
-                    if not t.get('fixed'):
-                        e_val = SLOT_MAP[s + t['dur'] - 1]['val'] + 0.5
-                        if config['MODE'] == 1 and (s_val < 9.0 or e_val > 16.0): continue
-                        
-                        overlap_lunch = False
-                        for k in range(t['dur']):
-                            if SLOT_MAP[s+k]['is_lunch']: overlap_lunch = True
-                        if overlap_lunch: continue
-
-                        teacher_conflict = False
-                        for tea in t['teachers']:
-                            if tea in TEACHER_UNAVAILABLE_SLOTS:
-                                unavail_set = TEACHER_UNAVAILABLE_SLOTS[tea].get(d, set())
-                                task_slots = set(range(s, s + t['dur']))
-                                if not task_slots.isdisjoint(unavail_set): 
-                                    teacher_conflict = True
-                                    break
-                        if teacher_conflict: continue
-
-                    var = model.NewBoolVar(f"{uid}_{r['room']}_{d}_{s}")
-                    schedule[(uid, r['room'], d, s)] = var
-                    candidates.append(var)
-                    
-                    model.Add(t_day == d).OnlyEnforceIf(var)
-                    model.Add(t_start == s).OnlyEnforceIf(var)
+    return sources
 
-        if candidates:
-            model.Add(sum(candidates) == 1).OnlyEnforceIf(is_scheduled[uid])
-            model.Add(sum(candidates) == 0).OnlyEnforceIf(is_scheduled[uid].Not())
-        else:
-            model.Add(is_scheduled[uid] == 0)
-
-        if t.get('fixed'): score = SCORE_FIXED
-        elif t.get('is_optional') == 0: score = SCORE_CORE
-        else: score = SCORE_ELEC
-        objective_terms.append(is_scheduled[uid] * score)
-
-    # 2. [ย้ายมาไว้ตรงนี้] Logic เพิ่มเติม: บังคับ Lecture ต้องมาก่อน Lab
-    # ต้องทำหลังจากสร้าง task_vars เสร็จแล้วเท่านั้น
-    course_sec_map = {}
-    for t in tasks:
-        key = (t['id'], t['sec'])
-        if key not in course_sec_map:
-            course_sec_map[key] = {'Lec': [], 'Lab': []}
-        
-        if t['type'] == 'Lec':
-            course_sec_map[key]['Lec'].append(t)
-        elif t['type'] == 'Lab':
-            course_sec_map[key]['Lab'].append(t)
-
-    for key, val in course_sec_map.items():
-        lecs = val['Lec']
-        labs = val['Lab']
-        
-        if lecs and labs:
-            for l_task in lecs:
-                for lb_task in labs:
-                    l_uid = l_task['uid']
-                    lb_uid = lb_task['uid']
-                    
-                    # Constraint: เวลาเริ่ม Lab >= เวลาจบ Lec (เริ่ม Lec + ระยะเวลา)
-                    if l_uid in task_vars and lb_uid in task_vars:
-                         model.Add(task_vars[lb_uid]['start'] >= task_vars[l_uid]['start'] + l_task['dur']).OnlyEnforceIf([is_scheduled[l_uid], is_scheduled[lb_uid]])
-
-    # 3. Constraints ห้ามใช้ห้อง/ครูซ้ำซ้อน
-    for d in range(len(DAYS)):
-        for s in range(TOTAL_SLOTS):
-            for r in room_list:
-                if r['room'] == 'Online': continue
-                active = []
-                for t in tasks:
-                    for k in range(t['dur']):
-                        if s - k >= 0:
-                            key = (t['uid'], r['room'], d, s - k)
-                            if key in schedule: active.append(schedule[key])
-                if active: model.Add(sum(active) <= 1)
-
-    all_teachers_set = set(tea for t in tasks for tea in t['teachers'] if tea != 'Unknown')
-    for tea in all_teachers_set:
-        for d in range(len(DAYS)):
-            for s in range(TOTAL_SLOTS):
-                active = []
-                for t in tasks:
-                    if tea in t['teachers']:
-                        for r in room_list:
-                             for k in range(t['dur']):
-                                if s - k >= 0:
-                                    key = (t['uid'], r['room'], d, s - k)
-                                    if key in schedule: active.append(schedule[key])
-                if active: model.Add(sum(active) <= 1)
-
-    model.Maximize(sum(objective_terms))
-    solver = cp_model.CpSolver()
-    solver.parameters.num_search_workers = 4
-    solver.parameters.max_time_in_seconds = config['TIMEOUT']
-    
-    status = solver.Solve(model)
-
-    results = []
-    unscheduled = []
-
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        for t in tasks:
-            uid = t['uid']
-            if uid in is_scheduled and solver.Value(is_scheduled[uid]):
-                d_val = solver.Value(task_vars[uid]['day'])
-                s_val = solver.Value(task_vars[uid]['start'])
-                
-                r_name = "Unknown"
-                for (tid, r, d, s), var in schedule.items():
-                    if tid == uid and d == d_val and s == s_val and solver.Value(var):
-                        r_name = r
-                        break
-                
-                start_time = SLOT_MAP[s_val]['time']
-                end_idx = s_val + t['dur']
-                end_time = SLOT_MAP.get(end_idx, {'time': '19:00'})['time']
-                
-                results.append({
-                    'Day': DAYS[d_val], 'Start': start_time, 'End': end_time,
-                    'StartVal': SLOT_MAP[s_val]['val'], 'Duration': t['dur'],
-                    'Room': r_name, 'Course': t['id'], 'Sec': t['sec'],
-                    'Type': t['type'], 'Teachers': ", ".join(t['teachers'])
-                })
-            else:
-                unscheduled.append({'Course': t['id'], 'Sec': t['sec'], 'Type': t['type'], 'Reason': 'Constraint Conflict'})
-    
-    return pd.DataFrame(results), unscheduled
 # ==========================================
 # 🎨 3. Visualization Helper (CHANGED METHOD: Iframe Component)
 # ==========================================
@@ -512,15 +200,295 @@ def render_schedule_component(df, title):
     html_content += "</div>" # End container
 
     # ✅ ใช้ components.html แทน st.markdown เพื่อแก้ปัญหา HTML หลุด
+    import streamlit.components.v1 as components
     components.html(html_content, height=450, scrolling=True)
 
+# ==========================================
+# 📊 Quality Metrics Dashboard
+# ==========================================
+@st.cache_data(show_spinner=False, max_entries=20)
+def cached_metrics(df, df_room, mode):
+    # cache ต่อผลลัพธ์ (hash ของ DataFrame) -> สลับไปมาระหว่าง view ไม่ต้องคำนวณใหม่
+    from schedule_metrics import compute_metrics
+    return compute_metrics(df, df_room, mode)
+
+def render_metrics_dashboard(df):
+    summary, tables = cached_metrics(df, st.session_state.get('run_rooms'), st.session_state.get('run_mode', 2))
+    if not summary: return
+    with st.expander("📊 Schedule Quality", expanded=False):
+        items = list(summary.items())
+        for row in range(0, len(items), 4):
+            cols = st.columns(4)
+            for col, (name, value) in zip(cols, items[row:row + 4]):
+                if name in ('Room Utilization', 'Avg Fill Rate', 'Lec→Lab Compliance'): col.metric(name, f"{value:.0%}")
+                elif isinstance(value, float): col.metric(name, f"{value:g}")
+                else: col.metric(name, value)
+
+        t_room, t_teacher, t_off, t_cap, t_order = st.tabs(["Room Utilization", "Teacher Load", "Off-window & Lunch", "Capacity", "Lec → Lab"])
+        with t_room:
+            st.dataframe(tables['room_utilization'], width=1000)
+        with t_teacher:
+            load = tables['teacher_load']
+            st.bar_chart(load.groupby('Teacher')[['Hours', 'IdleHours']].sum())
+            st.dataframe(load, width=1000)
+        with t_off:
+            st.dataframe(tables['off_window'], width=1000)
+            lunch = tables['lunch']
+            st.dataframe(lunch[lunch['LunchGapMin'] == 0], width=1000)
+        with t_cap:
+            st.dataframe(tables['capacity_slack'].sort_values('Slack'), width=1000)
+        with t_order:
+            order = tables['lecture_lab_order']
+            st.dataframe(order[~order['Compliant']], width=1000)
+
+# ==========================================
+# 🕓 Run History & Diff
+# ==========================================
+def render_run_diff():
+    history = st.session_state.get('run_history', [])
+    if len(history) < 2: return
+    with st.expander(f"🕓 Compare Runs ({len(history)} kept)", expanded=False):
+        labels = {r['run_id']: f"#{i + 1} · {r['label']} · {len(r['schedule'])} classes" for i, r in enumerate(history)}
+        ids = list(labels)
+        c1, c2 = st.columns(2)
+        with c1:
+            old_id = st.selectbox("Base run", ids, index=len(ids) - 2, format_func=labels.get, key="diff_old")
+        with c2:
+            new_id = st.selectbox("Compare with", ids, index=len(ids) - 1, format_func=labels.get, key="diff_new")
+        old_run, new_run = run_history.get_run(history, old_id), run_history.get_run(history, new_id)
+
+        changed = run_history.changed_inputs(old_run['fingerprint'], new_run['fingerprint'])
+        st.caption("Changed inputs: " + (", ".join(changed) if changed else "none (same data and settings)"))
+        diff = run_history.diff_schedules(old_run['schedule'], new_run['schedule'])
+        cols = st.columns(5)
+        for col, (name, value) in zip(cols, run_history.diff_summary(diff).items()):
+            col.metric(name, value)
+        if diff.empty:
+            st.success("✅ The two runs are identical.")
+            return
+
+        st.dataframe(diff, width=1000)
+        st.write("**Affected teachers:** " + ", ".join(run_history.affected_teachers(diff)))
+        st.download_button("📦 Download Changed Timetables (ZIP)", run_history.changed_timetables_zip(new_run['schedule'], diff),
+                           f"changed_{old_id}_{new_id}.zip", "application/zip")
+
+# ==========================================
+# ✋ Manual Adjustments
+# ==========================================
+def edit_state(df):
+    # occupancy index ของตารางปัจจุบัน: สร้างครั้งเดียวต่อผลลัพธ์ แล้วแก้เฉพาะ slot ที่ย้าย
+    edit = st.session_state.get('edit')
+    if edit is None or edit['df'] is not df:
+        import manual_edit
+        problem = None
+        if st.session_state.get('run_data') is not None:
+            from scheduler_core import prepare_problem
+            problem = prepare_problem({k: v.copy() for k, v in st.session_state['run_data'].items()})
+        edit = {'df': df, 'index': manual_edit.build_index(df, problem)}
+        st.session_state['edit'] = edit
+    return edit
+
+def commit_edit(old_df, new_df, unscheduled, affected, label):
+    # เก็บสถานะก่อนแก้ไว้ undo และเพิ่มเป็นรอบใหม่ใน run history (เทียบได้ใน Compare Runs)
+    st.session_state['edit_undo'] = (old_df, st.session_state.get('unscheduled', []))
+    st.session_state['schedule'] = new_df
+    st.session_state['unscheduled'] = unscheduled
+    st.session_state['edit_affected'] = affected
+    history = st.session_state['run_history']
+    fingerprint = history[-1]['fingerprint'] if history else {'data': {}, 'config': ''}
+    run_history.add_run(history, new_df, unscheduled, fingerprint, label=label)
+
+def render_manual_edit(df):
+    import manual_edit
+    with st.expander("✋ Manual Adjustments", expanded=bool(st.session_state.get('edit_affected'))):
+        edit = edit_state(df)
+        index = edit['index']
+        labels = manual_edit.row_labels(df)
+        idx = st.selectbox("Class to move", list(df.index), format_func=labels.get, key="edit_row")
+        row = df.loc[idx]
+        dur = int(row['Duration'])
+        room_df = st.session_state.get('run_rooms')
+        rooms = sorted(room_df['room'].astype(str).unique()) if room_df is not None and not room_df.empty else []
+        rooms += [r for r in ['Online', str(row['Room'])] if r not in rooms]
+
+        c1, c2, c3 = st.columns(3)
+        day = c1.selectbox("Day", DAYS, index=DAYS.index(row['Day']), key=f"edit_day_{idx}")
+        starts = list(range(manual_edit.TOTAL_SLOTS - dur + 1))
+        s = c2.selectbox("Start", starts, index=min(manual_edit.slot_of(row['StartVal']), len(starts) - 1),
+                         format_func=manual_edit.slot_time, key=f"edit_start_{idx}")
+        room = c3.selectbox("Room", rooms, index=rooms.index(str(row['Room'])), key=f"edit_room_{idx}")
+
+        rules = st.session_state.get('run_config') or {'MODE': st.session_state.get('run_mode', 2)}
+        conflicts = manual_edit.check_move(index, df, idx, day, s, room, room_df, rules)
+        if conflicts:
+            st.dataframe(pd.DataFrame(conflicts).drop(columns=['With', 'Resolvable']), hide_index=True, width=1000)
+        else:
+            st.success("✅ No conflicts at the new position.")
+        # ชนกับคาบอื่นที่ไม่ได้ล็อกเท่านั้น (ไม่ใช่กฎเวลา/ห้อง/fixed) -> ให้ solver ย้ายคาบที่ชนออกได้
+        resolvable = all(c['Resolvable'] for c in conflicts)
+        can_reopt = index['problem'] is not None and st.session_state.get('run_config') is not None
+        reopt_time = st.slider("Re-optimization time (seconds)", 5, 60, 10, key="edit_reopt_time")
+
+        b1, b2, b3 = st.columns(3)
+        if b1.button("✅ Apply Move", disabled=bool(conflicts), key="edit_apply"):
+            new_df = df.copy()
+            edit['df'] = new_df   # index แก้ต่อในที่ ไม่ต้องสร้างใหม่
+            rooms_hit, teachers_hit = manual_edit.apply_move(index, new_df, idx, day, s, room)
+            commit_edit(df, new_df, st.session_state.get('unscheduled', []), (sorted(rooms_hit), sorted(teachers_hit)),
+                        f"manual: {row['Course']} S{row['Sec']} {row['Type']}")
+            st.rerun()
+        if b2.button("🔧 Move & Re-optimize Around It", disabled=not (resolvable and can_reopt), key="edit_reopt",
+                     help="Keeps this class at the new position and re-solves only the classes sharing its room, "
+                          "teachers or student groups that day."):
+            new_df = df.copy()
+            manual_edit.apply_move(index, new_df, idx, day, s, room)
+            with st.spinner("🔧 Re-optimizing the neighbourhood..."):
+                result = manual_edit.reoptimize(index, new_df, idx, st.session_state['run_config'], reopt_time)
+            if result is None:
+                st.session_state.pop('edit', None)   # index ถูกแก้ไปแล้ว -> สร้างใหม่จากตารางเดิม
+                st.error("❌ No feasible arrangement around this move. Try another position or a longer time.")
+            else:
+                diff = run_history.diff_schedules(df, result[0])
+                commit_edit(df, result[0], result[1], (run_history.affected_rooms(diff), run_history.affected_teachers(diff)),
+                            f"manual + re-opt: {row['Course']} S{row['Sec']} {row['Type']}")
+                st.rerun()
+        if b3.button("↩️ Undo Last Change", disabled=st.session_state.get('edit_undo') is None, key="edit_undo_btn"):
+            st.session_state['schedule'], st.session_state['unscheduled'] = st.session_state.pop('edit_undo')
+            st.session_state.pop('edit_affected', None)
+            st.rerun()
+
+        # เฉพาะตารางของห้อง/ครูที่เปลี่ยน
+        affected = st.session_state.get('edit_affected')
+        if affected:
+            rooms_hit, teachers_hit = affected
+            st.caption(f"Updated: rooms {', '.join(rooms_hit) or '-'} · teachers {', '.join(teachers_hit) or '-'}")
+            for r in rooms_hit:
+                if r != 'Online': render_schedule_component(df[df['Room'].astype(str) == r], f"Room View: {r}")
+
+# ==========================================
+# 📬 4. Background Job Status
+# ==========================================
+def render_model_estimate(data, config):
+    # ประมาณขนาดโมเดลของทุก strategy (ไม่สร้างโมเดลจริง) + strategy ที่โหมด Automatic จะเลือก
+    from scheduler_core import plan_strategy, prepare_problem
+    problem = prepare_problem(data)
+    if problem is None:
+        st.error("Missing Critical Data (Room or Teachers)")
+        return
+    plan = plan_strategy(problem, dict(config, STRATEGY='auto'))
+    rows = [dict(Strategy=name, **est) for name, est in plan['estimates'].items()]
+    st.dataframe(pd.DataFrame(rows).rename(columns={
+        'tasks': 'Tasks', 'candidates': 'Candidates', 'variables': 'Variables', 'constraints': 'Constraints',
+        'memory_mb': 'Est. Memory (MB)', 'build_seconds': 'Est. Build (s)'}), hide_index=True, width=1000)
+    if plan['strategy'] is None: st.error(f"❌ {plan['reason']}")
+    else: st.info(f"🤖 Automatic choice: {plan['reason']}")
+
+def render_draft(draft_df, draft_unscheduled):
+    # เรียกจาก run_solver ก่อนเริ่ม CP-SAT -> ผู้ใช้เห็นตารางร่างระหว่างรอ
+    total = len(draft_df) + len(draft_unscheduled)
+    st.info(f"📝 Draft ready: {len(draft_df)} of {total} classes placed. The solver is now improving it...")
+    if not draft_df.empty:
+        with st.expander("📝 Draft Schedule", expanded=False):
+            st.dataframe(draft_df.drop(columns=['StartVal']), hide_index=True, width=1000)
+
+def render_departments(data_sources, config):
+    # หลายภาควิชาใช้ room.csv ชุดเดียวกัน: solve แยกคนละ process แล้วประสานการจองผ่าน room_ledger (SQLite)
+    with st.expander("🏛️ Departments (shared rooms)", expanded=False):
+        st.caption("Each department is solved as its own small model in a separate process. Rooms and shared teachers "
+                   "are booked in a reservation ledger; only departments whose bookings collide are solved again.")
+        split_bundled = st.checkbox("Solve AI and Cyber courses as separate departments", value=True)
+        extra_files = st.file_uploader("More departments (course CSV per department, same columns as AI Courses IN)",
+                                       type=['csv'], accept_multiple_files=True, key='department_files')
+        dept_processes = st.slider("Department Processes", 1, 8, 2,
+                                   help="Departments solved at the same time. Solver CPU threads are divided between them.")
+        if not st.button("🏛️ Solve Departments"):
+            return
+        if not data_sources:
+            st.error("Please upload data first.")
+            return
+
+        from departments import department_data, solve_departments, split_bundled_departments
+        data_store = load_data(data_sources)
+        departments = split_bundled_departments(data_store) if split_bundled else {}
+        for f in extra_files or []:
+            departments[os.path.splitext(f.name)[0]] = department_data(
+                data_store, read_uploaded_csv(f.getvalue()), groups=data_store.get('df_groups'))
+        if not departments:
+            st.error("No department courses to schedule.")
+            return
+
+        with st.spinner(f"🏛️ Solving {len(departments)} departments..."):
+            res_df, un_list, ledger_log = solve_departments(departments, dict(config, DEPARTMENT_PROCESSES=dept_processes))
+        st.dataframe(pd.DataFrame(ledger_log), hide_index=True, width=1000)
+        if res_df.empty:
+            st.error("❌ No department produced a schedule. Try increasing time or relaxing constraints.")
+            return
+        st.session_state['schedule'] = res_df
+        st.session_state['unscheduled'] = un_list
+        st.session_state['has_run'] = True
+        st.session_state['run_mode'] = config['MODE']
+        st.session_state['run_rooms'] = data_store.get('df_room')
+        st.session_state['run_data'] = data_store
+        st.session_state['run_config'] = dict(config)
+        for key in ['edit_undo', 'edit_affected', 'lns_history']: st.session_state.pop(key, None)
+        run_history.add_run(st.session_state['run_history'], res_df, un_list,
+                            run_history.input_fingerprint(data_store, config), label="departments")
+        rounds = max(entry['Round'] for entry in ledger_log)
+        st.success(f"✅ Scheduled {len(res_df)} classes across {res_df['Department'].nunique()} departments "
+                   f"in {rounds} ledger round{'s' if rounds > 1 else ''}.")
+
+def render_job_status(job_id):
+    job = job_queue.get_job(job_id)
+    if job is None:
+        st.warning(f"⚠️ Job `{job_id}` not found in the queue.")
+        return
+
+    st.subheader(f"📬 Background Job `{job_id}`")
+    status = job['status']
+    if status == job_queue.STATUS_QUEUED:
+        st.info(f"⏳ Waiting in queue (position {job['queue_position']}, {job['cpu']} CPU threads requested)")
+    elif status == job_queue.STATUS_RUNNING:
+        st.info(f"⚙️ Running on worker `{job['worker']}` (attempt {job['attempts']})")
+    elif status == job_queue.STATUS_DONE:
+        res_df = job.get('result')
+        if res_df is not None and not res_df.empty:
+            # โหลดผลเข้าสู่ session ครั้งเดียวต่อ job
+            if st.session_state.get('loaded_job') != job_id:
+                st.session_state['schedule'] = res_df
+                st.session_state['unscheduled'] = job.get('unscheduled') or []
+                st.session_state['has_run'] = True
+                st.session_state['loaded_job'] = job_id
+                for key in ['edit_undo', 'edit_affected']: st.session_state.pop(key, None)
+                fingerprint = st.session_state.get('job_fingerprints', {}).pop(job_id, None)
+                if fingerprint:
+                    run_history.add_run(st.session_state['run_history'], res_df, job.get('unscheduled'), fingerprint, label=f"job {job_id}")
+            st.success(f"✅ Job finished! Scheduled {len(res_df)} classes. See the Results tab.")
+        else:
+            st.error("❌ Job finished without a valid schedule. Try increasing time or relaxing constraints.")
+    elif status == job_queue.STATUS_FAILED:
+        st.error("❌ Job failed.")
+    else:
+        st.warning(f"Job status: {status}")
+
+    b1, b2 = st.columns(2)
+    with b1:
+        st.button("🔄 Refresh Status", key="refresh_job")
+    with b2:
+        if status == job_queue.STATUS_QUEUED and st.button("✖️ Cancel Job", key="cancel_job"):
+            job_queue.cancel_job(job_id)
+            st.rerun()
+
+    with st.expander("📜 Solver Log", expanded=(status == job_queue.STATUS_FAILED)):
+        logs = job_queue.get_job_logs(job_id)
+        st.code("\n".join(logs) if logs else "(no log yet)")
+
 # ==========================================
 # 🚀 Main App Flow
 # ==========================================
 tab1, tab2, tab3 = st.tabs(["1️⃣ Upload Data", "2️⃣ Settings & Run", "3️⃣ Results"])
 
 with tab1:
-    data_store = render_data_upload_section()
+    data_sources = render_data_upload_section()
 
 with tab2:
     st.header("⚙️ Configuration")
@@ -529,23 +497,105 @@ with tab2:
         mode = st.radio("Schedule Mode", [1, 2], format_func=lambda x: "Compact (09:00-16:00)" if x==1 else "Flexible (08:30-19:00)")
     with c2:
         timeout = st.slider("Max Calculation Time (seconds)", 10, 600, 120)
+    c3, c4 = st.columns(2)
+    with c3:
+        cpu_threads = st.slider("Solver CPU Threads", 1, 8, 4)
+        strategy = st.selectbox("Solve Strategy", ['auto', 'full', 'decompose', 'two_phase'],
+                                format_func=lambda x: {'auto': "Automatic (estimate model size first)", 'full': "Full model",
+                                                       'decompose': "Day-by-day decomposition (large catalogues)",
+                                                       'two_phase': "Time first, rooms later (many rooms)"}[x],
+                                help="Automatic estimates each model's size from the data and picks the first that fits the memory "
+                                     "and time budget, coarsening the start-time grid if needed. "
+                                     "Decomposition assigns days first, solves each day in parallel, then repairs unplaced classes. "
+                                     "Two-phase picks day/time with room capacity totals only, then matches concrete rooms per day.")
+        granularity = st.selectbox("Start-time Granularity", [30, 60, 'standard'],
+                                   format_func=lambda x: {30: "Every 30 minutes", 60: "On the hour", 'standard': "Standard periods (09:00, 10:30, 13:00, ...)"}[x],
+                                   help="Coarser grids mean fewer candidate starts and a smaller, faster model.")
+        refine = st.checkbox("Refine conflicts at 30-minute resolution", value=True, disabled=(granularity == 30),
+                             help="Re-solves only the unplaced classes and their teachers' classes on the fine grid.")
+        max_consecutive = st.slider("Max Consecutive Teaching Hours", 0, 8, 0,
+                                    help="Per teacher per day. Daily teaching hours come from `max_hours_per_day` in all_teachers.csv. 0 = no limit.")
+        lab_gap = st.select_slider("Days between Lecture and Lab", options=list(range(0, 5)), value=(0, 4),
+                                   help="Minimum / maximum number of days from a section's lectures to its lab. "
+                                        "0 = lab may follow the lecture on the same day; 4 maximum = no limit.")
+        split_lec_days = st.checkbox("Split lectures on different days", value=False,
+                                     help="Lectures longer than 3 hours are split into parts; put each part on a different day.")
+        minimize_gaps = st.checkbox("Minimize teacher idle gaps", value=False,
+                                    help="Extra pass after solving that moves classes to close gaps between a teacher's classes on the same day.")
+    with c4:
+        use_queue = st.toggle("📬 Run in background queue", value=False,
+                              help="Requires `python job_worker.py` running on the server. Queued jobs survive browser disconnects and app restarts.")
+        use_model_cache = st.checkbox("💾 Reuse cached model", value=True,
+                                      help="Skips model building when the data, mode and granularity are unchanged (e.g. only the time limit changed).")
+        greedy_draft = st.checkbox("📝 Start from a greedy draft", value=True,
+                                   help="Builds a quick first-fit timetable in milliseconds, shows it right away and gives it to the solver as a starting point.")
+        build_processes = st.slider("Model Build Processes", 1, 8, 1,
+                                    help="Builds large models in parallel worker processes and merges the pieces. 1 = build in the app process.")
+        lns_time = st.slider("LNS Improvement Time (seconds)", 0, 300, 0,
+                             help="After the main solve, repeatedly re-optimize one room / teacher / course at a time and keep improvements. 0 = off.")
     
-    if st.button("🚀 Generate Schedule", type="primary"):
-        if data_store:
-            with st.spinner("🤖 AI is crunching the numbers..."):
-                config = {'MODE': mode, 'TIMEOUT': timeout}
-                res_df, un_list = run_solver(data_store, config)
-                
-                if res_df is not None and not res_df.empty:
-                    st.session_state['schedule'] = res_df
-                    st.session_state['unscheduled'] = un_list
-                    st.session_state['has_run'] = True
-                    st.success(f"✅ Success! Scheduled {len(res_df)} classes.")
-                else:
-                    st.error("❌ Failed to find a valid schedule. Try increasing time or relaxing constraints.")
+    config = {'MODE': mode, 'TIMEOUT': timeout, 'WORKERS': cpu_threads, 'STRATEGY': strategy, 'LNS_TIME': lns_time,
+              'GRANULARITY': granularity, 'REFINE': refine, 'MODEL_CACHE': use_model_cache,
+              'MAX_CONSECUTIVE': max_consecutive, 'IDLE_GAP_WEIGHT': 1 if minimize_gaps else 0,
+              'BUILD_PROCESSES': build_processes, 'LAB_MIN_GAP_DAYS': lab_gap[0],
+              'LAB_MAX_GAP_DAYS': lab_gap[1] if lab_gap[1] < 4 else None, 'SPLIT_LEC_DIFFERENT_DAYS': split_lec_days,
+              'GREEDY_DRAFT': greedy_draft}
+
+    b_run, b_est = st.columns([1, 3])
+    with b_est:
+        if st.button("📐 Estimate Model Size"):
+            if data_sources: render_model_estimate(load_data(data_sources), config)
+            else: st.error("Please upload data first.")
+
+    if b_run.button("🚀 Generate Schedule", type="primary"):
+        if data_sources:
+            data_store = load_data(data_sources)
+            st.session_state['run_mode'] = mode
+            st.session_state['run_rooms'] = data_store.get('df_room')
+            st.session_state['run_data'] = data_store   # ใช้ตอนแก้ตารางด้วยมือ (re-optimize รอบ ๆ จุดที่ย้าย)
+            st.session_state['run_config'] = dict(config)
+            if use_queue:
+                job_id = job_queue.submit_job(data_store, config)
+                st.session_state['job_id'] = job_id
+                st.session_state.setdefault('job_fingerprints', {})[job_id] = run_history.input_fingerprint(data_store, config)
+                st.query_params['job'] = job_id   # เก็บไว้ใน URL เผื่อ browser หลุด
+                st.info(f"📬 Job `{job_id}` submitted to the queue.")
+            else:
+                with st.spinner("🤖 AI is crunching the numbers..."):
+                    from scheduler_core import run_solver
+                    lns_history = []
+                    config['LNS_CALLBACK'] = lns_history.append
+                    config['PLAN_CALLBACK'] = lambda plan: st.session_state.update(run_plan=plan)
+                    config['DRAFT_CALLBACK'] = render_draft
+                    res_df, un_list = run_solver(data_store, config)
+                    st.session_state['lns_history'] = lns_history
+                    if st.session_state.get('run_plan'):
+                        st.caption(f"📐 Model plan: {st.session_state['run_plan']['reason']}")
+                    
+                    if res_df is not None and not res_df.empty:
+                        st.session_state['schedule'] = res_df
+                        st.session_state['unscheduled'] = un_list
+                        st.session_state['has_run'] = True
+                        for key in ['edit_undo', 'edit_affected']: st.session_state.pop(key, None)
+                        run_history.add_run(st.session_state['run_history'], res_df, un_list, run_history.input_fingerprint(data_store, config))
+                        st.success(f"✅ Success! Scheduled {len(res_df)} classes.")
+                        lock_issues = [u for u in un_list if 'fixed' in str(u.get('Reason', '')).lower()]
+                        if lock_issues:
+                            st.warning(f"📌 {len(lock_issues)} fixed placements could not be honoured (see Unscheduled Classes).")
+                    elif st.session_state.get('run_plan') and st.session_state['run_plan']['strategy'] is None:
+                        st.error(f"❌ {st.session_state['run_plan']['reason']}. Use a coarser grid, fewer courses or a larger memory budget.")
+                    else:
+                        st.error("❌ Failed to find a valid schedule. Try increasing time or relaxing constraints.")
         else:
             st.error("Please upload data first.")
 
+    render_departments(data_sources, config)
+
+    job_id = st.session_state.get('job_id') or st.query_params.get('job')
+    if job_id:
+        st.divider()
+        render_job_status(job_id)
+
 with tab3:
     if st.session_state.get('has_run', False) and st.session_state['schedule'] is not None:
         df = st.session_state['schedule']
@@ -557,6 +607,9 @@ with tab3:
         c1.metric("Total Classes", total)
         c2.metric("Scheduled", len(df))
         c3.metric("Unscheduled", len(un_list), delta_color="inverse")
+        render_metrics_dashboard(df)
+        render_run_diff()
+        render_manual_edit(df)
 
         st.divider()
 
@@ -585,6 +638,15 @@ with tab3:
         # ✅ เรียกใช้ฟังก์ชันแสดงผลใหม่
         render_schedule_component(df_filtered, f"{view_type}: {selected}")
         
+        # LNS Improvement Log
+        lns_history = st.session_state.get('lns_history', [])
+        if lns_history:
+            st.divider()
+            with st.expander(f"🔁 LNS Improvement ({len(lns_history)} iterations, +{sum(h['Gain'] for h in lns_history)} score)", expanded=False):
+                df_lns = pd.DataFrame(lns_history)
+                st.line_chart(df_lns.set_index('Iteration')['Score'])
+                st.dataframe(df_lns, width=1000)
+
         # Unscheduled Section
         if un_list:
             st.divider()
@@ -0,0 +1,25 @@
+# ==========================================
+# 🧪 pytest setup: รันจากโฟลเดอร์แอป (python -m pytest tests)
+# ==========================================
+import json
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+
+@pytest.fixture(scope='session')
+def budgets():
+    # SCHEDULER_UPDATE_BUDGETS=1 -> บันทึกค่าที่วัดได้ใหม่เป็น budget (หลังตั้งใจเปลี่ยนขนาดโมเดล)
+    with open(BUDGET_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    yield data
+    if os.environ.get('SCHEDULER_UPDATE_BUDGETS') == '1':
+        with open(BUDGET_FILE, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
@@ -0,0 +1,197 @@
+# ==========================================
+# 🧪 Test Instances & Schedule Invariants
+# ==========================================
+# ข้อมูลทดสอบ: CSV ที่มากับ repo + ข้อมูลสุ่มแบบกำหนด seed (ขนาดปรับได้ มี fixed lock / กลุ่ม / เวลาไม่ว่าง)
+# schedule_violations ตรวจผลลัพธ์จาก run_solver โดยไม่พึ่งโมเดล -> ใช้ได้กับทุก strategy
+import os
+import random
+
+import pandas as pd
+
+from calendar_parser import DAYS
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUNDLED_FILES = {
+    'df_room': 'room.csv', 'all_teacher': 'all_teachers.csv', 'df_teacher_courses': 'teacher_courses.csv',
+    'df_ai_in': 'ai_in_courses.csv', 'df_cy_in': 'cy_in_courses.csv',
+    'df_ai_out': 'ai_out_courses.csv', 'df_cy_out': 'cy_out_courses.csv',
+}
+
+def load_bundled():
+    # ไฟล์ตามที่มากับ repo (ai_in_courses.csv มี CP413203 sec 1 ซ้ำสองแถว -> prepare_problem แจ้งใน duplicate_rows)
+    return {k: pd.read_csv(os.path.join(APP_DIR, f)) for k, f in BUNDLED_FILES.items()}
+
+# ==========================================
+# 🎲 Generated Instances
+# ==========================================
+LOCK_STARTS = ['09:00', '13:00']
+
+def generate_instance(seed=0, n_courses=20, n_rooms=8, n_teachers=10, n_locked=4, n_groups=2):
+    # คืนค่า data dict รูปแบบเดียวกับที่ run_solver รับ
+    rng = random.Random(seed)
+    n_labs = max(1, n_rooms // 3)
+    rooms = [{'room': f"L{i:02d}", 'capacity': rng.choice([40, 50, 60]), 'type': 'lab', 'building': 'GEN'} for i in range(n_labs)]
+    rooms += [{'room': f"R{i:02d}", 'capacity': rng.choice([60, 90, 120]), 'type': 'lecture', 'building': 'GEN'}
+              for i in range(n_rooms - n_labs)]
+    lecture_rooms = [r['room'] for r in rooms if r['type'] == 'lecture']
+
+    teachers = [f"T{i:02d}" for i in range(n_teachers)]
+    all_teachers = []
+    for tea in teachers:
+        day = rng.choice(DAYS)
+        busy = rng.choice(['[]', f"{day} 09:00-12:00", f"{day}", "Daily 08:30-09:00"])
+        all_teachers.append({'teacher_id': tea, 'unavailable_times': busy, 'max_hours_per_day': rng.choice([0, 0, 6])})
+
+    courses, teacher_courses = [], []
+    for i in range(n_courses):
+        code = f"GEN{i:03d}"
+        lab = rng.choice([0, 2, 3])
+        for sec in range(1, rng.choice([1, 2, 2, 3]) + 1):
+            courses.append({'course_code': code, 'course_name': code, 'credit': 3, 'lecture_hour': rng.choice([2, 3]),
+                            'lab_hour': lab, 'section': sec, 'enrollment_count': rng.randint(20, 40 if lab else 80),
+                            'optional': rng.choice([0, 0, 1]), 'require_lab_ai': 0, 'require_lab_network': 0,
+                            'lec_online': 0, 'lab_online': 0})
+        for tea in rng.sample(teachers, rng.choice([1, 1, 2])):
+            teacher_courses.append({'teacher_id': tea, 'course_code': code})
+
+    # fixed locks: วิชาบรรยายอย่างเดียว ครูของตัวเอง ตำแหน่งไม่ทับกัน (ห้อง x วัน x ช่วงเช้า/บ่าย)
+    locked = []
+    for j in range(min(n_locked, len(lecture_rooms) * len(DAYS) * len(LOCK_STARTS))):
+        code = f"FIX{j:03d}"
+        row = {'course_code': code, 'course_name': code, 'credit': 3, 'lecture_hour': 3, 'lab_hour': 0, 'section': 1,
+               'enrollment_count': 30, 'optional': 0, 'require_lab_ai': 0, 'require_lab_network': 0,
+               'lec_online': 0, 'lab_online': 0}
+        courses.append(row)
+        teacher_courses.append({'teacher_id': f"F{j:02d}", 'course_code': code})
+        all_teachers.append({'teacher_id': f"F{j:02d}", 'unavailable_times': '[]', 'max_hours_per_day': 0})
+        locked.append(dict(row, day=DAYS[j % len(DAYS)], start=LOCK_STARTS[(j // len(DAYS)) % len(LOCK_STARTS)],
+                           room=lecture_rooms[j // (len(DAYS) * len(LOCK_STARTS))]))
+
+    # กลุ่มนักศึกษา: แต่ละกลุ่มเรียนบางวิชา (ไม่รวมวิชาที่ fix)
+    codes = sorted({c['course_code'] for c in courses if c['course_code'].startswith('GEN')})
+    groups = [{'group': f"Y{g + 1}", 'course_code': c, 'section': ''}
+              for g in range(n_groups) for c in rng.sample(codes, min(len(codes), 4))]
+
+    return {
+        'df_room': pd.DataFrame(rooms), 'all_teacher': pd.DataFrame(all_teachers),
+        'df_teacher_courses': pd.DataFrame(teacher_courses), 'df_ai_in': pd.DataFrame(courses),
+        'df_cy_in': pd.DataFrame(), 'df_ai_out': pd.DataFrame(locked), 'df_cy_out': pd.DataFrame(),
+        'df_groups': pd.DataFrame(groups, columns=['group', 'course_code', 'section']),
+    }
+
+# ==========================================
+# ✅ Invariants
+# ==========================================
+def all_tasks(problem):
+    # task ที่ค้นหา + task ที่ล็อกไว้ (reserve_fixed_tasks แยกออกจาก problem['tasks'])
+    return problem['tasks'] + problem.get('locked_tasks', [])
+
+def _placements(problem, df):
+    # (Course, Sec, Type) -> [(room, day, start, day_idx, slot, dur)] และ task ของแต่ละ key
+    slot_of = {info['val']: s for s, info in problem['slot_map'].items()}
+    placed = {}
+    for row in df.itertuples(index=False):
+        placed.setdefault((row.Course, row.Sec, row.Type), []).append(
+            (row.Room, row.Day, row.Start, DAYS.index(row.Day), slot_of[row.StartVal], row.Duration))
+    return placed
+
+def resource_violations(problem, df):
+    # ห้อง / ครู / กลุ่ม ห้ามซ้อนกัน และครูต้องว่างในช่วงที่สอน
+    violations = []
+    task_of = {(t['id'], t['sec'], t['type']): t for t in all_tasks(problem)}
+    cells = {'room': {}, 'teacher': {}, 'group': {}}
+    for key, spots in _placements(problem, df).items():
+        t = task_of[key]
+        for room, day, start, d, s, dur in spots:
+            label = f"{key[0]} S{key[1]} {key[2]} {day} {start}"
+            for k in range(dur):
+                if room != 'Online':
+                    cells['room'].setdefault((room, d, s + k), []).append(label)
+                for tea in t['teachers']:
+                    if tea == 'Unknown': continue
+                    cells['teacher'].setdefault((tea, d, s + k), []).append(label)
+                    if s + k in problem['teacher_unavailable'].get(tea, {}).get(d, set()):
+                        violations.append(f"teacher {tea} unavailable: {label}")
+                for g in t.get('groups', ()):
+                    cells['group'].setdefault((g, d, s + k), []).append(label)
+    for kind, index in cells.items():
+        for (name, d, s), labels in index.items():
+            if len(labels) > 1:
+                violations.append(f"{kind} overlap {name} {DAYS[d]} slot {s}: {labels}")
+    return violations
+
+def lock_violations(problem, df):
+    # task ที่มี fixed lock ต้องถูกวาง และอยู่ตรงห้อง/วัน/เวลาที่ล็อก
+    violations = []
+    placed = _placements(problem, df)
+    for t in all_tasks(problem):
+        lock = t.get('fixed')
+        if not lock: continue
+        key = (t['id'], t['sec'], t['type'])
+        if key not in placed:
+            violations.append(f"locked task not scheduled: {key}")
+        for room, day, start, _, _, _ in placed.get(key, []):
+            if (room, day, start) != (lock['room'], lock['day'], lock['start']):
+                violations.append(f"lock not honoured {key}: got {room} {day} {start}, want {lock}")
+    return violations
+
+def precedence_violations(problem, df, config=None):
+    # กฎของ section บนเวลาต่อเนื่องทั้งสัปดาห์ (ดู add_section_rules)
+    #   Lab เริ่มหลัง Lec ทุกคาบจบ, LAB_MIN/MAX_GAP_DAYS, SPLIT_LEC_DIFFERENT_DAYS
+    config = config or {}
+    total = problem['total_slots']
+    violations = []
+    placed = _placements(problem, df)
+    for (course, sec, typ), spots in placed.items():
+        if typ != 'Lab' or (course, sec, 'Lec') not in placed: continue
+        lecs = placed[(course, sec, 'Lec')]
+        lec_end = max(d * total + s + dur for _, _, _, d, s, dur in lecs)
+        lab_start = min(d * total + s for _, _, _, d, s, _ in spots)
+        if not config.get('LAB_MIN_GAP_DAYS') and lab_start < lec_end:
+            violations.append(f"lab before lecture: {course} S{sec}")
+        gaps = [lab_d - lec_d for _, _, _, lab_d, _, _ in spots for _, _, _, lec_d, _, _ in lecs]
+        if min(gaps) < config.get('LAB_MIN_GAP_DAYS', 0):
+            violations.append(f"lab too close to lecture: {course} S{sec}")
+        if config.get('LAB_MAX_GAP_DAYS') is not None and max(gaps) > config['LAB_MAX_GAP_DAYS']:
+            violations.append(f"lab too far from lecture: {course} S{sec}")
+    if config.get('SPLIT_LEC_DIFFERENT_DAYS'):
+        for (course, sec, typ), spots in placed.items():
+            days = [d for _, _, _, d, _, _ in spots]
+            if typ == 'Lec' and len(set(days)) < len(days):
+                violations.append(f"split lecture parts on the same day: {course} S{sec}")
+    return violations
+
+def workload_violations(problem, df, config=None):
+    # ภาระต่อ (ครู, วัน) นับรวม task ที่ล็อกไว้ (ดู add_teacher_workload)
+    #   max_hours_per_day และ MAX_CONSECUTIVE ผิดได้เฉพาะเมื่อมี task ที่ solver วางเองเป็นส่วนที่เกิน
+    config = config or {}
+    max_run = int(config.get('MAX_CONSECUTIVE', 0) * 2)
+    task_of = {(t['id'], t['sec'], t['type']): t for t in all_tasks(problem)}
+    busy, fixed = {}, {}
+    for key, spots in _placements(problem, df).items():
+        t = task_of[key]
+        for _, day, _, d, s, dur in spots:
+            for tea in t['teachers']:
+                if tea == 'Unknown': continue
+                busy.setdefault((tea, d), set()).update(range(s, s + dur))
+                if t.get('fixed'): fixed.setdefault((tea, d), set()).update(range(s, s + dur))
+    violations = []
+    for (tea, d), slots in busy.items():
+        locked = fixed.get((tea, d), set())
+        limit = problem['teacher_max_slots'].get(tea)
+        if limit and len(slots) > max(limit, len(locked)):
+            violations.append(f"teacher {tea} over max hours on {DAYS[d]}: {len(slots) / 2}h")
+        if not max_run: continue
+        for w in range(problem['total_slots'] - max_run):
+            cells = set(range(w, w + max_run + 1))
+            if cells <= slots and not cells <= locked:
+                violations.append(f"teacher {tea} teaches more than {max_run / 2}h in a row on {DAYS[d]}")
+                break
+    return violations
+
+def schedule_violations(problem, df):
+    # รวมทุก invariant (ว่าง = ผ่าน)
+    if df is None or df.empty:
+        return []
+    return resource_violations(problem, df) + lock_violations(problem, df) + precedence_violations(problem, df)
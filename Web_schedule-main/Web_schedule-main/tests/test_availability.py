@@ -0,0 +1,57 @@
+# ==========================================
+# 🗓️ Availability engine (bitmask calendars)
+# ==========================================
+import pytest
+
+import availability
+from availability import build_availability, free_starts, iter_bits, slots_to_mask
+
+def brute_free_starts(busy, dur, total_slots):
+    # นิยามตรง ๆ: เริ่มที่ s ได้เมื่อ [s, s+dur) อยู่ในวันและไม่มี slot ไหนไม่ว่าง
+    return {s for s in range(total_slots - dur + 1) if not busy.intersection(range(s, s + dur))}
+
+@pytest.mark.parametrize('busy', [set(), {0}, {7, 8}, {3, 10, 11, 20}, set(range(21))])
+@pytest.mark.parametrize('dur', [1, 2, 3, 6])
+def test_free_starts_matches_definition(busy, dur):
+    assert set(iter_bits(free_starts(slots_to_mask(busy), dur, 21))) == brute_free_starts(busy, dur, 21)
+
+def test_free_starts_longer_than_day():
+    assert free_starts(0, 22, 21) == 0
+    assert set(iter_bits(free_starts(0, 21, 21))) == {0}
+
+def test_reserve_release_round_trip():
+    engine = build_availability(5, 21, teacher={'T1': {0: {8}}})
+    assert availability.busy_mask(engine, 'teacher', 'T1', 0) == 1 << 8
+    assert availability.busy_mask(engine, 'teacher', 'T2', 0) == 0
+
+    # ช่วงที่ทับ slot ไม่ว่างจองไม่ได้ และ engine ต้องไม่เปลี่ยน
+    assert not availability.reserve(engine, 'teacher', 'T1', 0, 6, 3)
+    assert availability.busy_mask(engine, 'teacher', 'T1', 0) == 1 << 8
+
+    # ทรัพยากร/ชนิดที่ยังไม่มีใน engine จองได้เลย
+    assert availability.reserve(engine, 'teacher', 'T1', 0, 2, 3)
+    assert availability.reserve(engine, 'room', 'R1', 4, 0, 2)
+    assert set(iter_bits(availability.busy_mask(engine, 'teacher', 'T1', 0))) == {2, 3, 4, 8}
+    assert 2 not in set(iter_bits(availability.resource_free_starts(engine, 'teacher', 'T1', 0, 1)))
+    assert not availability.reserve(engine, 'teacher', 'T1', 0, 4, 1)
+
+    availability.release(engine, 'teacher', 'T1', 0, 2, 3)
+    assert availability.busy_mask(engine, 'teacher', 'T1', 0) == 1 << 8
+    assert availability.reserve(engine, 'teacher', 'T1', 0, 4, 1)
+
+def test_block_ignores_existing_reservations():
+    engine = build_availability(5, 21, room={'R1': {1: {5}}})
+    availability.block(engine, 'room', 'R1', 1, 4, 3)
+    assert set(iter_bits(availability.busy_mask(engine, 'room', 'R1', 1))) == {4, 5, 6}
+
+def test_release_keeps_unavailable_slots():
+    engine = build_availability(5, 21, teacher={'T1': {0: {8}}})
+    availability.block(engine, 'teacher', 'T1', 0, 10, 2)
+    assert availability.reserve(engine, 'room', 'R1', 0, 4, 3)
+    availability.block(engine, 'room', 'R1', 0, 6, 2)
+
+    # ปล่อยช่วงที่ครอบ slot ไม่ว่างจริง -> slot เหล่านั้นต้องยังไม่ว่าง
+    availability.release(engine, 'teacher', 'T1', 0, 7, 5)
+    assert set(iter_bits(availability.busy_mask(engine, 'teacher', 'T1', 0))) == {8, 10, 11}
+    availability.release(engine, 'room', 'R1', 0, 4, 3)
+    assert set(iter_bits(availability.busy_mask(engine, 'room', 'R1', 0))) == {6, 7}
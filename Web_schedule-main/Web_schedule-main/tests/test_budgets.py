@@ -0,0 +1,74 @@
+# ==========================================
+# 📏 Model-size / build-time / solve-time budgets
+# ==========================================
+# ค่าอ้างอิงอยู่ใน budgets.json ล้มเมื่อจำนวนตัวแปร/constraint โตเกิน SIZE_TOLERANCE
+# หรือเวลาเกิน budget x TIME_FACTOR (+TIME_SLACK) (เครื่องช้ากว่าให้ตั้ง SCHEDULER_TIME_FACTOR สูงขึ้น)
+# โมเดลเล็กลงหรือเร็วขึ้นผ่านเสมอ -> อัปเดตค่าด้วย SCHEDULER_UPDATE_BUDGETS=1 python -m pytest tests
+import functools
+import os
+import time
+
+import pytest
+from ortools.sat.python import cp_model
+
+from instances import generate_instance, load_bundled
+from scheduler_core import build_model, prepare_problem
+
+SIZE_TOLERANCE = 0.05
+TIME_FACTOR = float(os.environ.get('SCHEDULER_TIME_FACTOR', 2.0))
+TIME_SLACK = 0.5   # วินาที กันค่าเล็ก ๆ แกว่งจาก noise ของเครื่อง
+UPDATE = os.environ.get('SCHEDULER_UPDATE_BUDGETS') == '1'
+
+BUILD_CASES = {
+    'bundled_mode1': (load_bundled, 1),
+    'bundled_mode2': (load_bundled, 2),
+    'generated_mode1': (functools.partial(generate_instance, seed=1), 1),
+    'generated_large_mode1': (functools.partial(generate_instance, seed=2, n_courses=60, n_rooms=20, n_teachers=25, n_locked=12), 1),
+}
+SOLVE_CASES = {
+    'generated_mode1': (functools.partial(generate_instance, seed=1), 1),
+}
+
+def check_budget(budgets, section, name, measured):
+    # measured: {metric: value} -> เทียบกับ budgets[section][name]
+    if UPDATE:
+        budgets.setdefault(section, {})[name] = measured
+        return
+    budget = budgets.get(section, {}).get(name)
+    assert budget is not None, f"no budget for {section}/{name}; run with SCHEDULER_UPDATE_BUDGETS=1"
+    for metric, value in measured.items():
+        if metric.endswith('_seconds'):
+            limit = budget[metric] * TIME_FACTOR + TIME_SLACK
+        else:
+            limit = budget[metric] * (1 + SIZE_TOLERANCE)
+        assert value <= limit, f"{section}/{name}: {metric} = {value} exceeds budget {budget[metric]} (limit {limit:g})"
+
+@pytest.mark.parametrize('name', list(BUILD_CASES))
+def test_model_build_budget(budgets, name):
+    load, mode = BUILD_CASES[name]
+    problem = prepare_problem(load())
+    start = time.perf_counter()
+    bundle = build_model(problem, {'MODE': mode})
+    elapsed = time.perf_counter() - start
+    proto = bundle['model'].Proto()
+    check_budget(budgets, 'build', name, {
+        'variables': len(proto.variables), 'constraints': len(proto.constraints),
+        'build_seconds': round(elapsed, 3),
+    })
+
+@pytest.mark.parametrize('name', list(SOLVE_CASES))
+def test_first_solution_budget(budgets, name):
+    # เวลาจนได้คำตอบแรกของโมเดลเต็ม (single worker เพื่อให้ผลคงที่)
+    load, mode = SOLVE_CASES[name]
+    problem = prepare_problem(load())
+    bundle = build_model(problem, {'MODE': mode})
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    solver.parameters.random_seed = 0
+    solver.parameters.stop_after_first_solution = True
+    solver.parameters.max_time_in_seconds = 60
+    start = time.perf_counter()
+    status = solver.Solve(bundle['model'])
+    elapsed = time.perf_counter() - start
+    assert status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    check_budget(budgets, 'first_solution', name, {'first_solution_seconds': round(elapsed, 3)})
@@ -0,0 +1,64 @@
+# ==========================================
+# 🗓️ unavailable_times parser
+# ==========================================
+import pytest
+
+from calendar_parser import parse_unavailable_time, time_to_slot_index
+from scheduler_core import build_slot_map
+
+SLOT_MAP = build_slot_map()
+ALL = set(range(len(SLOT_MAP)))
+
+def slots(start, end):
+    return set(range(time_to_slot_index(start, SLOT_MAP), time_to_slot_index(end, SLOT_MAP)))
+
+def busy(text):
+    return {d: s for d, s in parse_unavailable_time(text, SLOT_MAP).items() if s}
+
+@pytest.mark.parametrize('text, expected', [
+    ('Mon 09:00-12:00', {0: slots('09:00', '12:00')}),
+    ('mon 9.00 - 12.00', {0: slots('09:00', '12:00')}),
+    ('Mon 09:00-10:00, 13:00-15:00', {0: slots('09:00', '10:00') | slots('13:00', '15:00')}),
+    ('Mon 09:00-10:00; Wed 13:00-16:00', {0: slots('09:00', '10:00'), 2: slots('13:00', '16:00')}),
+    ('Mon 09:00-10:00, Wed 13:00-16:00', {0: slots('09:00', '10:00'), 2: slots('13:00', '16:00')}),
+    ('Mon 09:00-10:00\nTue 13:00-14:00', {0: slots('09:00', '10:00'), 1: slots('13:00', '14:00')}),
+])
+def test_ranges(text, expected):
+    assert busy(text) == expected
+
+@pytest.mark.parametrize('sep', [' and ', ' & ', ' / ', ' AND '])
+def test_and_separates_days(sep):
+    assert busy(f"Mon 9:00-10:00{sep}Tue 13:00-14:00") == {0: slots('09:00', '10:00'), 1: slots('13:00', '14:00')}
+
+@pytest.mark.parametrize('text, days', [
+    ('Mon-Fri 12:00-13:00', {0, 1, 2, 3, 4}),
+    ('Tue to Thu 12:00-13:00', {1, 2, 3}),
+    ('Mon,Wed 12:00-13:00', {0, 2}),
+    ('Mon/Thu 12:00-13:00', {0, 3}),
+    ('Monday and Friday 12:00-13:00', {0, 4}),
+    ('Thu-Sun 12:00-13:00', {3, 4}),
+    ('Daily 12:00-13:00', {0, 1, 2, 3, 4}),
+    ('Weekdays 12:00-13:00', {0, 1, 2, 3, 4}),
+    ('every day 12:00-13:00', {0, 1, 2, 3, 4}),
+])
+def test_day_lists(text, days):
+    assert busy(text) == {d: slots('12:00', '13:00') for d in days}
+
+def test_whole_day():
+    assert busy('Fri') == {4: ALL}
+    assert busy('Fri all day; Mon 09:00-10:00') == {4: ALL, 0: slots('09:00', '10:00')}
+
+def test_partial_slots_round_outward():
+    # 09:15-10:10 ทับ slot 09:00 และ 10:00 บางส่วน -> ไม่ว่างทั้งสอง slot
+    assert busy('Tue 09:15-10:10') == {1: slots('09:00', '10:30')}
+    # เลยเวลาสุดท้ายของวัน -> ถึง slot สุดท้าย
+    assert busy('Tue 18:00-20:00') == {1: set(range(time_to_slot_index('18:00', SLOT_MAP), len(SLOT_MAP)))}
+
+def test_legacy_list_format():
+    expected = {0: slots('09:00', '12:00'), 1: slots('13:00', '14:00')}
+    assert busy("['Mon 09:00-12:00', 'Tue 13:00-14:00']") == expected
+    assert busy(['Mon 09:00-12:00', 'Tue 13:00-14:00']) == expected
+
+@pytest.mark.parametrize('text', [None, float('nan'), '', '[]', 'Mon 12:00-09:00'])
+def test_empty_or_invalid(text):
+    assert busy(text) == {}
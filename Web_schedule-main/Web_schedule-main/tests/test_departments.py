@@ -0,0 +1,104 @@
+# ==========================================
+# 🏛️ Multi-department scheduling & room ledger
+# ==========================================
+import availability
+import room_ledger
+from departments import drop_conflicts, result_bookings, solve_departments, split_bundled_departments, with_bookings
+from instances import generate_instance, load_bundled, resource_violations
+from scheduler_core import DAYS, build_slot_map, locked_teacher_slots, prepare_problem, run_solver
+
+def test_ledger_rejects_clashes_and_stale_versions(tmp_path):
+    db = str(tmp_path / 'ledger.db')
+    version, booked = room_ledger.snapshot('AI', db)
+    assert (version, booked) == (0, [])
+    assert room_ledger.commit('AI', version, [('room', 'R1', 0, 1, 'A S1 Lec'), ('room', 'R1', 0, 2, 'A S1 Lec')], db) == (True, [])
+
+    # ภาคอื่นจองช่องเดียวกัน -> ไม่ผ่าน และการจองเดิมของภาคนั้นไม่ถูกแตะ
+    ok, conflicts = room_ledger.commit('CY', 0, [('room', 'R1', 0, 2, 'C S1 Lec'), ('teacher', 'T1', 0, 2, 'C S1 Lec')], db)
+    assert not ok and conflicts == [('room', 'R1', 0, 2, 'AI')]
+    assert set(room_ledger.list_bookings(db)['department']) == {'AI'}
+
+    # version เก่า (มีการ commit ของภาคเดียวกันแทรกเข้ามา) -> ไม่ผ่าน
+    ok, _ = room_ledger.commit('AI', version, [('room', 'R2', 1, 1, 'A S1 Lec')], db)
+    assert not ok
+    version, booked = room_ledger.snapshot('CY', db)
+    assert sorted(booked) == [('room', 'R1', 0, 1), ('room', 'R1', 0, 2)]
+    assert room_ledger.commit('CY', version, [('room', 'R1', 0, 3, 'C S1 Lec')], db) == (True, [])
+
+def test_bookings_become_unavailable_slots():
+    slot_map = build_slot_map()
+    data = split_bundled_departments(load_bundled())['CY']
+    room = str(data['df_room']['room'].iloc[0])
+    booked = [('room', room, 0, 1), ('room', room, 0, 2), ('room', room, 2, 9), ('teacher', 'NEW_T', 4, 20)]
+    problem = prepare_problem(with_bookings(data, booked, slot_map))
+    assert problem['room_unavailable'][room][0] == {1, 2}
+    assert problem['room_unavailable'][room][2] == {9}
+    assert problem['teacher_booked']['NEW_T'][4] == {20}
+    assert availability.busy_mask(problem['availability'], 'teacher', 'NEW_T', 4) == 1 << 20
+
+def test_teacher_bookings_count_as_daily_load():
+    # ครูสอนภาคอื่นครบ max_hours_per_day ทุกวันแล้ว -> วางคาบของภาคนี้ไม่ได้เลย แม้ช่วงเวลาอื่นจะว่าง
+    data = generate_instance(seed=1, n_courses=8)
+    tea = data['df_teacher_courses']['teacher_id'].iloc[0]
+    data['all_teacher']['max_hours_per_day'] = data['all_teacher']['max_hours_per_day'].where(
+        data['all_teacher']['teacher_id'] != tea, 3)
+    booked = [('teacher', tea, d, s) for d in range(len(DAYS)) for s in range(13, 19)]
+    problem = prepare_problem(with_bookings(data, booked, build_slot_map()))
+    assert locked_teacher_slots(problem)[(tea, 2)] == [(13, 6)]
+
+    config = {'MODE': 2, 'TIMEOUT': 5, 'WORKERS': 1, 'STRATEGY': 'full', 'MODEL_CACHE': False}
+    df, _ = run_solver(with_bookings(data, booked, build_slot_map()), config)
+    assert not df['Teachers'].str.contains(tea).any()
+    df, _ = run_solver(data, config)
+    assert df['Teachers'].str.contains(tea).any()
+
+def test_departments_share_rooms_and_teachers(tmp_path):
+    db = str(tmp_path / 'ledger.db')
+    departments = split_bundled_departments(load_bundled())
+    config = {'MODE': 2, 'TIMEOUT': 5, 'WORKERS': 2, 'STRATEGY': 'full', 'MODEL_CACHE': False,
+              'DEPARTMENT_PROCESSES': 2}
+    df, unscheduled, log = solve_departments(departments, config, db)
+
+    assert set(df['Department']) == {'AI', 'CY'}
+    assert not [u for u in unscheduled if u['Reason'] == 'Room ledger conflict']
+    # ภาคที่ถูก solve ใหม่ต้องเป็นภาคที่ชนในรอบก่อนเท่านั้น
+    for entry in log:
+        if entry['Round'] > 1:
+            assert any(e['Department'] == entry['Department'] and not e['Committed'] for e in log if e['Round'] == entry['Round'] - 1)
+    # ผลรวมทุกภาคต้องไม่มีห้อง/ครูซ้อนกัน (ตรวจกับ problem ของข้อมูลรวม)
+    assert resource_violations(prepare_problem(load_bundled()), df.drop(columns='Department')) == []
+
+    ledger = room_ledger.list_bookings(db)
+    slot_map = build_slot_map()
+    for name in departments:
+        mine = ledger[ledger['department'] == name]
+        expected = result_bookings(df[df['Department'] == name], slot_map)
+        assert len(mine) == len(expected)
+
+def test_final_round_conflict_keeps_the_rest_of_the_schedule(tmp_path, monkeypatch):
+    # อีก session จองทุกห้องวันจันทร์ไว้ แต่ snapshot ไม่เห็น (commit แทรกระหว่าง solve) -> ชนทุกรอบ
+    db = str(tmp_path / 'ledger.db')
+    data = split_bundled_departments(load_bundled())['CY']
+    rooms = data['df_room']['room'].astype(str).str.strip()
+    other = [('room', r, 0, s, 'X S1 Lec') for r in rooms for s in range(len(build_slot_map()))]
+    assert room_ledger.commit('OTHER', 0, other, db) == (True, [])
+    real_snapshot = room_ledger.snapshot
+    monkeypatch.setattr(room_ledger, 'snapshot', lambda name, db_path=None: (real_snapshot(name, db_path)[0], []))
+
+    config = {'MODE': 2, 'TIMEOUT': 5, 'WORKERS': 1, 'STRATEGY': 'full', 'MODEL_CACHE': False, 'LEDGER_MAX_ROUNDS': 1}
+    df, unscheduled, log = solve_departments({'CY': data}, config, db)
+
+    assert not log[0]['Committed'] and not df.empty
+    dropped = [u for u in unscheduled if u['Reason'] == 'Room ledger conflict']
+    assert dropped and len(df) + len(dropped) == log[0]['Classes']
+    assert not ((df['Day'] == 'Mon') & df['Room'].isin(set(rooms))).any()
+    ledger = room_ledger.list_bookings(db)
+    assert len(ledger[ledger['department'] == 'CY']) == len(result_bookings(df, build_slot_map()))
+
+def test_drop_conflicts_of_nothing_commits_everything(tmp_path):
+    db = str(tmp_path / 'ledger.db')
+    res = {'department': 'AI', 'committed': False, 'unscheduled': [], 'conflicts': [], 'seconds': 0,
+           'schedule': run_solver(split_bundled_departments(load_bundled())['AI'],
+                                  {'MODE': 2, 'TIMEOUT': 3, 'WORKERS': 1, 'STRATEGY': 'full', 'MODEL_CACHE': False})[0]}
+    out = drop_conflicts('AI', res, db)
+    assert out['committed'] and len(out['schedule']) == len(res['schedule']) and out['unscheduled'] == []
@@ -0,0 +1,68 @@
+# ==========================================
+# 📐 Model-size estimator & strategy selection
+# ==========================================
+import functools
+
+import pytest
+
+import scheduler_core
+from instances import generate_instance, load_bundled
+from model_estimate import choose_strategy, estimate_compaction, estimate_model
+from scheduler_core import build_model, plan_strategy, prepare_problem, run_solver
+
+CASES = {
+    'bundled_mode2': (load_bundled, 2),
+    'generated_large_mode1': (functools.partial(generate_instance, seed=2, n_courses=60, n_rooms=20, n_teachers=25, n_locked=12), 1),
+}
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_estimate_matches_built_model(name):
+    load, mode = CASES[name]
+    problem = prepare_problem(load())
+    config = {'MODE': mode}
+    est = estimate_model(problem, config)
+    proto = build_model(problem, config)['model'].Proto()
+    assert est['variables'] == len(proto.variables)
+    assert abs(est['constraints'] - len(proto.constraints)) <= 0.02 * len(proto.constraints)
+
+def test_small_budget_picks_smaller_model():
+    problem = prepare_problem(load_bundled())
+    config = {'MODE': 2, 'TIMEOUT': 600, 'WORKERS': 1}
+    roomy = choose_strategy(problem, config, memory_budget=4096)
+    assert roomy['strategy'] == 'full'
+    full_mb = roomy['estimates']['full']['memory_mb']
+    tight = choose_strategy(problem, config, memory_budget=full_mb / 2)
+    assert tight['strategy'] in ('two_phase', 'decompose')
+    chosen = tight['estimates'][tight['strategy']]
+    assert chosen['memory_mb'] <= full_mb / 2
+
+def test_model_too_large_is_reported():
+    res_df, un_list = run_solver(generate_instance(seed=1), {'MODE': 1, 'TIMEOUT': 5, 'WORKERS': 1, 'STRATEGY': 'auto',
+                                                              'MEMORY_BUDGET_MB': 0.01, 'MODEL_CACHE': False})
+    assert res_df.empty
+    assert un_list and un_list[0]['Reason'].startswith('Model too large')
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_compaction_estimate_matches_teacher_subset(name):
+    # โมเดลย่อยของ compact_teacher_days: task ของครูที่ใหญ่ที่สุดค้นหาได้เต็ม, task อื่นตรึงไว้ตำแหน่งเดียว
+    load, mode = CASES[name]
+    problem = prepare_problem(load())
+    config = {'MODE': mode}
+    est = estimate_compaction(problem, config)
+    teachers = {tea for t in problem['tasks'] for tea in t['teachers'] if tea != 'Unknown'}
+    sizes = {tea: estimate_model(dict(problem, tasks=[t for t in problem['tasks'] if tea in t['teachers']]), config)
+             for tea in teachers}
+    tea = max(sizes, key=lambda k: sizes[k]['candidates'])
+    pinned = {t['uid']: ('Online', 0, 0) for t in problem['tasks'] if tea not in t['teachers']}
+    proto = build_model(problem, config, pinned=pinned)['model'].Proto()
+    assert est['variables'] == len(proto.variables)
+    assert est['variables'] < estimate_model(problem, config)['variables']
+
+def test_compaction_skipped_when_subset_too_large(monkeypatch):
+    problem = prepare_problem(load_bundled())
+    config = {'MODE': 2, 'TIMEOUT': 600, 'WORKERS': 1, 'STRATEGY': 'decompose', 'IDLE_GAP_WEIGHT': 1}
+    plan = plan_strategy(problem, config)
+    assert 'compaction' in plan['estimates'] and 'IDLE_GAP_WEIGHT' not in plan['config']
+    monkeypatch.setattr(scheduler_core, 'COMPACT_ITER_TIME', 0)
+    plan = plan_strategy(problem, config)
+    assert plan['config']['IDLE_GAP_WEIGHT'] == 0 and 'compaction skipped' in plan['reason']
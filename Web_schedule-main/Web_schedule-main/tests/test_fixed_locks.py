@@ -0,0 +1,34 @@
+# ==========================================
+# 📌 Fixed-placement pre-pass
+# ==========================================
+import pandas as pd
+
+from instances import generate_instance
+from scheduler_core import build_model, prepare_problem
+
+def test_locked_tasks_leave_the_model():
+    problem = prepare_problem(generate_instance(seed=1))
+    assert problem['locked'] and not problem['lock_conflicts']
+    assert not any(t.get('fixed') for t in problem['tasks'])
+    bundle = build_model(problem, {'MODE': 1})
+    assert not set(problem['locked']) & set(bundle['is_scheduled'])
+
+def test_locks_reserve_room_and_teacher():
+    problem = prepare_problem(generate_instance(seed=1))
+    engine = problem['availability']
+    for t in problem['locked_tasks']:
+        room, d, s = problem['locked'][t['uid']]
+        window = ((1 << t['dur']) - 1) << s
+        assert engine['room'][room][d] & window == window
+        for tea in t['teachers']:
+            assert engine['teacher'][tea][d] & window == window
+
+def test_conflicting_locks_are_reported():
+    data = generate_instance(seed=1)
+    # วิชาใหม่ล็อกห้อง/วัน/เวลาเดียวกับ lock แรก
+    clash = dict(data['df_ai_out'].iloc[0], course_code='FIXDUP')
+    data['df_ai_in'] = pd.concat([data['df_ai_in'], pd.DataFrame([clash]).drop(columns=['day', 'start', 'room'])], ignore_index=True)
+    data['df_ai_out'] = pd.concat([data['df_ai_out'], pd.DataFrame([clash])], ignore_index=True)
+    problem = prepare_problem(data)
+    assert [c['Course'] for c in problem['lock_conflicts']] == ['FIXDUP']
+    assert 'FIX000' in problem['lock_conflicts'][0]['Reason']
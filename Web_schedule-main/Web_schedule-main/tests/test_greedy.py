@@ -0,0 +1,69 @@
+# ==========================================
+# 🧱 Greedy draft
+# ==========================================
+import functools
+import time
+
+import pytest
+from ortools.sat.python import cp_model
+
+from greedy import greedy_schedule, hint_draft
+from instances import generate_instance, load_bundled, precedence_violations, schedule_violations
+from scheduler_core import DAYS, assignment_to_results, build_model, prepare_problem
+
+RULES = {'LAB_MIN_GAP_DAYS': 1, 'SPLIT_LEC_DIFFERENT_DAYS': True, 'MAX_CONSECUTIVE': 3}
+CASES = {
+    'bundled_mode2': (load_bundled, 2),
+    'generated_mode1': (functools.partial(generate_instance, seed=1), 1),
+}
+
+def max_consecutive_violations(problem, assignment, hours):
+    # ช่วงสอนติดกันของครูต่อวัน (รวม fixed lock) ต้องไม่เกิน hours
+    busy = {}
+    placed = dict(problem['locked'], **assignment)
+    for t in problem['tasks'] + problem['locked_tasks']:
+        if t['uid'] not in placed: continue
+        _, d, s = placed[t['uid']]
+        for tea in t['teachers']:
+            busy.setdefault((tea, d), set()).update(range(s, s + t['dur']))
+    violations = []
+    for (tea, d), slots in busy.items():
+        run = 0
+        for s in range(problem['total_slots']):
+            run = run + 1 if s in slots else 0
+            if run > hours * 2: violations.append(f"{tea} {DAYS[d]} slot {s}")
+    return violations
+
+@pytest.mark.parametrize('rules', [{}, RULES], ids=['default', 'rules'])
+@pytest.mark.parametrize('name', list(CASES))
+def test_draft_respects_hard_constraints(name, rules):
+    load, mode = CASES[name]
+    problem = prepare_problem(load())
+    config = dict(rules, MODE=mode)
+    draft = greedy_schedule(problem, config)
+    assert draft
+    df, _ = assignment_to_results(problem, draft)
+    assert schedule_violations(problem, df) + precedence_violations(problem, df, config) == []
+    assert max_consecutive_violations(problem, draft, config.get('MAX_CONSECUTIVE', 0) or 99) == []
+
+def test_draft_is_fast():
+    problem = prepare_problem(generate_instance(seed=3, n_courses=200, n_rooms=40, n_teachers=60, n_locked=20, n_groups=6))
+    start = time.perf_counter()
+    draft = greedy_schedule(problem, {'MODE': 2})
+    assert len(problem['tasks']) > 500 and draft
+    assert time.perf_counter() - start < 1.0
+
+@pytest.mark.parametrize('rules', [{}, RULES], ids=['default', 'rules'])
+def test_draft_hint_is_feasible_in_model(rules):
+    # ตรึงตัวแปรตาม hint แล้ว solve -> ต้อง feasible (greedy กับโมเดลใช้เงื่อนไขเดียวกัน)
+    problem = prepare_problem(generate_instance(seed=1))
+    config = dict(rules, MODE=1)
+    draft = greedy_schedule(problem, config)
+    bundle = build_model(problem, config)
+    hint_draft(bundle, problem, draft)
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    solver.parameters.fix_variables_to_their_hinted_value = True
+    solver.parameters.max_time_in_seconds = 30
+    assert solver.Solve(bundle['model']) in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    assert sum(solver.Value(v) for v in bundle['is_scheduled'].values()) == len(draft)
@@ -0,0 +1,80 @@
+# ==========================================
+# ✅ Feasibility invariants ของผลลัพธ์จาก run_solver (ทุก strategy)
+# ==========================================
+import functools
+
+import pytest
+
+from instances import (all_tasks, generate_instance, load_bundled, lock_violations, precedence_violations,
+                       resource_violations, workload_violations)
+from scheduler_core import prepare_problem, run_solver
+
+INSTANCES = {
+    'bundled': load_bundled,
+    'generated': functools.partial(generate_instance, seed=1),
+    'generated_small': functools.partial(generate_instance, seed=1, n_courses=8),
+}
+
+# (instance, mode, strategy, config เพิ่มเติม): โมเดลเต็มของ generated ใหญ่เกินเวลาทดสอบ จึงใช้ชุดเล็ก
+CASES = [
+    ('generated_small', 1, 'full', ()),
+    ('generated', 2, 'decompose', ()),
+    ('generated', 2, 'two_phase', ()),
+    ('bundled', 2, 'full', ()),
+    ('bundled', 2, 'decompose', ()),
+    ('bundled', 2, 'two_phase', ()),
+    # pass หลัง solve หลัก และกฎภาระงานของครู
+    ('generated_small', 2, 'full', (('LNS_TIME', 5),)),
+    ('generated', 2, 'decompose', (('GRANULARITY', 60), ('REFINE', True))),
+    ('generated_small', 2, 'full', (('IDLE_GAP_WEIGHT', 2),)),
+    ('generated_small', 2, 'full', (('MAX_CONSECUTIVE', 2),)),
+    ('bundled', 2, 'decompose', (('MAX_CONSECUTIVE', 3), ('IDLE_GAP_WEIGHT', 1))),
+]
+CASE_IDS = [f"{name}-mode{mode}-{strategy}" + ''.join(f"-{k}={v}" for k, v in extra)
+            for name, mode, strategy, extra in CASES]
+TIMEOUT = 10
+
+_SOLVED = {}
+
+def solve_case(case):
+    # แต่ละ case solve ครั้งเดียว ใช้ร่วมกันทุก test
+    if case not in _SOLVED:
+        name, mode, strategy, extra = case
+        config = dict({'MODE': mode, 'TIMEOUT': TIMEOUT, 'WORKERS': 1, 'STRATEGY': strategy, 'MODEL_CACHE': False}, **dict(extra))
+        problem = prepare_problem(INSTANCES[name]())
+        df, unscheduled = run_solver(INSTANCES[name](), config)
+        _SOLVED[case] = (problem, df, unscheduled, config)
+    return _SOLVED[case]
+
+@pytest.fixture(params=CASES, ids=CASE_IDS)
+def solved(request):
+    return solve_case(request.param)
+
+def test_schedules_something(solved):
+    problem, df, unscheduled, _ = solved
+    assert df is not None and not df.empty
+    assert len(df) + len(unscheduled) == \
+        len(all_tasks(problem)) + len(problem['lock_conflicts']) + len(problem['duplicate_rows'])
+
+def test_no_resource_overlap(solved):
+    problem, df, _, _ = solved
+    assert resource_violations(problem, df) == []
+
+def test_fixed_locks_honoured(solved):
+    problem, df, _, _ = solved
+    assert lock_violations(problem, df) == []
+
+def test_lecture_before_lab(solved):
+    problem, df, _, config = solved
+    assert precedence_violations(problem, df, config) == []
+
+def test_teacher_workload(solved):
+    problem, df, _, config = solved
+    assert workload_violations(problem, df, config) == []
+
+def test_duplicate_course_rows_are_reported():
+    # ai_in_courses.csv มี CP413203 sec 1 สองแถว -> ใช้แถวแรก แถวที่ซ้ำอยู่ใน unscheduled
+    problem = prepare_problem(load_bundled())
+    assert [(r['Course'], r['Sec']) for r in problem['duplicate_rows']] == [('CP413203', 1)]
+    uids = [t['uid'] for t in all_tasks(problem)]
+    assert len(uids) == len(set(uids))
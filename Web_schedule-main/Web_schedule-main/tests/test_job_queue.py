@@ -0,0 +1,70 @@
+# ==========================================
+# 📬 Solve job queue (SQLite)
+# ==========================================
+import time
+
+import pandas as pd
+import pytest
+
+import job_queue
+import job_worker
+
+DATA = {'df_room': pd.DataFrame({'room': ['R1'], 'capacity': [40]})}
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # submit_job จำกัด cpu ของงานด้วย CPU_BUDGET ของเครื่อง -> ตั้งค่าคงที่ให้ผลไม่ขึ้นกับเครื่องที่รัน
+    monkeypatch.setattr(job_queue, 'CPU_BUDGET', 4)
+    return str(tmp_path / 'jobs.db')
+
+def expire_heartbeat(job_id, db):
+    conn = job_queue.connect(db)
+    try:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE job_id = ?", (time.time() - job_queue.STALE_AFTER_SEC - 1, job_id))
+    finally:
+        conn.close()
+
+def test_claim_respects_cpu_budget(db):
+    first = job_queue.submit_job(DATA, {'WORKERS': 3}, db)
+    second = job_queue.submit_job(DATA, {'WORKERS': 3}, db)
+    job = job_queue.claim_next_job('w1', cpu_budget=4, db_path=db)
+    assert job['job_id'] == first and job['cpu'] == 3
+    assert job['data']['df_room'].equals(DATA['df_room'])
+    # 3 + 3 > 4 -> งานถัดไปต้องรอ
+    assert job_queue.claim_next_job('w2', cpu_budget=4, db_path=db) is None
+    assert job_queue.get_job(second, db)['queue_position'] == 1
+
+    job_queue.finish_job(first, 'w1', pd.DataFrame({'Course': ['A']}), [], db)
+    assert job_queue.get_job(first, db)['status'] == job_queue.STATUS_DONE
+    assert job_queue.claim_next_job('w2', cpu_budget=4, db_path=db)['job_id'] == second
+
+def test_stale_job_is_requeued_until_max_attempts(db):
+    job_id = job_queue.submit_job(DATA, {'WORKERS': 1}, db)
+    for attempt in range(1, job_queue.MAX_ATTEMPTS + 1):
+        job = job_queue.claim_next_job(f"w{attempt}", cpu_budget=4, db_path=db)
+        assert job['job_id'] == job_id and job['attempts'] == attempt - 1
+        expire_heartbeat(job_id, db)
+    # worker หายครบ MAX_ATTEMPTS ครั้ง -> failed ไม่กลับเข้าคิวอีก
+    assert job_queue.claim_next_job('w-last', cpu_budget=4, db_path=db) is None
+    job = job_queue.get_job(job_id, db)
+    assert job['status'] == job_queue.STATUS_FAILED and 'Worker lost' in job['error']
+
+def test_heartbeat_keeps_job_running(db):
+    job_id = job_queue.submit_job(DATA, {'WORKERS': 1}, db)
+    job_queue.claim_next_job('w1', cpu_budget=4, db_path=db)
+    expire_heartbeat(job_id, db)
+    job_queue.heartbeat(job_id, 'w1', db)
+    assert job_queue.claim_next_job('w2', cpu_budget=4, db_path=db) is None
+    assert job_queue.get_job(job_id, db)['worker'] == 'w1'
+
+def test_log_lines_are_written_in_batches(db, monkeypatch):
+    opened = []
+    connect = job_queue.connect
+    monkeypatch.setattr(job_queue, 'connect', lambda db_path=None: opened.append(1) or connect(db_path))
+    write, flush = job_worker.log_buffer('job', db)
+    for i in range(job_worker.LOG_BATCH_LINES * 2 + 5):
+        write(f"line {i}")
+    flush()
+    assert len(opened) == 3
+    logs = job_queue.get_job_logs('job', db, limit=1000)
+    assert len(logs) == job_worker.LOG_BATCH_LINES * 2 + 5 and logs[-1] == f"line {len(logs) - 1}"
@@ -0,0 +1,35 @@
+# ==========================================
+# 🔁 Large Neighborhood Search (LNS)
+# ==========================================
+import time
+
+import lns
+from instances import generate_instance
+from scheduler_core import build_full_model, extract_assignment, prepare_problem, solve_model, teacher_idle_slots
+
+CONFIG = {'MODE': 2, 'TIMEOUT': 10, 'WORKERS': 1}
+
+def solved_small():
+    problem = prepare_problem(generate_instance(seed=2, n_courses=6, n_locked=0))
+    bundle = build_full_model(problem, CONFIG)
+    _, solver = solve_model(bundle, CONFIG)
+    return problem, extract_assignment(bundle, solver)
+
+def test_stops_when_everything_is_placed():
+    problem, assignment = solved_small()
+    assert len(assignment) == len(problem['tasks'])
+
+    started = time.time()
+    best, history = lns.improve_schedule(problem, CONFIG, assignment, time_limit=30)
+    assert history == [] and best == assignment
+    assert time.time() - started < 1
+
+def test_accepts_penalty_only_improvement():
+    # ทุก task วางแล้ว -> คะแนนเท่าเดิม แต่ช่วงว่างของครูลดได้ก็ต้องรับ
+    problem, assignment = solved_small()
+    config = dict(CONFIG, IDLE_GAP_WEIGHT=1)
+    best, history = lns.improve_schedule(problem, config, assignment, time_limit=8)
+
+    assert len(best) == len(assignment) and any(h['Accepted'] for h in history)
+    assert sum(teacher_idle_slots(problem, best).values()) < sum(teacher_idle_slots(problem, assignment).values())
+    assert lns.schedule_objective(problem, config, best) == history[-1]['Score']
@@ -0,0 +1,116 @@
+# ==========================================
+# ✋ Manual adjustments
+# ==========================================
+import pytest
+
+import manual_edit
+from greedy import greedy_schedule
+from instances import generate_instance, schedule_violations
+from scheduler_core import DAYS, assignment_to_results, prepare_problem
+
+CONFIG = {'MODE': 2, 'TIMEOUT': 5, 'WORKERS': 1}
+
+@pytest.fixture
+def drafted():
+    problem = prepare_problem(generate_instance(seed=1))
+    df, _ = assignment_to_results(problem, greedy_schedule(problem, CONFIG))
+    return problem, df, manual_edit.build_index(df, problem)
+
+def position(df, idx):
+    return df.loc[idx, 'Day'], manual_edit.slot_of(df.loc[idx, 'StartVal']), df.loc[idx, 'Room']
+
+def free_rows(problem, df, index):
+    return [idx for idx in df.index if index['tasks'][idx]['uid'] not in problem['locked']]
+
+def test_current_positions_have_no_conflicts(drafted):
+    problem, df, index = drafted
+    assert len(index['tasks']) == len(df)
+    for idx in df.index:
+        kinds = {c['Conflict'] for c in manual_edit.check_move(index, df, idx, *position(df, idx))}
+        assert kinds == ({'fixed'} if idx not in free_rows(problem, df, index) else set())
+
+def test_overlap_is_reported_with_the_other_row(drafted):
+    problem, df, index = drafted
+    a, b = free_rows(problem, df, index)[:2]
+    conflicts = manual_edit.check_move(index, df, a, *position(df, b))
+    assert b in {c['With'] for c in conflicts}
+
+def index_cells(index):
+    return {k: v for k, v in index['cells'].items() if v}
+
+def test_apply_move_updates_index_incrementally(drafted):
+    problem, df, index = drafted
+    for idx in free_rows(problem, df, index):
+        spot = next(((d, s, r) for d in DAYS for s in range(manual_edit.TOTAL_SLOTS) for r in [df.loc[idx, 'Room']]
+                     if (d, s) != position(df, idx)[:2] and not manual_edit.check_move(index, df, idx, d, s, r)), None)
+        if spot: break
+    assert spot is not None
+    manual_edit.apply_move(index, df, idx, *spot)
+    assert position(df, idx) == spot
+    assert index_cells(index) == index_cells(manual_edit.build_index(df, problem))
+    assert schedule_violations(problem, df) == []
+
+def test_reoptimize_resolves_forced_move(drafted):
+    problem, df, index = drafted
+    # ย้ายไปทับคาบอื่น โดยที่ชนกับคาบอื่นเท่านั้น (ไม่ชนกฎเวลา/ห้อง)
+    rows = free_rows(problem, df, index)
+    a, spot = next((a, position(df, b)) for a in rows for b in rows if a != b
+                   and all(c['Resolvable'] for c in manual_edit.check_move(index, df, a, *position(df, b))))
+    moved = df.copy()
+    manual_edit.apply_move(index, moved, a, *spot)
+    new_df, _ = manual_edit.reoptimize(index, moved, a, CONFIG, 5)
+    assert schedule_violations(problem, new_df) == []
+    row = df.loc[a]
+    placed = new_df[(new_df['Course'] == row['Course']) & (new_df['Sec'] == row['Sec']) & (new_df['Type'] == row['Type'])]
+    assert (spot[0], manual_edit.slot_time(spot[1]), spot[2]) in set(zip(placed['Day'], placed['Start'], placed['Room']))
+
+def test_move_onto_locked_row_cannot_be_reoptimized(drafted):
+    problem, df, index = drafted
+    # ย้ายไปทับห้อง/เวลาของคาบที่ล็อกไว้: solver ย้ายคาบที่ล็อกไม่ได้
+    rows = free_rows(problem, df, index)
+    locked_rows = [idx for idx in df.index if idx not in rows]
+    a, b = next((a, b) for b in locked_rows for a in rows if df.loc[a, 'Duration'] <= df.loc[b, 'Duration'])
+    conflicts = manual_edit.check_move(index, df, a, *position(df, b))
+    assert any(c['With'] == b and not c['Resolvable'] for c in conflicts)
+
+    moved = df.copy()
+    manual_edit.apply_move(index, moved, a, *position(df, b))
+    assert manual_edit.reoptimize(index, moved, a, CONFIG, 5) is None
+
+def kinds_at(index, df, idx, spot, config=None):
+    return {c['Conflict'] for c in manual_edit.check_move(index, df, idx, *spot, config=config)}
+
+def test_section_rules_follow_config(drafted):
+    problem, df, index = drafted
+    rows = free_rows(problem, df, index)
+    lec, lab = next((a, b) for a in rows for b in rows
+                    if df.loc[a, 'Type'] == 'Lec' and df.loc[b, 'Type'] == 'Lab'
+                    and (df.loc[a, 'Course'], df.loc[a, 'Sec']) == (df.loc[b, 'Course'], df.loc[b, 'Sec'])
+                    and position(df, a)[1] + df.loc[a, 'Duration'] + df.loc[b, 'Duration'] <= manual_edit.TOTAL_SLOTS
+                    and position(df, a)[1] >= df.loc[b, 'Duration'])
+    # Lab ต่อท้าย Lec วันเดียวกัน: ผ่านกฎปกติ แต่ไม่ผ่าน LAB_MIN_GAP_DAYS = 1
+    day, s, _ = position(df, lec)
+    spot = (day, s + int(df.loc[lec, 'Duration']), df.loc[lab, 'Room'])
+    assert 'order' not in kinds_at(index, df, lab, spot, CONFIG)
+    assert 'order' in kinds_at(index, df, lab, spot, dict(CONFIG, LAB_MIN_GAP_DAYS=1))
+    # Lab ก่อน Lec ผิดเสมอ
+    assert 'order' in kinds_at(index, df, lab, (day, s - int(df.loc[lab, 'Duration']), df.loc[lab, 'Room']), CONFIG)
+
+def test_teacher_workload_rules(drafted):
+    problem, df, index = drafted
+    rows = free_rows(problem, df, index)
+    a, b = next((a, b) for a in rows for b in rows if a != b and df.loc[a, 'Day'] != df.loc[b, 'Day']
+                and set(manual_edit.teachers_of(df.loc[a])) & set(manual_edit.teachers_of(df.loc[b])))
+    teachers = set(manual_edit.teachers_of(df.loc[a])) | set(manual_edit.teachers_of(df.loc[b]))
+    for tea in teachers: problem['teacher_max_slots'].pop(tea, None)
+    tea = sorted(set(manual_edit.teachers_of(df.loc[a])) & set(manual_edit.teachers_of(df.loc[b])))[0]
+    # ต่อท้ายคาบของครูคนเดียวกัน -> สอนติดกัน dur_a + dur_b slot
+    day, s, _ = position(df, b)
+    spot = (day, s + int(df.loc[b, 'Duration']), df.loc[a, 'Room'])
+    run_hours = (int(df.loc[a, 'Duration']) + int(df.loc[b, 'Duration'])) / 2
+    assert 'workload' not in kinds_at(index, df, a, spot, dict(CONFIG, MAX_CONSECUTIVE=run_hours + 6))
+    conflicts = manual_edit.check_move(index, df, a, *spot, config=dict(CONFIG, MAX_CONSECUTIVE=run_hours - 0.5))
+    assert any(c['Conflict'] == 'workload' and c['Resolvable'] for c in conflicts)
+
+    problem['teacher_max_slots'][tea] = int(df.loc[a, 'Duration'])
+    assert 'workload' in kinds_at(index, df, a, spot, CONFIG)
@@ -0,0 +1,55 @@
+# ==========================================
+# 💾 Compiled model cache
+# ==========================================
+import os
+
+import model_cache
+from instances import generate_instance
+from scheduler_core import build_full_model, prepare_problem
+
+CONFIG = {'MODE': 2, 'TIMEOUT': 10, 'WORKERS': 1}
+
+def test_save_load_round_trip(tmp_path):
+    problem = prepare_problem(generate_instance(seed=2))
+    fp = model_cache.model_fingerprint(problem, CONFIG)
+    assert model_cache.load_bundle(fp, problem['tasks'], str(tmp_path)) is None
+
+    bundle = build_full_model(problem, CONFIG)
+    model_cache.save_bundle(fp, bundle, str(tmp_path))
+    # โหลดแล้วต้องนับเป็นการใช้งานล่าสุด (LRU)
+    for path in model_cache._paths(fp, str(tmp_path)):
+        os.utime(path, (1000, 1000))
+    loaded = model_cache.load_bundle(fp, problem['tasks'], str(tmp_path))
+
+    assert all(os.stat(p).st_mtime > 1000 for p in model_cache._paths(fp, str(tmp_path)))
+    assert str(loaded['model'].Proto()) == str(bundle['model'].Proto())
+    assert set(loaded['schedule']) == set(bundle['schedule'])
+    assert all(loaded['schedule'][k].Index() == v.Index() for k, v in bundle['schedule'].items())
+    assert {u: v.Index() for u, v in loaded['is_scheduled'].items()} == \
+        {u: v.Index() for u, v in bundle['is_scheduled'].items()}
+    assert {u: {k: v.Index() for k, v in tv.items()} for u, tv in loaded['task_vars'].items()} == \
+        {u: {k: v.Index() for k, v in tv.items()} for u, tv in bundle['task_vars'].items()}
+
+def test_fingerprint_ignores_runtime_settings():
+    problem = prepare_problem(generate_instance(seed=2))
+    fp = model_cache.model_fingerprint(problem, CONFIG)
+    assert model_cache.model_fingerprint(problem, dict(CONFIG, TIMEOUT=99, WORKERS=8, LNS_TIME=30)) == fp
+    assert model_cache.model_fingerprint(problem, dict(CONFIG, MAX_CONSECUTIVE=3)) != fp
+
+def test_evict_drops_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path)
+    for i, fp in enumerate(['old', 'mid', 'new']):
+        for path in model_cache._paths(fp, cache_dir):
+            with open(path, 'wb') as f:
+                f.write(b'x' * 1000)
+            os.utime(path, (1000 + i, 1000 + i))
+
+    # ใช้ 'old' ล่าสุด -> 'mid' กลายเป็นตัวที่ไม่ได้ใช้นานที่สุด
+    for path in model_cache._paths('old', cache_dir):
+        os.utime(path, (2000, 2000))
+    model_cache.evict(cache_dir, max_bytes=4000)
+    remaining = {name.split('.', 1)[0] for name in os.listdir(cache_dir)}
+    assert remaining == {'old', 'new'}
+
+    model_cache.evict(cache_dir, max_bytes=0)
+    assert os.listdir(cache_dir) == []
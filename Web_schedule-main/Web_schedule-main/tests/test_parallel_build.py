@@ -0,0 +1,64 @@
+# ==========================================
+# 🏭 Parallel model building
+# ==========================================
+import multiprocessing
+import time
+
+import pytest
+
+import parallel_build
+from instances import generate_instance
+from scheduler_core import build_model, prepare_problem
+
+@pytest.fixture
+def pool(monkeypatch):
+    # บังคับใช้ process pool แม้เครื่องที่รันเทสต์มี cpu เดียวและโมเดลเล็ก (ห้าม fallback ไป build_model)
+    monkeypatch.setattr(parallel_build, 'MIN_PARALLEL_CANDIDATES', 0)
+    monkeypatch.setattr(parallel_build.os, 'cpu_count', lambda: 4)
+    def no_serial(*args, **kwargs):
+        raise AssertionError("fell back to build_model")
+    monkeypatch.setattr(parallel_build, 'build_model', no_serial)
+
+@pytest.mark.parametrize('config', [
+    {'MODE': 2},
+    {'MODE': 1, 'MAX_CONSECUTIVE': 3, 'LAB_MIN_GAP_DAYS': 1, 'SPLIT_LEC_DIFFERENT_DAYS': True, 'IDLE_GAP_WEIGHT': 2},
+], ids=['default', 'rules'])
+def test_merged_proto_equals_serial_build(pool, config):
+    problem = prepare_problem(generate_instance(seed=3))
+    serial = build_model(problem, config)
+    merged = parallel_build.build_model_parallel(problem, dict(config, LOG_CALLBACK=print), n_proc=3)
+
+    assert str(merged['model'].Proto()) == str(serial['model'].Proto())
+    assert {k: v.Index() for k, v in merged['schedule'].items()} == {k: v.Index() for k, v in serial['schedule'].items()}
+    assert {u: v.Index() for u, v in merged['is_scheduled'].items()} == \
+        {u: v.Index() for u, v in serial['is_scheduled'].items()}
+    # pool ถูกปิดเมื่อ build เสร็จ
+    assert multiprocessing.active_children() == []
+
+def test_main_process_work_is_a_small_share(pool):
+    # benchmark: เวลา CPU ของ process หลัก = ส่วนที่ทำขนานไม่ได้ -> build_model / ค่านี้ = เร็วขึ้นได้สูงสุดกี่เท่า
+    problem = prepare_problem(generate_instance(seed=1, n_courses=60, n_rooms=20, n_teachers=30, n_groups=4))
+    config = {'MODE': 2}
+    start = time.process_time()
+    serial = build_model(problem, config)
+    serial_cpu = time.process_time() - start
+    start = time.process_time()
+    merged = parallel_build.build_model_parallel(problem, config, n_proc=2)
+    main_cpu = time.process_time() - start
+
+    assert len(merged['schedule']) == len(serial['schedule']) > 50000
+    print(f"build_model {serial_cpu:.2f}s, main process of build_model_parallel {main_cpu:.2f}s "
+          f"-> speedup ceiling {serial_cpu / main_cpu:.1f}x")
+    # วัดได้ ~2.2 เท่า (ส่วนที่เหลือคือ merge_text_format ดูหัวไฟล์ parallel_build.py)
+    assert serial_cpu / main_cpu >= 1.8
+
+def test_split_chunks_keeps_order_and_balances():
+    chunks = parallel_build.split_chunks(list(range(10)), [1] * 10, 3)
+    assert [i for c in chunks for i in c] == list(range(10))
+    assert len(chunks) == 3 and max(map(len, chunks)) - min(map(len, chunks)) <= 1
+
+def test_small_models_skip_the_pool():
+    problem = prepare_problem(generate_instance(seed=3))
+    assert parallel_build.candidate_bound(problem, {'MODE': 2}) < parallel_build.MIN_PARALLEL_CANDIDATES
+    assert parallel_build.candidate_bound(problem, {'MODE': 2}) >= \
+        len(build_model(problem, {'MODE': 2})['schedule'])
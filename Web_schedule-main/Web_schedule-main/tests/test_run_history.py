@@ -0,0 +1,58 @@
+# ==========================================
+# 🕓 Run history & schedule diff
+# ==========================================
+import io
+import zipfile
+
+import pandas as pd
+
+import run_history
+
+COLS = ['Course', 'Sec', 'Type', 'Day', 'Start', 'End', 'StartVal', 'Room', 'Teachers']
+
+def schedule(rows):
+    return pd.DataFrame(rows, columns=COLS)
+
+OLD = schedule([
+    ('C1', 1, 'Lec', 'Mon', '09:00', '10:30', 9.0, 'R1', 'T1'),
+    ('C1', 1, 'Lec', 'Wed', '09:00', '10:30', 9.0, 'R1', 'T1'),
+    ('C2', 1, 'Lab', 'Tue', '13:00', '16:00', 13.0, 'LAB1', 'T2'),
+    ('C3', 1, 'Lec', 'Thu', '10:00', '12:00', 10.0, 'R2', 'T3'),
+])
+
+def test_diff_counts_moved_new_and_unscheduled():
+    new = schedule([
+        ('C1', 1, 'Lec', 'Mon', '09:00', '10:30', 9.0, 'R1', 'T1'),   # เหมือนเดิม
+        ('C1', 1, 'Lec', 'Thu', '09:00', '10:30', 9.0, 'R1', 'T1'),   # ย้ายวัน
+        ('C2', 1, 'Lab', 'Tue', '13:00', '16:00', 13.0, 'LAB2', 'T2'),  # ย้ายห้อง
+        ('C4', 2, 'Lec', 'Fri', '09:00', '11:00', 9.0, 'R3', 'T4'),   # ใหม่
+    ])                                                                 # C3 หายไป
+    diff = run_history.diff_schedules(OLD, new)
+    changes = {(r['Course'], r['Part']): r['Change'] for r in diff.to_dict('records')}
+    assert changes == {('C1', 1): 'moved', ('C2', 0): 'moved', ('C4', 0): 'new', ('C3', 0): 'unscheduled'}
+
+    moved = diff.set_index(['Course', 'Part'])
+    assert moved.loc[('C1', 1), 'DayChanged'] and not moved.loc[('C1', 1), 'RoomChanged']
+    assert moved.loc[('C2', 0), 'RoomChanged'] and not moved.loc[('C2', 0), 'TimeChanged']
+
+    summary = run_history.diff_summary(diff)
+    assert summary == {'Moved': 2, 'Newly Scheduled': 1, 'Became Unscheduled': 1,
+                       'Teachers Affected': 4, 'Rooms Affected': 5}
+
+def test_diff_of_identical_or_empty_runs():
+    assert run_history.diff_schedules(OLD, OLD.sample(frac=1, random_state=0)).empty
+    assert run_history.diff_summary(run_history.diff_schedules(OLD, pd.DataFrame()))['Became Unscheduled'] == 4
+    assert run_history.diff_summary(run_history.diff_schedules(None, OLD))['Newly Scheduled'] == 4
+
+def test_changed_timetables_zip_only_has_affected_resources():
+    new = OLD.assign(Room=OLD['Room'].where(OLD['Course'] != 'C3', 'R9'))
+    data = run_history.changed_timetables_zip(new, run_history.diff_schedules(OLD, new))
+    names = set(zipfile.ZipFile(io.BytesIO(data)).namelist())
+    assert names == {'rooms/R9.csv', 'teachers/T3.csv'}
+
+def test_history_keeps_latest_runs():
+    history = []
+    runs = [run_history.add_run(history, OLD, [], {}, label=str(i), limit=3) for i in range(5)]
+    assert [r['label'] for r in history] == ['2', '3', '4']
+    assert run_history.get_run(history, runs[0]['run_id']) is None
+    assert run_history.get_run(history, runs[-1]['run_id']) is runs[-1]
@@ -0,0 +1,35 @@
+# ==========================================
+# 📊 Schedule quality metrics
+# ==========================================
+import pandas as pd
+
+from schedule_metrics import DAY_HOURS, DAYS, compute_metrics
+
+def schedule(rows):
+    # rows: [(Day, StartVal, Duration, Room)]
+    df = pd.DataFrame(rows, columns=['Day', 'StartVal', 'Duration', 'Room'])
+    return df.assign(Start='', End='', Course=[f"C{i}" for i in range(len(df))], Sec=1, Type='Lec',
+                     Teachers='T1', Enrollment=30)
+
+def test_room_utilization_counts_idle_rooms_and_days():
+    df = schedule([('Mon', 9.0, 6, 'R1'), ('Tue', 9.0, 4, 'R1'), ('Mon', 13.0, 2, 'Online')])
+    df_room = pd.DataFrame({'room': ['R1', 'R2', 'R3', 'R4'], 'capacity': [40, 40, 40, 40]})
+    summary, tables = compute_metrics(df, df_room, mode=1)
+
+    util = tables['room_utilization']
+    assert list(util.index) == ['R1', 'R2', 'R3', 'R4'] and list(util.columns) == DAYS
+    assert util.loc['R1', 'Mon'] == round(3.0 / DAY_HOURS[1], 3)
+    assert (util.loc[['R2', 'R3', 'R4']].to_numpy() == 0).all()
+    # 5 ชั่วโมงจาก 4 ห้อง x 5 วัน
+    assert abs(summary['Room Utilization'] - util.to_numpy().mean()) < 1e-9
+    assert abs(summary['Room Utilization'] - 5.0 / DAY_HOURS[1] / 20) < 1e-3
+
+def test_room_utilization_keeps_rooms_outside_room_list():
+    # ห้องของวิชา fixed ที่ไม่อยู่ใน room.csv ยังต้องแสดง
+    df = schedule([('Fri', 9.0, 2, 'LAB-X')])
+    _, tables = compute_metrics(df, pd.DataFrame({'room': ['R1'], 'capacity': [40]}))
+    assert list(tables['room_utilization'].index) == ['R1', 'LAB-X']
+
+def test_room_utilization_online_only():
+    summary, tables = compute_metrics(schedule([('Mon', 9.0, 2, 'Online')]))
+    assert tables['room_utilization'].empty and summary['Room Utilization'] == 0.0
@@ -0,0 +1,57 @@
+# ==========================================
+# 🔗 Absolute-time encoding และกฎลำดับ/ระยะห่างของ section
+# ==========================================
+import pytest
+from ortools.sat.python import cp_model
+
+from instances import generate_instance, precedence_violations
+from scheduler_core import (assignment_to_results, build_model, extract_assignment, prepare_problem, run_solver,
+                            section_violations, solve_model)
+
+def solve(config):
+    data = generate_instance(seed=1, n_courses=8)
+    data['df_ai_in'].loc[:3, 'lecture_hour'] = 4   # 8 slot -> แบ่งเป็น P1 (6) + P2 (2)
+    problem = prepare_problem(data)
+    assert any(t['uid'].endswith('_P2') for t in problem['tasks'])
+    config = dict({'MODE': 1, 'TIMEOUT': 5, 'WORKERS': 1}, **config)
+    bundle = build_model(problem, config)
+    status, solver = solve_model(bundle, config)
+    assert status in [cp_model.OPTIMAL, cp_model.FEASIBLE]
+    return problem, bundle, solver
+
+def test_abs_matches_day_and_start():
+    problem, bundle, solver = solve({})
+    for uid, tv in bundle['task_vars'].items():
+        if solver.Value(bundle['is_scheduled'][uid]):
+            assert solver.Value(tv['abs']) == solver.Value(tv['day']) * problem['total_slots'] + solver.Value(tv['start'])
+
+@pytest.mark.parametrize('rules', [
+    {'LAB_MIN_GAP_DAYS': 1},
+    {'LAB_MAX_GAP_DAYS': 0},
+    {'SPLIT_LEC_DIFFERENT_DAYS': True},
+])
+def test_section_rules(rules):
+    problem, bundle, solver = solve(rules)
+    df, _ = assignment_to_results(problem, extract_assignment(bundle, solver))
+    assert not df.empty
+    assert precedence_violations(problem, df, rules) == []
+
+def test_section_violations_finds_lab_before_lecture():
+    problem = prepare_problem(generate_instance(seed=1, n_courses=8))
+    lec, lab = next((a, b) for a in problem['tasks'] for b in problem['tasks']
+                    if (a['id'], a['sec'], a['type'], b['type']) == (b['id'], b['sec'], 'Lec', 'Lab'))
+    assert section_violations(problem, {}, {lec['uid']: ('R00', 0, 1), lab['uid']: ('L00', 1, 1)}) == []
+    assert section_violations(problem, {}, {lec['uid']: ('R00', 1, 1), lab['uid']: ('L00', 0, 1)}) == [(lec['uid'], lab['uid'])]
+    assert section_violations(problem, {'LAB_MIN_GAP_DAYS': 2}, {lec['uid']: ('R00', 0, 1), lab['uid']: ('L00', 1, 1)})
+
+def test_decompose_never_returns_section_violations(monkeypatch):
+    # วันที่ได้จากขั้นแรกผิดกฎ (Lab ทุกตัววันจันทร์, Lec วันศุกร์) -> ผลสุดท้ายต้องยังถูกกฎ
+    import decomposition
+    data = generate_instance(seed=1, n_courses=8)
+    problem = prepare_problem(generate_instance(seed=1, n_courses=8))
+    monkeypatch.setattr(decomposition, 'assign_days', lambda problem, *args: {
+        t['uid']: 0 if t['type'] == 'Lab' else 4 for t in problem['tasks']})
+    config = {'MODE': 2, 'TIMEOUT': 5, 'WORKERS': 1, 'STRATEGY': 'decompose', 'MODEL_CACHE': False, 'GREEDY_DRAFT': False}
+    df, _ = run_solver(data, config)
+    assert not df.empty
+    assert precedence_violations(problem, df) == []
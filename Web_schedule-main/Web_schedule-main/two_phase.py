@@ -0,0 +1,136 @@
+# ==========================================
+# 🏫 Two-phase Mode: Time first, Rooms later
+# ==========================================
+# โมเดลปกติมีตัวแปรต่อ (task, ห้อง, วัน, slot) -> จำนวนห้องคูณเข้าไปทุกตัวแปร
+#   1) Time model: เลือก (วัน, เวลาเริ่ม) ต่อ task พร้อมเงื่อนไขครู/กลุ่ม/Lec ก่อน Lab ตามปกติ
+#      ห้องใช้แค่ความจุรวม: ทุกช่วงเวลา จำนวน task ที่ใช้ได้เฉพาะห้องในกลุ่ม E <= จำนวนห้องใน E ที่ว่าง
+#      (E = ชุดห้องที่ task ใช้ได้ เช่น lab ความจุ >= 50, lecture ความจุ >= 90, ห้องที่ fix ไว้)
+#   2) Room assignment: เลือกห้องจริงแยกทีละวัน (โมเดลเล็ก ไม่มีตัวแปรเวลา) รันขนานกันใน thread pool
+#   3) Repair: task ที่หาห้องไม่ได้ นำไปวางใหม่โดยล็อก task อื่นไว้ (decomposition.repair)
+from concurrent.futures import ThreadPoolExecutor
+
+from ortools.sat.python import cp_model
+
+import availability
+from decomposition import repair
+from greedy import hint_draft
+from scheduler_core import (DAYS, add_task_vars, finish_model, iter_candidates, room_fits,
+                            solve_model, task_score)
+
+TIME_PHASE_SHARE = 0.7
+ROOM_PHASE_SHARE = 0.1   # ที่เหลือใช้กับ repair
+
+def eligible_rooms(problem, t):
+    return frozenset(r['room'] for r in problem['room_list'] if room_fits(t, r) and r['room'] != 'Online')
+
+def time_candidates(problem, config, t):
+    # (day, start) ที่มีห้องที่ใช้ได้ว่างอย่างน้อยหนึ่งห้อง
+    return sorted({(d, s) for _, d, s in iter_candidates(problem, config, t)})
+
+def build_time_model(problem, config):
+    tasks = problem['tasks']
+    model = cp_model.CpModel()
+    schedule, is_scheduled, task_vars = {}, {}, {}
+    for t in tasks:
+        cands = [(None, d, s) for d, s in time_candidates(problem, config, t)]
+        is_scheduled[t['uid']], task_vars[t['uid']], cand_vars = add_task_vars(model, problem, t, cands)
+        schedule.update(cand_vars)
+    bundle = finish_model(model, problem, config, tasks, schedule, is_scheduled, task_vars)
+    add_room_capacity(model, problem, tasks, schedule)
+    return bundle
+
+def add_room_capacity(model, problem, tasks, schedule):
+    # ต่อ (วัน, slot, ชุดห้อง E): task ที่ห้องที่ใช้ได้ทั้งหมดอยู่ใน E ใช้พร้อมกันได้ไม่เกินจำนวนห้องว่างใน E
+    task_by_uid = {t['uid']: t for t in tasks}
+    eligible = {t['uid']: eligible_rooms(problem, t) for t in tasks if not t['is_online']}
+    room_sets = {E for E in eligible.values() if E}
+    members = {E: {uid for uid, e in eligible.items() if e and e <= E} for E in room_sets}
+
+    cover = {}   # (day, slot) -> [(uid, var)]
+    for (uid, _, d, s), var in schedule.items():
+        if uid not in eligible: continue
+        for k in range(task_by_uid[uid]['dur']):
+            cover.setdefault((d, s + k), []).append((uid, var))
+
+    engine = problem['availability']
+    for (d, k), items in cover.items():
+        for E, uids in members.items():
+            terms = [var for uid, var in items if uid in uids]
+            free = sum(1 for r in E if not availability.busy_mask(engine, 'room', r, d) >> k & 1)
+            if len(terms) > free:
+                model.Add(sum(terms) <= free)
+
+def assign_rooms_day(problem, day_tasks, d, time_limit):
+    # day_tasks: [(task, start)] ของวัน d -> {uid: room} (task ที่หาห้องไม่ได้จะไม่อยู่ในผล)
+    engine = problem['availability']
+    model = cp_model.CpModel()
+    rooms_of = {}
+    cells = {}
+    objective_terms = []
+    result = {}
+    for t, s in day_tasks:
+        if t['is_online']:
+            result[t['uid']] = 'Online'
+            continue
+        y = {}
+        for r in eligible_rooms(problem, t):
+            if not availability.is_free(availability.busy_mask(engine, 'room', r, d), s, t['dur']): continue
+            y[r] = model.NewBoolVar(f"y_{t['uid']}_{r}")
+            for k in range(t['dur']):
+                cells.setdefault((r, s + k), []).append(y[r])
+        if y:
+            model.AddAtMostOne(y.values())
+            objective_terms.append(sum(y.values()) * task_score(t))
+            rooms_of[t['uid']] = y
+    for cell_vars in cells.values():
+        if len(cell_vars) > 1: model.AddAtMostOne(cell_vars)
+    if not rooms_of:
+        return result
+
+    model.Maximize(sum(objective_terms))
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = 1
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return result
+    for uid, y in rooms_of.items():
+        for r, var in y.items():
+            if solver.Value(var):
+                result[uid] = r
+                break
+    return result
+
+def solve_two_phase(problem, config, draft=None):
+    # draft: ตารางร่าง {uid: (room, day, start)} ใช้เป็น hint ของ time model (ดู greedy.py)
+    total_time = config['TIMEOUT']
+    workers = config.get('WORKERS', 4)
+
+    bundle = build_time_model(problem, config)
+    if draft: hint_draft(bundle, problem, draft)
+    status, solver = solve_model(bundle, config, time_limit=total_time * TIME_PHASE_SHARE)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return {}
+
+    times = {}
+    for (uid, _, d, s), var in bundle['schedule'].items():
+        if solver.Value(var): times[uid] = (d, s)
+
+    by_day = {}
+    for t in problem['tasks']:
+        if t['uid'] in times:
+            d, s = times[t['uid']]
+            by_day.setdefault(d, []).append((t, s))
+
+    # CP-SAT ปล่อย GIL ระหว่าง Solve จึงใช้ thread ได้ (โมเดลต่อวันเล็ก ไม่คุ้มที่จะแยก process)
+    room_time = total_time * ROOM_PHASE_SHARE
+    assignment = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(DAYS)))) as pool:
+        futures = {d: pool.submit(assign_rooms_day, problem, day_tasks, d, room_time)
+                   for d, day_tasks in by_day.items()}
+        for d, f in futures.items():
+            for uid, r in f.result().items():
+                assignment[uid] = (r, d, times[uid][1])
+
+    repair_time = total_time * (1 - TIME_PHASE_SHARE - ROOM_PHASE_SHARE)
+    return repair(problem, config, assignment, repair_time, workers)